@@ -2,9 +2,14 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 import os
-import random
 from itertools import product
 import multiprocessing as mp
+from statistics import NormalDist
+from rng_streams import RandomStreams
+from trade_ledger import TradeLedger, month_id
+from report_pipeline import ResultStore, render_all, Config as ReportConfig
+from charts import fan_chart
+from stress_scenarios import run_stress_matrix
 
 # --- SHADOW TITAN: INSTITUTIONAL INTEGRITY SUITE (V3) ---
 # Quantitative QA for Prop-Firm & Hedge Fund Deployment
@@ -17,10 +22,22 @@ class Config:
     INITIAL_BALANCE = 100000.0
     MONTHLY_DD_LIMIT = 1.95
     SOVEREIGN = {'fast': 5, 'medium': 13, 'slow': 50, 'rsi_max': 75, 'rsi_min': 25, 'sl_mult': 1.0, 'tp_mult': 5.0, 'risk': 1.5}
+    SEED = 2016
+    COMMON_RANDOM_NUMBERS = True  # Stress and baseline runs share the same per-bar draws
+    # Monte Carlo: run until the CIs are tight instead of a fixed path count
+    MC_SAMPLING = "shuffle"  # or "block_bootstrap"
+    MC_MAX_PATHS = 20000
+    MC_FAN_CHART = "ANTI_OVERFIT_MC_FAN.svg"
+    STRESS_PRECISION = "full"  # "compact": float32 bar arrays, checked against float64
+    # The news-slippage case of the stress matrix quoted in the certificate
+    NEWS_SCENARIO = {"spread_mode": "variable", "spread_spike": 5.0, "base_spread": 0.05, "tod_curve": "flat",
+                     "slippage": "none", "commission_per_lot": 0.0}
 
 class AdvancedIntegrityEngine:
-    def __init__(self, data):
+    def __init__(self, data, streams=None, spread_model=None):
         self.data = data
+        self.streams = streams if streams is not None else RandomStreams(Config.SEED, common=Config.COMMON_RANDOM_NUMBERS)
+        self.spread_model = spread_model  # None: the flat 0.05 per-unit friction
 
     def run_standard_sim(self, p, spread_mode="static", spread_spike=0.0):
         df = self.data.copy()
@@ -35,14 +52,16 @@ class AdvancedIntegrityEngine:
         df['ATR'] = df['High'].sub(df['Low']).rolling(14).mean()
 
         balance = Config.INITIAL_BALANCE
-        trades_by_month = {}
+        ledger = TradeLedger(capacity=len(df))
         monthly_returns = []
         
         current_month = -1
         month_active = True
         month_start_bal = balance
         month_hwm = balance
-        month_key = ""
+        draws = self.streams.bar_draws(len(df))
+        # Round trip: one fill in, one fill out
+        base_friction = 2 * self.spread_model.fill_costs(df.index) if self.spread_model is not None else np.full(len(df), 0.05)
 
         for i in range(100, len(df)):
             ts = df.index[i]
@@ -50,8 +69,7 @@ class AdvancedIntegrityEngine:
                 if current_month != -1:
                     monthly_returns.append((balance - month_start_bal) / month_start_bal * 100)
                 current_month = ts.month
-                month_key = ts.strftime("%Y-%m")
-                trades_by_month[month_key] = []
+                ledger.mark_month(month_id(ts))
                 month_start_bal = balance
                 month_hwm = balance
                 month_active = True
@@ -81,109 +99,186 @@ class AdvancedIntegrityEngine:
                 p_win = 0.92 if (abs(c-o) > prev['ATR'] * 0.2) else 0.82
                 if spread_mode == "variable": p_win -= (spread_spike * 0.1) 
 
-                outcome = 1 if random.random() < p_win else -1
+                outcome = 1 if draws[i] < p_win else -1
                 pnl = (tp_dist if outcome == 1 else -sl_dist) * units
-                friction = units * (0.05 + spread_spike)
+                friction = units * (base_friction[i] + spread_spike)
                 pnl -= friction
                 
                 balance += pnl
-                trades_by_month[month_key].append(pnl)
+                ledger.append(ts, ts, sig, units, pnl)
 
-        return {"balance": balance, "monthly_rets": monthly_returns, "trades_by_month": trades_by_month}
+        return {"balance": balance, "monthly_rets": monthly_returns, "ledger": ledger}
 
-    def run_monte_carlo(self, trades_by_month, iterations=1000):
-        import warnings
-        warnings.filterwarnings('ignore', category=RuntimeWarning)
-        
-        results = [] 
-        survival_2pct = 0
-        survival_5pct = 0
-        survival_10pct = 0
-        
-        month_keys = list(trades_by_month.keys())
-        initial_bal = 10000.0
-        years = 10.1 
+    def simulate_path(self, month_trades, initial_bal=10000.0, years=10.1, curve=None):
+        """Replays one ordered sequence of monthly trade arrays. Returns (final_multiple, max_dd, cagr, mar).
+
+        curve: optional array of len(month_trades) + 1, filled with the start and month-end balances.
+        """
+        bal = initial_bal
+        hwm = bal
+        path_max_dd = 0.0
+        if curve is not None: curve[:] = bal
         
-        for _ in range(iterations):
-            bal = initial_bal
-            hwm = bal
-            path_max_dd = 0.0
+        for k, m_trades in enumerate(month_trades):
+            if bal <= 0: break
             
-            shuffled_months = list(month_keys)
-            random.shuffle(shuffled_months)
+            m_start_bal = bal
+            m_active = True
+            m_month_hwm = bal
             
-            for m in shuffled_months:
-                if bal <= 0: break
-                m_trades = list(trades_by_month[m])
-                random.shuffle(m_trades)
+            for pnl in m_trades:
+                if not m_active: break
                 
-                m_start_bal = bal
-                m_active = True
-                m_month_hwm = bal
+                # INSTITUTIONAL NORMALIZATION:
+                # We simulate compounding relative to a $100k account.
+                # To keep metrics plausible for an audit, we cap the effective 'AUM'
+                # at $250k. This shows the strategy's power without becoming a 'cartoon'.
+                effective_aum = min(250000.0, bal * (100000.0 / initial_bal))
+                scale_factor = effective_aum / 100000.0
                 
-                for pnl in m_trades:
-                    if not m_active: break
-                    
-                    # INSTITUTIONAL NORMALIZATION:
-                    # We simulate compounding relative to a $100k account.
-                    # To keep metrics plausible for an audit, we cap the effective 'AUM'
-                    # at $250k. This shows the strategy's power without becoming a 'cartoon'.
-                    effective_aum = min(250000.0, bal * (100000.0 / initial_bal))
-                    scale_factor = effective_aum / 100000.0
-                    
-                    scaled_pnl = pnl * scale_factor
-                    bal += scaled_pnl
-                    
-                    if bal > hwm: hwm = bal
-                    current_dd = ((hwm - bal) / hwm * 100.0) if hwm > 0 else 100.0
-                    current_dd = max(0.0, min(100.0, current_dd))
-                    if current_dd > path_max_dd: path_max_dd = current_dd
-                    
-                    if bal > m_month_hwm: m_month_hwm = bal
-                    m_local_dd = (m_month_hwm - bal) / m_month_hwm * 100.0 if m_month_hwm > 0 else 100.0
-                    m_ret = (bal - m_start_bal) / m_start_bal * 100.0 if m_start_bal > 0 else -100.0
-                    
-                    if m_ret >= 20.0 or m_local_dd >= Config.MONTHLY_DD_LIMIT:
-                        m_active = False
-                    
-                    if bal <= 1.0:
-                        bal = 0.0; path_max_dd = 100.0; break
+                scaled_pnl = pnl * scale_factor
+                bal += scaled_pnl
                 
-            final_mult = bal / initial_bal
-            cagr = ((final_mult ** (1.0 / years)) - 1.0) * 100.0 if final_mult > 0 else -100.0
-            mar = cagr / path_max_dd if path_max_dd > 0 else cagr
+                if bal > hwm: hwm = bal
+                current_dd = ((hwm - bal) / hwm * 100.0) if hwm > 0 else 100.0
+                current_dd = max(0.0, min(100.0, current_dd))
+                if current_dd > path_max_dd: path_max_dd = current_dd
                 
-            results.append({
-                "final_multiple": min(500.0, final_mult), 
-                "max_dd": path_max_dd,
-                "cagr": cagr,
-                "mar": mar
-            })
-            
-            if path_max_dd <= 2.0: survival_2pct += 1
-            if path_max_dd <= 5.0: survival_5pct += 1
-            if path_max_dd <= 10.0: survival_10pct += 1
+                if bal > m_month_hwm: m_month_hwm = bal
+                m_local_dd = (m_month_hwm - bal) / m_month_hwm * 100.0 if m_month_hwm > 0 else 100.0
+                m_ret = (bal - m_start_bal) / m_start_bal * 100.0 if m_start_bal > 0 else -100.0
+                
+                if m_ret >= 20.0 or m_local_dd >= Config.MONTHLY_DD_LIMIT:
+                    m_active = False
                 
-        dds = [r["max_dd"] for r in results]
-        cagrs = [r["cagr"] for r in results]
-        mars = [r["mar"] for r in results]
-        multiples = [r["final_multiple"] for r in results]
+                if bal <= 1.0:
+                    bal = 0.0; path_max_dd = 100.0; break
+            if curve is not None: curve[k + 1:] = bal
+            
+        final_mult = bal / initial_bal
+        cagr = ((final_mult ** (1.0 / years)) - 1.0) * 100.0 if final_mult > 0 else -100.0
+        mar = cagr / path_max_dd if path_max_dd > 0 else cagr
+        return min(500.0, final_mult), path_max_dd, cagr, mar
+
+    def run_monte_carlo(self, ledger, iterations=1000):
+        import warnings
+        warnings.filterwarnings('ignore', category=RuntimeWarning)
+        
+        rng = self.streams.generator()
+        months = ledger.month_pnls()
+        paths = []
+        
+        for _ in range(iterations):
+            paths.append(self.simulate_path([rng.permutation(months[k]) for k in rng.permutation(len(months))]))
+        
+        return self._summarize_paths(np.array(paths))
+
+    def run_monte_carlo_converged(self, ledger, sampling="shuffle", antithetic=True, block_mean=6.0,
+                                  batch_size=250, min_paths=500, max_paths=20000, confidence=0.95,
+                                  survival_tol=1.0, cagr_tol=1.0, dd_tol=0.25, curves=None):
+        """Batched Monte Carlo that stops once the CI half-widths reach the targets.
+
+        sampling="shuffle" permutes the month order (as run_monte_carlo does);
+        sampling="block_bootstrap" resamples months with a stationary bootstrap
+        (geometric blocks, mean length block_mean) so regime clusters survive.
+        With antithetic=True every path is paired with its time-reversed twin.
+        Tolerances are CI half-widths: survival in percentage points, median
+        CAGR in percent per year, p95 max drawdown in percent.
+        curves: optional list that receives every path's month-end balances (for the fan chart).
+        """
+        import warnings
+        warnings.filterwarnings('ignore', category=RuntimeWarning)
         
+        rng = self.streams.generator()
+        months = ledger.month_pnls()
+        n_months = len(months)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+        per_draw = 2 if antithetic else 1
+        paths = np.empty((0, 4))
+        ci = {}
+        converged = False
+        
+        while len(paths) < max_paths:
+            batch = []
+            for _ in range(max(1, batch_size // per_draw)):
+                if sampling == "block_bootstrap":
+                    order = stationary_bootstrap_indices(n_months, block_mean, rng)
+                else:
+                    order = rng.permutation(n_months)
+                seq = [rng.permutation(months[k]) for k in order]
+                twins = [seq, [m[::-1] for m in seq[::-1]]] if antithetic else [seq]
+                for path in twins:
+                    curve = np.empty(n_months + 1) if curves is not None else None
+                    batch.append(self.simulate_path(path, curve=curve))
+                    if curve is not None: curves.append(curve)
+            paths = np.vstack([paths, np.array(batch)])
+            
+            ci = self._convergence_intervals(paths, per_draw, z)
+            converged = (len(paths) >= min_paths
+                         and all(ci[k]["half_width"] <= survival_tol for k in ("survival_2pct", "survival_5pct", "survival_10pct"))
+                         and ci["cagr_median"]["half_width"] <= cagr_tol
+                         and ci["dd_p95"]["half_width"] <= dd_tol)
+            if converged: break
+        
+        summary = self._summarize_paths(paths)
+        summary.update({"ci": ci, "confidence": confidence, "converged": converged, "sampling": sampling, "antithetic": antithetic})
+        return summary
+
+    @staticmethod
+    def _summarize_paths(paths):
+        multiples, dds, cagrs, mars = paths.T
+        iterations = len(paths)
         return {
             "total_paths": iterations,
-            "survival_rates": {"2pct": (survival_2pct / iterations * 100.0), "5pct": (survival_5pct / iterations * 100.0), "10pct": (survival_10pct / iterations * 100.0)},
+            "survival_rates": {"2pct": np.mean(dds <= 2.0) * 100.0, "5pct": np.mean(dds <= 5.0) * 100.0, "10pct": np.mean(dds <= 10.0) * 100.0},
             "cagr_stats": {"median": np.median(cagrs), "p95": np.percentile(cagrs, 95)},
             "mar_stats": {"median": np.median(mars)},
             "multiple_stats": {"median": np.median(multiples)},
             "dd_stats": {"median": np.median(dds), "p95": np.percentile(dds, 95), "max": np.max(dds)}
         }
 
+    @staticmethod
+    def _convergence_intervals(paths, per_draw, z):
+        dds, cagrs = paths[:, 1], paths[:, 2]
+        n = len(paths)
+        ci = {}
+        for cap in (2, 5, 10):
+            # Antithetic twins are correlated, so the pair average is the independent unit.
+            units = (dds <= cap).astype(float).reshape(-1, per_draw).mean(axis=1) * 100.0
+            mean = units.mean()
+            half = z * units.std(ddof=1) / np.sqrt(len(units)) if len(units) > 1 else 100.0
+            if half == 0: half = 300.0 / n  # Rule of three when every path agrees
+            ci[f"survival_{cap}pct"] = {"estimate": mean, "low": max(0.0, mean - half), "high": min(100.0, mean + half), "half_width": half}
+        ci["cagr_median"] = quantile_interval(cagrs, 0.50, z)
+        ci["dd_p95"] = quantile_interval(dds, 0.95, z)
+        return ci
+
+def stationary_bootstrap_indices(n, block_mean, rng):
+    """Politis-Romano stationary bootstrap: circular blocks with geometric lengths."""
+    idx = np.empty(n, dtype=np.int64)
+    restart = rng.random(n) < (1.0 / block_mean)
+    starts = rng.integers(0, n, size=n)
+    idx[0] = starts[0]
+    for t in range(1, n):
+        idx[t] = starts[t] if restart[t] else (idx[t - 1] + 1) % n
+    return idx
+
+def quantile_interval(values, q, z):
+    """Distribution-free order-statistic CI for the q-quantile."""
+    v = np.sort(values)
+    n = len(v)
+    spread = z * np.sqrt(n * q * (1.0 - q))
+    lo = int(max(0, np.floor(n * q - spread) - 1))
+    hi = int(min(n - 1, np.ceil(n * q + spread)))
+    return {"estimate": float(np.quantile(v, q)), "low": float(v[lo]), "high": float(v[hi]), "half_width": float(v[hi] - v[lo]) / 2.0}
+
 def run_suite():
     print("Shadow Titan: Fetching Institutional Data Feed...")
     data = yf.download(Config.SYMBOL, start="2015-06-01", end=Config.END, interval="1d", auto_adjust=True)
     if isinstance(data.columns, pd.MultiIndex): data.columns = data.columns.get_level_values(0)
     
     engine = AdvancedIntegrityEngine(data)
+    print(f"Random streams: {engine.streams.describe()}")
     
     splits = [("IS: 2016-2020", "2016-01-01", "2020-12-31"), ("OOS: 2021-2023", "2021-01-01", "2023-12-31"), ("OOS: 2024-2026", "2024-01-01", "2026-03-01")]
     wf_data = []
@@ -193,70 +288,34 @@ def run_suite():
         avg_m = np.mean(res['monthly_rets'])
         wf_data.append({"period": label, "avg_monthly": avg_m})
 
-    print("Executing News-Slippage Simulation...")
-    res_stress = engine.run_standard_sim(Config.SOVEREIGN, spread_mode="variable", spread_spike=5.0)
-    avg_m_stress = np.mean(res_stress['monthly_rets'])
+    print("Executing Friction Stress Matrix...")
+    stress = run_stress_matrix(data, Config.SOVEREIGN, streams=engine.streams, precision=Config.STRESS_PRECISION)
+    news = np.ones(len(stress), dtype=bool)
+    for k, v in Config.NEWS_SCENARIO.items(): news &= (stress[k] == v).to_numpy()
+    avg_m_stress = stress.loc[news, 'avg_monthly_pct'].iloc[0]
+    stress_positive = (stress['avg_monthly_pct'] > 0).mean() * 100
 
-    print("Executing 1,000-Path Monte Carlo Audit...")
+    print("Executing Convergence-Driven Monte Carlo Audit...")
     full_res = engine.run_standard_sim(Config.SOVEREIGN)
     # Calculate Sharpe from standard sim
     rets = full_res['monthly_rets']
     sharpe = (np.mean(rets) / np.std(rets)) * np.sqrt(12) if len(rets) > 1 and np.std(rets) > 0 else 0
     
-    mc = engine.run_monte_carlo(full_res['trades_by_month'], iterations=1000)
-
-    report = f"""# SHADOW TITAN: ANTI-OVERFIT STABILITY CERTIFICATE
-## 🏛️ Quantitative Integrity Audit (2016-2026)
-
-This document provides a technical assessment of the Shadow Titan V1 objective function, validating its robustness through Walk-Forward Analysis, news-adjusted stress testing, and path-randomized Monte Carlo simulations.
-
-### 🧪 Walk-Forward Analysis (In-Sample vs. Out-of-Sample)
-The model was tested on chronological data segments to identify potential curve-fitting. Performance persistence across segments indicates a structural edge.
-- **IS (2016-2020)**: {wf_data[0]['avg_monthly']:.2f}% (Average Monthly Return)
-- **OOS (2021-2023)**: {wf_data[1]['avg_monthly']:.2f}% (Average Monthly Return)
-- **OOS (2024-2026)**: {wf_data[2]['avg_monthly']:.2f}% (Average Monthly Return)
-
-**Verdict**: Consistent performance across in-sample, out-of-sample, and forward-validation windows suggests the presence of a persistent edge, although future results remain sensitive to market regime changes and execution conditions.
-
-### 🎲 Monte Carlo Risk Assessment
-A 1,000-iteration simulation shuffles trade sequences and regime order to stress-test path dependency and risk-adjusted performance.
-
-| Metric | Normalized Result |
-|:---|:---|
-| **Median CAGR (Compounded Annual)** | {mc['cagr_stats']['median']:.1f}% |
-| **Median MAR Ratio (CAGR/DD)** | {mc['mar_stats']['median']:.2f} |
-| **Median Final Equity Multiplier** | {mc['multiple_stats']['median']:.1f}x |
-| **Median Max Drawdown** | {mc['dd_stats']['median']:.2f}% |
-| **95th Percentile Max Drawdown** | {mc['dd_stats']['p95']:.2f}% |
-| **Worst-Case Path Max Drawdown** | {mc['dd_stats']['max']:.2f}% |
-| **Survival Rate (2% DD Cap)** | {mc['survival_rates']['2pct']:.1f}% |
-| **Survival Rate (5% DD Cap)** | {mc['survival_rates']['5pct']:.1f}% |
-| **Survival Rate (10% DD Cap)** | {mc['survival_rates']['10pct']:.1f}% |
-
-**Verdict**: The strategy remains fundamentally solvent across randomized paths. The relatively low survival rate at 2% and 5% max drawdown indicates that such tight long-horizon caps are mathematically aggressive under pure path randomization. A more realistic long-term expectation is that the strategy may experience up to 10-15% drawdown under adverse trade sequencing, even if the core edge remains intact. 
-
-*Note: Monte Carlo is used to stress the sequencing of trades and regime arrival, not to guarantee a specific future outcome.*
-
-### 🌪️ Volatility & Execution Sensitivity
-Assessment of performance during news-induced liquidity constraints (5.0 tick spread spikes).
-- **Adjusted Monthly Performance**: {avg_m_stress:.2f}%
-- **Verdict**: Net alpha remains positive under high-friction assumptions, indicating resilience to typical news-event slippage in the Gold market.
-
-### 💹 Summary Audit Data (2016-2026)
-
-- **IS/OOS Consistency**: {wf_data[0]['avg_monthly']:.1f}% - {wf_data[1]['avg_monthly']:.1f}% average monthly return in historical tests, suggesting a persistent edge in the tested regime, but not guaranteeing that such levels are sustainable going forward.
-- **Median CAGR (Backtest Risk Level)**: {mc['cagr_stats']['median']:.1f}% per year, reflecting aggressive compounding and elevated risk relative to typical institutional mandates.
-- **Monte Carlo (10% DD Cap)**: {mc['survival_rates']['10pct']:.1f}% of simulated paths remained within a 10% max drawdown; tighter caps (2-4%) show materially lower survival and should not be assumed for long-horizon planning.
-- **Realistic Expectation at Normalized Risk**: For prop-firm-compatible risk settings (target long-term DD in the 5-10% range), a more realistic working range is 8-12% average monthly returns, with significant month-to-month variability and no guarantee of positive performance.
-
-### 🛡️ Quantitative Disclaimer
-These results are derived from historical simulations using specific assumptions about spread, slippage, and execution. They do not guarantee future performance, specific monthly returns, or success in any proprietary trading evaluation. Past performance, whether simulated or actual, is not necessarily indicative of future results. Trading involves risk of loss. All deployment remains at the user's discretion.
+    curves = []
+    mc = engine.run_monte_carlo_converged(full_res['ledger'], sampling=Config.MC_SAMPLING, max_paths=Config.MC_MAX_PATHS, curves=curves)
+    print(f"Monte Carlo stopped after {mc['total_paths']:,} paths (converged: {mc['converged']})")
+    os.makedirs(ReportConfig.OUTPUT_DIR, exist_ok=True)
+    fan_chart(os.path.join(ReportConfig.OUTPUT_DIR, Config.MC_FAN_CHART), np.array(curves), title="Monte Carlo Balance by Month ($10k start)")
 
----
-*Certified by Shadow Titan Quantitative Suite (Institutional QA).*
-"""
-    with open("/Users/muhammedriyaz/.gemini/antigravity/scratch/shadowbot_pro/ANTI_OVERFIT_CERTIFICATE.md", "w") as f:
-        f.write(report)
+    # Stored results; the certificate (templates/anti_overfit_certificate.md) is rendered from them
+    mc_keys = ("total_paths", "sampling", "antithetic", "confidence", "converged", "ci",
+               "cagr_stats", "mar_stats", "multiple_stats", "dd_stats", "survival_rates")
+    ResultStore().save("integrity_suite", {
+        "wf_avg_monthly": [w['avg_monthly'] for w in wf_data], "sharpe": sharpe,
+        "mc": {k: mc[k] for k in mc_keys},
+        "avg_m_stress": avg_m_stress, "stress_scenarios": len(stress), "stress_positive": stress_positive,
+    }, tables={"stress_matrix": stress})
+    render_all(["anti_overfit_certificate"])
     print("\nInstitutional Audit Certificate Generated.")
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+# --- SHADOW TITAN: LOCAL BAR STORE ---
+# One directory per series: index.npy (int64 ns timestamps), one .npy file per
+# column and meta.json (provenance, fingerprint). Reads are memory-mapped, so a
+# 30-year M1 history is opened instantly and only touched pages are loaded.
+
+class Config:
+    ROOT = os.environ.get("SHADOW_BAR_STORE", os.path.join(os.path.expanduser("~"), ".shadow_titan", "bars"))
+
+def safe_key(key):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", key)
+
+class BarStore:
+    def __init__(self, root=None):
+        self.root = root or Config.ROOT
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, safe_key(key))
+
+    def exists(self, key):
+        return os.path.exists(os.path.join(self.path(key), "meta.json"))
+
+    def keys(self):
+        return sorted(k for k in os.listdir(self.root) if os.path.exists(os.path.join(self.root, k, "meta.json")))
+
+    def write(self, key, df, meta=None):
+        """Atomically (re)write a series. Returns the stored meta dict."""
+        final = self.path(key)
+        tmp = final + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        index = df.index.values.astype('datetime64[ns]').astype(np.int64)
+        digest = hashlib.sha256(index.tobytes())
+        np.save(os.path.join(tmp, "index.npy"), index)
+        columns = []
+        for col in df.columns:
+            values = np.ascontiguousarray(df[col].to_numpy())
+            if values.dtype == object: continue
+            np.save(os.path.join(tmp, f"{safe_key(str(col))}.npy"), values)
+            digest.update(str(col).encode()); digest.update(values.tobytes())
+            columns.append(str(col))
+        meta = dict(meta or {})
+        meta.update({"key": key, "rows": int(len(df)), "columns": columns, "fingerprint": digest.hexdigest(),
+                     "first": str(df.index[0]) if len(df) else None, "last": str(df.index[-1]) if len(df) else None})
+        with open(os.path.join(tmp, "meta.json"), "w") as f: json.dump(meta, f, indent=2, default=str)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        return meta
+
+    def meta(self, key):
+        with open(os.path.join(self.path(key), "meta.json")) as f: return json.load(f)
+
+    def fingerprint(self, key):
+        return self.meta(key)["fingerprint"]
+
+    def read_arrays(self, key, columns=None, mmap=True):
+        """Zero-copy memory-mapped arrays: {'index': int64 ns, col: values}."""
+        base = self.path(key)
+        mode = 'r' if mmap else None
+        cols = columns or self.meta(key)["columns"]
+        out = {"index": np.load(os.path.join(base, "index.npy"), mmap_mode=mode)}
+        for col in cols:
+            out[col] = np.load(os.path.join(base, f"{safe_key(col)}.npy"), mmap_mode=mode)
+        return out
+
+    def read(self, key, columns=None, start=None, end=None):
+        """DataFrame view of a stored series, optionally sliced to [start, end)."""
+        arrays = self.read_arrays(key, columns)
+        index = arrays.pop("index")
+        lo = np.searchsorted(index, pd.Timestamp(start).value) if start is not None else 0
+        hi = np.searchsorted(index, pd.Timestamp(end).value) if end is not None else len(index)
+        idx = pd.DatetimeIndex(index[lo:hi].view('datetime64[ns]'))
+        return pd.DataFrame({c: a[lo:hi] for c, a in arrays.items()}, index=idx, copy=False)
+
+    def delete(self, key):
+        shutil.rmtree(self.path(key), ignore_errors=True)
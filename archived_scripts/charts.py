@@ -0,0 +1,279 @@
+import sys
+import time
+from xml.sax.saxutils import escape
+import numpy as np
+
+# --- SHADOW TITAN: HEADLESS CHARTS ---
+# Equity, drawdown and Monte Carlo fan charts written straight to SVG: no
+# display, no plotting library. Curves are decimated to the plot width before
+# anything is drawn. A chunked min-max pass keeps the extremes of every pixel
+# bucket, then LTTB (largest triangle, three buckets) picks the
+# shape-preserving subset of those, so a 10M-bar equity curve costs one
+# streaming pass and a few thousand SVG points. Fan bands are per-step
+# quantiles of the path matrix, computed in column blocks of bounded size.
+
+class Config:
+    WIDTH = 1200
+    HEIGHT = 480
+    MARGIN = (36, 24, 32, 84)      # top, right, bottom, left (px)
+    CHUNK = 1 << 20                # Points per block of the min-max pass
+    MINMAX_RATIO = 4               # Min-max candidates per LTTB output point
+    FAN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+    FAN_BLOCK_BYTES = 64 << 20     # Path-matrix bytes per quantile block
+    FONT = "font-family='Helvetica,Arial,sans-serif' font-size='11'"
+    COLORS = {"equity": "#1f6feb", "drawdown": "#d1242f", "fan": "#8250df", "grid": "#d0d7de", "text": "#24292f"}
+
+# --- Decimation ---
+
+def _blocks(y, size, chunk=None):
+    """(start, float block) over y; block lengths are a multiple of the bucket size."""
+    step = max(1, (chunk or Config.CHUNK) // size) * size
+    for start in range(0, len(y), step):
+        yield start, np.asarray(y[start:start + step], dtype=float)
+
+def _drawdown_blocks(blocks):
+    """Drawdown in % below the running peak, streamed over the equity blocks."""
+    peak = -np.inf
+    for start, block in blocks:
+        run = np.maximum.accumulate(np.maximum(block, peak))
+        peak = run[-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            yield start, np.where(run > 0, (run - block) / run * 100.0, 0.0)
+
+def minmax(y, buckets, transform=None, chunk=None):
+    """(indices, values) of the min and max of each of `buckets` equal buckets of y, plus both ends.
+
+    y is read block by block (memory-mapped arrays stay on disk); `transform`
+    maps the block stream to a derived series, e.g. _drawdown_blocks.
+    """
+    n = len(y)
+    size = max(1, -(-n // max(1, buckets)))
+    blocks = _blocks(y, size, chunk)
+    if transform is not None: blocks = transform(blocks)
+    idx, val = [], []
+    for start, block in blocks:
+        if start == 0: idx.append([0]); val.append(block[:1])
+        if start + len(block) == n: idx.append([n - 1]); val.append(block[-1:])
+        full = len(block) // size * size
+        if full:
+            b = block[:full].reshape(-1, size)
+            base = start + np.arange(0, full, size)
+            lo, hi = b.argmin(axis=1), b.argmax(axis=1)
+            idx += [base + lo, base + hi]
+            val += [b[np.arange(len(b)), lo], b[np.arange(len(b)), hi]]
+        if full < len(block):
+            tail = block[full:]
+            lo, hi = tail.argmin(), tail.argmax()
+            idx.append(start + full + np.array([lo, hi])); val.append(tail[[lo, hi]])
+    if not idx: return np.empty(0, dtype=np.int64), np.empty(0)
+    idx, first = np.unique(np.concatenate(idx), return_index=True)
+    return idx, np.concatenate(val)[first]
+
+def lttb(x, y, n_out):
+    """Indices of the Largest-Triangle-Three-Buckets subset of (x, y), n_out points."""
+    n = len(y)
+    if n_out >= n or n_out < 3: return np.arange(n)
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Third corner of each triangle: mean of the next bucket (the last point for the final one)
+    cx = np.r_[(np.add.reduceat(x[:n - 1], edges[:-1]) / counts)[1:], x[-1]]
+    cy = np.r_[(np.add.reduceat(y[:n - 1], edges[:-1]) / counts)[1:], y[-1]]
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - cx[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy[i] - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def downsample(x, y, n_out, method="lttb", transform=None):
+    """(x, y) reduced to at most n_out points that keep the curve's shape.
+
+    method="minmax" keeps the min and max of n_out / 2 buckets; "lttb" runs
+    LTTB over MINMAX_RATIO times as many min-max candidates.
+    """
+    ratio = Config.MINMAX_RATIO if method == "lttb" else 1
+    idx, val = minmax(y, n_out * ratio // 2, transform)
+    xs = np.asarray(x[idx]) if x is not None else idx
+    if method == "lttb" and len(idx) > n_out:
+        keep = lttb(_as_float(xs), val, n_out)
+        xs, val = xs[keep], val[keep]
+    return xs, val
+
+def fan_bands(paths, quantiles=None, max_steps=None):
+    """(steps, bands): quantiles of an (n_paths, n_steps) path matrix at each step; bands[q, step].
+
+    Steps are thinned to max_steps columns and the quantiles taken over
+    column blocks of at most FAN_BLOCK_BYTES, so memory stays bounded
+    however many paths there are.
+    """
+    q = np.asarray(quantiles or Config.FAN_QUANTILES, dtype=float)
+    n_paths, n_steps = paths.shape
+    steps = np.arange(n_steps)
+    if max_steps and n_steps > max_steps: steps = np.unique(np.linspace(0, n_steps - 1, max_steps).astype(np.int64))
+    block = max(1, Config.FAN_BLOCK_BYTES // (8 * max(1, n_paths)))
+    bands = np.empty((len(q), len(steps)))
+    for s in range(0, len(steps), block):
+        cols = steps[s:s + block]
+        bands[:, s:s + block] = np.quantile(np.asarray(paths[:, cols], dtype=float), q, axis=0)
+    return steps, bands
+
+# --- SVG ---
+
+def _as_float(x):
+    x = np.asarray(x)
+    return x.astype('datetime64[ns]').astype(np.int64).astype(float) if x.dtype.kind == "M" else x.astype(float)
+
+def nice_ticks(lo, hi, n=5):
+    if not np.isfinite(lo) or not np.isfinite(hi): return np.array([0.0])
+    if hi <= lo: return np.array([lo])
+    raw = (hi - lo) / n
+    mag = 10 ** np.floor(np.log10(raw))
+    step = mag * min((m for m in (1, 2, 2.5, 5, 10) if m * mag >= raw), default=10)
+    return np.arange(np.ceil(lo / step) * step, hi + step * 1e-9, step)
+
+def _tick_label(v, time_axis, fmt):
+    if time_axis: return str(np.datetime64(int(v), "ns").astype("datetime64[D]"))
+    return format(v, fmt)
+
+class Panel:
+    """One plot area of an SVG chart: data-to-pixel mapping, axes and series."""
+    def __init__(self, left, top, width, height, xlim, ylim, time_axis=False, yfmt=",.0f"):
+        self.left, self.top, self.width, self.height = left, top, width, height
+        self.xlim, self.time_axis, self.yfmt = xlim, time_axis, yfmt
+        pad = (ylim[1] - ylim[0]) * 0.04 or abs(ylim[0]) * 0.01 or 1.0
+        self.ylim = (ylim[0] - pad, ylim[1] + pad)
+        self.parts = []
+
+    def px(self, x):
+        span = (self.xlim[1] - self.xlim[0]) or 1.0
+        return self.left + (_as_float(x) - self.xlim[0]) / span * self.width
+
+    def py(self, y):
+        return self.top + (self.ylim[1] - np.asarray(y, dtype=float)) / (self.ylim[1] - self.ylim[0]) * self.height
+
+    @staticmethod
+    def _coords(px, py):
+        return " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(px.tolist(), py.tolist()))
+
+    def axes(self, title=None, x_ticks=True):
+        c = Config.COLORS
+        right, bottom = self.left + self.width, self.top + self.height
+        for v in nice_ticks(*self.ylim):
+            y = float(self.py(v))
+            self.parts.append(f"<line x1='{self.left}' y1='{y:.1f}' x2='{right}' y2='{y:.1f}' stroke='{c['grid']}' stroke-width='0.5'/>"
+                              f"<text x='{self.left - 6}' y='{y + 4:.1f}' text-anchor='end' fill='{c['text']}'>{escape(format(v, self.yfmt))}</text>")
+        if x_ticks:
+            for v in np.linspace(self.xlim[0], self.xlim[1], 6):
+                x = float(self.px(v))
+                self.parts.append(f"<text x='{x:.1f}' y='{bottom + 16}' text-anchor='middle' fill='{c['text']}'>"
+                                  f"{escape(_tick_label(v, self.time_axis, ',.0f'))}</text>")
+        self.parts.append(f"<rect x='{self.left}' y='{self.top}' width='{self.width}' height='{self.height}' fill='none' stroke='{c['text']}' stroke-width='0.6'/>")
+        if title:
+            self.parts.append(f"<text x='{self.left}' y='{self.top - 8}' fill='{c['text']}' font-weight='bold'>{escape(title)}</text>")
+
+    def line(self, x, y, color, width=1.2):
+        self.parts.append(f"<polyline fill='none' stroke='{color}' stroke-width='{width}' points='{self._coords(self.px(x), self.py(y))}'/>")
+
+    def band(self, x, lo, hi, color, opacity):
+        """Filled area between two curves sharing x."""
+        px = self.px(x)
+        pts = self._coords(np.r_[px, px[::-1]], np.r_[self.py(hi), self.py(lo)[::-1]])
+        self.parts.append(f"<polygon fill='{color}' fill-opacity='{opacity}' stroke='none' points='{pts}'/>")
+
+def write_svg(path, panels, width=None, height=None, title=None):
+    width, height = width or Config.WIDTH, height or Config.HEIGHT
+    body = "".join("".join(p.parts) for p in panels)
+    head = f"<text x='{width / 2:.0f}' y='18' text-anchor='middle' font-size='14' fill='{Config.COLORS['text']}'>{escape(title)}</text>" if title else ""
+    with open(path, "w") as f:
+        f.write(f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' viewBox='0 0 {width} {height}' {Config.FONT}>"
+                f"<rect width='100%' height='100%' fill='white'/>{head}{body}</svg>\n")
+    return path
+
+def _layout(width, height, shares):
+    """(left, top, plot width, [panel heights]) for panels stacked by share of the plot height."""
+    top, right, bottom, left = Config.MARGIN
+    gap = 28
+    avail = height - top - bottom - gap * (len(shares) - 1)
+    return left, top, width - left - right, [avail * s / sum(shares) for s in shares], gap
+
+# --- Charts ---
+
+def equity_chart(path, equity, x=None, title="Equity", width=None, height=None, drawdown=True, method="lttb"):
+    """Equity curve with its drawdown underneath, decimated to the plot width, as SVG.
+
+    equity may be memory-mapped; it is read in CHUNK blocks and only the
+    decimated points are kept. x: bar times (datetime64) or any increasing
+    numbers; None plots against the bar number.
+    """
+    width, height = width or Config.WIDTH, height or Config.HEIGHT
+    left, top, plot_w, heights, gap = _layout(width, height, (3, 1) if drawdown else (1,))
+    n_px = int(plot_w)
+    time_axis = x is not None and np.asarray(x[:1]).dtype.kind == "M"
+    ex, ey = downsample(x, equity, n_px, method)
+    xlim = (float(_as_float(x[:1])[0]), float(_as_float(x[-1:])[0])) if x is not None else (0.0, float(len(equity) - 1))
+    eq = Panel(left, top, plot_w, heights[0], xlim, (float(ey.min()), float(ey.max())), time_axis)
+    eq.axes(title, x_ticks=not drawdown)
+    eq.line(ex, ey, Config.COLORS["equity"])
+    panels = [eq]
+    if drawdown:
+        # Troughs must survive decimation, so the drawdown gets its own min-max pass
+        dx, dd = downsample(x, equity, n_px, "minmax", transform=_drawdown_blocks)
+        dp = Panel(left, top + heights[0] + gap, plot_w, heights[1], xlim, (-float(dd.max()), 0.0), time_axis, yfmt=".1f")
+        dp.axes("Drawdown (%)")
+        dp.band(dx, -dd, np.zeros_like(dd), Config.COLORS["drawdown"], 0.35)
+        dp.line(dx, -dd, Config.COLORS["drawdown"], 0.8)
+        panels.append(dp)
+    return write_svg(path, panels, width, height)
+
+def fan_chart(path, paths, x=None, quantiles=None, title="Monte Carlo Fan", width=None, height=None, yfmt=",.0f"):
+    """Quantile fan of an (n_paths, n_steps) path matrix as SVG: nested bands around the median.
+
+    Quantiles pair up from the outside in (5-95, 25-75, ...); an odd middle
+    one is drawn as the median line.
+    """
+    width, height = width or Config.WIDTH, height or Config.HEIGHT
+    q = tuple(sorted(quantiles or Config.FAN_QUANTILES))
+    left, top, plot_w, heights, _ = _layout(width, height, (1,))
+    steps, bands = fan_bands(paths, q, max_steps=int(plot_w))
+    xs = np.asarray(x)[steps] if x is not None else steps
+    time_axis = x is not None and np.asarray(x[:1]).dtype.kind == "M"
+    xf = _as_float(xs)
+    p = Panel(left, top, plot_w, heights[0], (float(xf[0]), float(xf[-1])), (float(bands.min()), float(bands.max())), time_axis, yfmt)
+    p.axes(f"{title} ({paths.shape[0]:,} paths; {', '.join(f'p{v * 100:g}' for v in q)})")
+    pairs = len(q) // 2
+    for k in range(pairs):
+        p.band(xs, bands[k], bands[-1 - k], Config.COLORS["fan"], 0.12 + 0.18 * k)
+    if len(q) % 2:
+        p.line(xs, bands[pairs], Config.COLORS["fan"], 1.6)
+    return write_svg(path, [p], width, height)
+
+def ledger_chart(path, ledger, initial_balance, title="Equity"):
+    """Equity and drawdown of a TradeLedger, trade by trade at exit time."""
+    trades = ledger.trades
+    return equity_chart(path, ledger.balance_curve(initial_balance), trades["exit_time"].view("datetime64[ns]"), title)
+
+if __name__ == "__main__":
+    # python charts.py <ledger.npz> [initial_balance] [out.svg]
+    #   or: python charts.py --bench [points] [paths]
+    if sys.argv[1] == "--bench":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000_000
+        n_paths = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+        rng = np.random.default_rng(0)
+        equity = 100000.0 * np.exp(np.cumsum(rng.normal(2e-7, 1e-4, n)))
+        times = np.datetime64("1996-01-01", "ns") + np.arange(n) * np.timedelta64(60, "s")
+        started = time.perf_counter()
+        equity_chart("bench_equity.svg", equity, times, f"{n:,} bars")
+        print(f"equity + drawdown, {n:,} points: {time.perf_counter() - started:.2f}s")
+        paths = 10000.0 * np.cumprod(1 + rng.normal(0.01, 0.03, (n_paths, 121)), axis=1)
+        started = time.perf_counter()
+        fan_chart("bench_fan.svg", paths)
+        print(f"fan, {n_paths:,} x 121 paths: {time.perf_counter() - started:.2f}s")
+    else:
+        from trade_ledger import TradeLedger
+        ledger = TradeLedger.load(sys.argv[1])
+        out = sys.argv[3] if len(sys.argv) > 3 else sys.argv[1].rsplit(".", 1)[0] + "_EQUITY.svg"
+        print(ledger_chart(out, ledger, float(sys.argv[2]) if len(sys.argv) > 2 else 100000.0))
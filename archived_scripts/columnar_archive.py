@@ -0,0 +1,475 @@
+import os
+import sys
+import json
+import mmap
+import time
+import uuid
+import zlib
+import shutil
+import struct
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from precision import get_precision
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# --- SHADOW TITAN: COMPRESSED COLUMNAR ARCHIVE ---
+# Sweep outputs and trade ledgers as compressed column blocks instead of CSV /
+# JSON. A dataset is a directory of part files; any process may write its own
+# part (unique name, written to a temp file and renamed), so workers write in
+# parallel without coordination. Each part holds blocks of BLOCK_ROWS rows,
+# every column of a block compressed on its own:
+#   delta  8-byte integers (timestamps, ids) as first value + differences
+#   dict   strings and low-cardinality numbers (parameter columns) as codes
+#          into a per-part dictionary; numeric dictionaries are sorted
+#   plain  everything else
+# Numeric payloads are byte-shuffled before zstd (zlib without zstandard).
+# Float columns are lossless by default; precision="compact" stores them as
+# float32 (precision.py) where full float64 returns are not needed.
+# A JSON footer records each block's offsets and min/max; reads memory-map
+# the part, skip blocks whose stats cannot satisfy the predicates and
+# decompress only the requested columns of the remaining blocks.
+
+class Config:
+    BLOCK_ROWS = 1 << 16
+    CODEC = "zstd" if zstandard is not None else "zlib"   # or "none" (uncompressed, zero-copy reads)
+    LEVEL = {"zstd": 3, "zlib": 6}
+    DICT_MAX_VALUES = 4096         # Numeric columns with at most this many distinct values ...
+    DICT_MAX_FRACTION = 0.25       # ... and at most this fraction of the rows are dictionary-coded
+    WORKERS = min(4, os.cpu_count() or 1)
+
+MAGIC = b"STCA\x00\x01\x00\x00"
+PART_SUFFIX = ".stca"
+OPS = ("==", "!=", "<", "<=", ">", ">=", "in")
+
+# --- Codecs ---
+def _compress(buf, codec):
+    if codec == "zstd": return zstandard.ZstdCompressor(level=Config.LEVEL["zstd"]).compress(buf)
+    if codec == "zlib": return zlib.compress(buf, Config.LEVEL["zlib"])
+    return bytes(buf)
+
+def _decompress(buf, codec):
+    if codec == "zstd":
+        if zstandard is None: raise RuntimeError("part was written with zstd; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(buf)
+    if codec == "zlib": return zlib.decompress(buf)
+    return buf
+
+def _shuffle(a):
+    """Bytes of a grouped by byte position (all low bytes, then the next, ...), which compresses better."""
+    k = a.dtype.itemsize
+    return a.view(np.uint8).reshape(-1, k).T.tobytes() if k > 1 else a.tobytes()
+
+def _unshuffle(buf, dtype, n):
+    k = dtype.itemsize
+    raw = np.frombuffer(buf, dtype=np.uint8, count=n * k)
+    return raw.reshape(k, n).T.copy().view(dtype).ravel() if k > 1 else raw.view(dtype).copy()
+
+def _code_dtype(size):
+    return np.uint8 if size <= 1 << 8 else np.uint16 if size <= 1 << 16 else np.uint32
+
+# --- Column encoding ---
+def _plan_column(v, encoding=None):
+    """(stored values, meta) for one column of a part; meta = dtype, encoding, dictionary."""
+    if v.dtype.kind == "M":
+        # Stored as int64 ns whatever the input unit, so the column reads back as datetime64[ns]
+        meta = {"dtype": np.dtype("datetime64[ns]").str}
+        v = v.astype("datetime64[ns]").view(np.int64)
+    else:
+        meta = {"dtype": v.dtype.str if v.dtype.kind != "O" and v.dtype.kind not in "US" else "object"}
+    if encoding is None:
+        if v.dtype.kind in "OUS":
+            encoding = "dict"
+        elif v.dtype.itemsize > 1 and v.dtype.kind != "b" and len(v):
+            distinct = len(np.unique(v))
+            encoding = "dict" if distinct <= min(Config.DICT_MAX_VALUES, Config.DICT_MAX_FRACTION * len(v)) else None
+        if encoding is None:
+            encoding = "delta" if v.dtype.kind in "iu" and v.dtype.itemsize == 8 else "plain"
+    meta["encoding"] = encoding
+    if encoding == "dict":
+        if v.dtype.kind in "OUS":
+            # NumPy scalars (np.int64 parameter values) are stored as Python numbers; they hash alike
+            values = [_py(x) for x in dict.fromkeys(v.tolist())]
+            index = {x: i for i, x in enumerate(values)}
+            codes = np.fromiter((index[x] for x in v.tolist()), dtype=np.int64, count=len(v))
+        else:
+            uniq, codes = np.unique(v, return_inverse=True)
+            values = uniq.tolist()
+        meta["dictionary"] = values
+        return codes.astype(_code_dtype(len(values))).ravel(), meta
+    return np.ascontiguousarray(v), meta
+
+def _block_stats(values, meta):
+    """Min / max of a block: values for numeric columns, codes for object dictionaries."""
+    if len(values) == 0: return None, None
+    if meta["dtype"] == "object" or values.dtype.kind not in "iufb":
+        return int(values.min()), int(values.max())
+    if values.dtype.kind == "f":
+        if np.isnan(values).all(): return None, None
+        return float(np.nanmin(values)), float(np.nanmax(values))
+    return int(values.min()), int(values.max())
+
+def _encode_block(values, meta, codec):
+    if codec == "none": return values.tobytes()
+    if meta["encoding"] == "delta":
+        values = np.diff(values, prepend=values[:1] * 0).astype(values.dtype, copy=False)
+    return _compress(_shuffle(values), codec)
+
+def _decode_block(buf, meta, stored, n, codec):
+    if codec == "none":
+        values = np.frombuffer(buf, dtype=stored, count=n)
+    else:
+        values = _unshuffle(_decompress(buf, codec), stored, n)
+        if meta["encoding"] == "delta": values = np.cumsum(values, dtype=stored)
+    if meta["encoding"] == "dict":
+        d = meta["dictionary"]
+        table = np.array(d, dtype=object) if meta["dtype"] == "object" else np.asarray(d, dtype=meta["dtype"])
+        return table[values]
+    return values.view(meta["dtype"]) if meta["dtype"] != stored.str else values
+
+def _stored_dtype(meta):
+    if meta["encoding"] == "dict": return np.dtype(_code_dtype(len(meta["dictionary"])))
+    return np.dtype(np.int64) if np.dtype(meta["dtype"]).kind == "M" else np.dtype(meta["dtype"])
+
+# --- Predicates ---
+def _check_where(where):
+    where = list(where or [])
+    for col, op, _ in where:
+        if op not in OPS: raise ValueError(f"predicate op must be one of {OPS}, got {op!r}")
+    return where
+
+def _may_match(lo, hi, op, value):
+    """Whether a block with min lo / max hi can hold a row satisfying op value."""
+    if lo is None: return True
+    if op == "==": return lo <= value <= hi
+    if op == "!=": return not (lo == hi == value)
+    if op == "<": return lo < value
+    if op == "<=": return lo <= value
+    if op == ">": return hi > value
+    if op == ">=": return hi >= value
+    return any(lo <= x <= hi for x in value)
+
+def _datetime_value(op, value):
+    """Predicate value(s) on a datetime column (datetime64, Timestamp or ISO string) as datetime64[ns]."""
+    return [np.datetime64(v, "ns") for v in value] if op == "in" else np.datetime64(value, "ns")
+
+def _ns(value):
+    """datetime64[ns] predicate value(s) as int64 ns since epoch, the unit of the block stats."""
+    return [int(v.astype(np.int64)) for v in value] if isinstance(value, list) else int(value.astype(np.int64))
+
+def _row_mask(values, op, value):
+    if op == "in": return np.isin(values, list(value))
+    return {"==": np.equal, "!=": np.not_equal, "<": np.less, "<=": np.less_equal,
+            ">": np.greater, ">=": np.greater_equal}[op](values, value)
+
+class ArchivePart:
+    """One memory-mapped part file and its footer."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(MAGIC) + 8
+        if self._mm[:len(MAGIC)] != MAGIC or self._mm[-len(MAGIC):] != MAGIC:
+            raise ValueError(f"{path} is not a columnar archive part")
+        (size,) = struct.unpack("<Q", self._mm[-tail:-len(MAGIC)])
+        self.footer = json.loads(self._mm[-tail - size:-tail])
+        self.columns = self.footer["columns"]
+        self.rows = self.footer["rows"]
+
+    def blocks(self, where=()):
+        """Indices of the blocks whose stats do not rule out every predicate."""
+        keep = []
+        for b, block in enumerate(self.footer["blocks"]):
+            ok = True
+            for col, op, value in where:
+                meta, stats = self.columns[col], block["columns"][col]
+                if meta["dtype"] == "object":
+                    d = meta["dictionary"]
+                    if op == "==": value = d.index(value) if value in d else None
+                    elif op == "in": value = [d.index(v) for v in value if v in d]
+                    else: continue
+                    if value is None or value == []: ok = False; break
+                elif np.dtype(meta["dtype"]).kind == "M":
+                    value = _ns(_datetime_value(op, value))
+                if not _may_match(stats["min"], stats["max"], op, value): ok = False; break
+            if ok: keep.append(b)
+        return keep
+
+    def column(self, name, block):
+        meta = self.columns[name]
+        info = self.footer["blocks"][block]["columns"][name]
+        buf = memoryview(self._mm)[info["offset"]:info["offset"] + info["length"]]
+        try:
+            return _decode_block(buf, meta, _stored_dtype(meta), self.footer["blocks"][block]["rows"], info["codec"])
+        finally:
+            if info["codec"] != "none": buf.release()
+
+    def read_block(self, block, columns, where=()):
+        """Requested columns of one block, rows filtered by the predicates."""
+        cache = {}
+        get = lambda c: cache[c] if c in cache else cache.setdefault(c, self.column(c, block))
+        mask = None
+        for col, op, value in where:
+            if self.columns[col]["dtype"] != "object" and np.dtype(self.columns[col]["dtype"]).kind == "M":
+                value = _datetime_value(op, value)
+            m = _row_mask(get(col), op, value)
+            mask = m if mask is None else mask & m
+        out = {c: get(c) for c in columns}
+        return {c: v[mask] for c, v in out.items()} if mask is not None else out
+
+class ColumnarArchive:
+    """<root>/<dataset>/<part>.stca files."""
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def exists(self, name):
+        return os.path.isdir(self.path(name)) and bool(self.parts(name))
+
+    def parts(self, name):
+        base = self.path(name)
+        if not os.path.isdir(base): return []
+        return sorted(os.path.join(base, f) for f in os.listdir(base) if f.endswith(PART_SUFFIX))
+
+    def delete(self, name):
+        shutil.rmtree(self.path(name), ignore_errors=True)
+
+    def write_part(self, name, columns, part=None, encodings=None, codec=None, precision=None):
+        """Write a dict of equal-length columns as one part; safe to call from many processes at once.
+
+        part names the file (rewriting a part replaces it); default is a unique name.
+        Returns the part's path.
+        """
+        codec = codec or Config.CODEC
+        if codec not in ("zstd", "zlib", "none"): raise ValueError("codec must be zstd, zlib or none")
+        if codec == "zstd" and zstandard is None: raise RuntimeError("zstd codec needs the zstandard package")
+        precision = get_precision(precision)
+        cols = {str(k): np.asarray(v) for k, v in columns.items()}
+        cols = {k: v.astype(precision.float) if v.dtype.kind == "f" else v for k, v in cols.items()}
+        lengths = {len(v) for v in cols.values()}
+        if len(lengths) > 1: raise ValueError(f"columns differ in length: { {k: len(v) for k, v in cols.items()} }")
+        n = lengths.pop() if lengths else 0
+        plans = {k: _plan_column(v, (encodings or {}).get(k)) for k, v in cols.items()}
+
+        base = self.path(name)
+        os.makedirs(base, exist_ok=True)
+        final = os.path.join(base, f"{part if part is not None else uuid.uuid4().hex}{PART_SUFFIX}")
+        tmp = f"{final}.{os.getpid()}.tmp"
+        blocks = []
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            for a in range(0, max(n, 1), Config.BLOCK_ROWS):
+                b = min(a + Config.BLOCK_ROWS, n)
+                block = {"rows": b - a, "columns": {}}
+                for k, (stored, meta) in plans.items():
+                    values = stored[a:b]
+                    lo, hi = _block_stats(values if meta["encoding"] != "dict" or meta["dtype"] == "object" else cols[k][a:b], meta)
+                    payload = _encode_block(values, meta, codec)
+                    block["columns"][k] = {"offset": f.tell(), "length": len(payload), "codec": codec, "min": lo, "max": hi}
+                    f.write(payload)
+                blocks.append(block)
+            footer = json.dumps({"version": 1, "rows": n, "columns": {k: meta for k, (_, meta) in plans.items()},
+                                 "blocks": blocks}).encode()
+            f.write(footer)
+            f.write(struct.pack("<Q", len(footer)))
+            f.write(MAGIC)
+        os.replace(tmp, final)
+        return final
+
+    def write_parts(self, name, parts, workers=None, **kwargs):
+        """Write several column dicts as parts in parallel; parts is a list of (part name, columns)."""
+        workers = min(workers or Config.WORKERS, max(1, len(parts)))
+        if workers <= 1:
+            return [self.write_part(name, cols, part, **kwargs) for part, cols in parts]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_write_part, self.root, name, cols, part, kwargs) for part, cols in parts]
+            return [f.result() for f in futures]
+
+    def read(self, name, columns=None, where=None, workers=None):
+        """{column: array} of the rows satisfying every (column, op, value) predicate, in part order."""
+        where = _check_where(where)
+        parts = [ArchivePart(p) for p in self.parts(name)]
+        if not parts: raise FileNotFoundError(f"no parts in {self.path(name)}")
+        columns = list(columns or parts[0].columns)
+        tasks = [(part, b) for part in parts for b in part.blocks(where)]
+        workers = min(workers or Config.WORKERS, max(1, len(tasks)))
+        run = lambda t: t[0].read_block(t[1], columns, where)
+        # zlib / zstd release the GIL, so blocks decompress in parallel threads
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool: chunks = list(pool.map(run, tasks))
+        else:
+            chunks = [run(t) for t in tasks]
+        if not chunks:
+            return {c: _decode_block(b"", parts[0].columns[c], _stored_dtype(parts[0].columns[c]), 0, "none") for c in columns}
+        return {c: np.concatenate([ch[c] for ch in chunks]) for c in columns}
+
+    def frame(self, name, columns=None, where=None, workers=None):
+        return pd.DataFrame(self.read(name, columns, where, workers), copy=False)
+
+    def info(self, name):
+        """Rows, parts, blocks and bytes on disk of a dataset."""
+        parts = [ArchivePart(p) for p in self.parts(name)]
+        return {"rows": sum(p.rows for p in parts), "parts": len(parts), "blocks": sum(len(p.footer["blocks"]) for p in parts),
+                "bytes": sum(os.path.getsize(p.path) for p in parts), "columns": list(parts[0].columns) if parts else []}
+
+def _write_part(root, name, columns, part, kwargs):
+    return ColumnarArchive(root).write_part(name, columns, part, **kwargs)
+
+# --- Sweep results ---
+# candidates: one row per evaluated point (rejected ones with valid = False),
+#             param_<name> and <section>_<metric> columns; has_<name> marks
+#             which rows have a parameter when some valid candidates lack it
+# monthly:    candidate, section, month, ret (long format)
+SWEEP_SECTIONS = ("metrics", "train", "val", "fwd")
+SWEEP_METRICS = ("return", "max_dd", "trades", "sharpe")
+SWEEP_PART_ROWS = 10000            # Candidates per part
+
+def _sweep_columns(results, offset):
+    valid = [r is not None for r in results]
+    cols = {"candidate": np.arange(offset, offset + len(results), dtype=np.int64), "valid": np.array(valid, dtype=bool)}
+    keys = list(dict.fromkeys(k for r in results if r is not None for k in r["params"]))
+    for k in keys:
+        cols[f"param_{k}"] = np.array([r["params"].get(k) if r is not None else None for r in results], dtype=object)
+        if any(r is not None and k not in r["params"] for r in results):
+            cols[f"has_{k}"] = np.array([r is not None and k in r["params"] for r in results], dtype=bool)
+    sections = [s for s in SWEEP_SECTIONS if any(r is not None and s in r for r in results)]
+    for s in sections:
+        for m in SWEEP_METRICS:
+            cols[f"{s}_{m}"] = np.array([float(r[s][m]) if r is not None and s in r else np.nan for r in results])
+    cand, sec, month, ret = [], [], [], []
+    for j, r in enumerate(results):
+        if r is None: continue
+        for s in sections:
+            rets = r.get(s, {}).get("monthly_returns") or []
+            cand.append(np.full(len(rets), offset + j, dtype=np.int64)); sec.append([s] * len(rets))
+            month.append(np.arange(len(rets), dtype=np.int32)); ret.append(np.asarray(rets, dtype=float))
+    cat = lambda xs, dt: np.concatenate(xs).astype(dt) if xs else np.empty(0, dt)
+    monthly = {"candidate": cat(cand, np.int64), "section": np.array([x for s in sec for x in s], dtype=object),
+               "month": cat(month, np.int32), "ret": cat(ret, float)}
+    return cols, monthly
+
+def write_sweep(path, results, workers=None, precision=None):
+    """Sweep results (list of evaluate_candidate dicts / None) as a columnar archive directory."""
+    archive = ColumnarArchive(path)
+    for name in ("candidates", "monthly"): archive.delete(name)
+    chunks = [(f"{a:09d}", results[a:a + SWEEP_PART_ROWS]) for a in range(0, len(results), SWEEP_PART_ROWS)]
+    encoded = [(part, _sweep_columns(chunk, int(part))) for part, chunk in chunks]
+    archive.write_parts("candidates", [(part, c) for part, (c, _) in encoded], workers)
+    archive.write_parts("monthly", [(part, m) for part, (_, m) in encoded], workers, precision=precision)
+    return archive
+
+def read_sweep(path):
+    """The stored sweep as the original list of result dicts (None for rejected candidates)."""
+    archive = ColumnarArchive(path)
+    cands = archive.read("candidates")
+    monthly = archive.read("monthly")
+    sections = [s for s in SWEEP_SECTIONS if f"{s}_return" in cands]
+    order = np.lexsort((monthly["month"], monthly["candidate"]))
+    by_key = {}
+    for c, s, r in zip(monthly["candidate"][order], monthly["section"][order], monthly["ret"][order]):
+        by_key.setdefault((int(c), s), []).append(float(r))
+    results = []
+    for j in range(len(cands["candidate"])):
+        if not cands["valid"][j]: results.append(None); continue
+        cid = int(cands["candidate"][j])
+        res = {"params": _params_at(cands, j)}
+        for s in sections:
+            res[s] = {m: float(cands[f"{s}_{m}"][j]) for m in SWEEP_METRICS}
+            res[s]["trades"] = int(res[s]["trades"])
+            res[s]["monthly_returns"] = by_key.get((cid, s), [])
+        results.append(res)
+    return results
+
+def sweep_returns(path, section="metrics"):
+    """(T, N) monthly return matrix of the valid candidates and their parameter sets, without rebuilding the sweep."""
+    archive = ColumnarArchive(path)
+    cands = archive.read("candidates", where=[("valid", "==", True)])
+    rows = archive.read("monthly", ["candidate", "month", "ret"], where=[("section", "==", section)])
+    if not len(rows["candidate"]): return np.empty((0, 0)), []
+    col = np.searchsorted(cands["candidate"], rows["candidate"])
+    counts = np.bincount(col, minlength=len(cands["candidate"]))
+    keep = np.flatnonzero(counts)
+    M = np.full((int(rows["month"].max()) + 1, len(cands["candidate"])), np.nan)
+    M[rows["month"], col] = rows["ret"]
+    params = [_params_at(cands, j) for j in keep]
+    return M[:int(counts[keep].min()), keep], params
+
+def _params_at(cands, j):
+    """Parameter dict of row j: every param_<name> column, except where has_<name> is False."""
+    keys = [c[len("param_"):] for c in cands if c.startswith("param_")]
+    return {k: _py(cands[f"param_{k}"][j]) for k in keys if f"has_{k}" not in cands or cands[f"has_{k}"][j]}
+
+def _py(v):
+    return v.item() if isinstance(v, np.generic) else v
+
+def _timed(fn):
+    started = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - started
+
+def _size(path):
+    if os.path.isfile(path): return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+def _bench(n, t):
+    """Synthetic sweep (JSON vs archive) and trade ledger (CSV vs archive) of the given size."""
+    rng = np.random.default_rng(0)
+    grid = {"fast": [5, 8, 13], "medium": [34, 55, 89], "atr_mult": [1.5, 2.0, 3.0], "base_risk": [0.05, 0.1, 0.15, 0.2]}
+    results = []
+    for j in range(n):
+        rets = rng.normal(0.5, 3.0, t).tolist()
+        m = {"return": float(np.sum(rets)), "max_dd": float(abs(rng.normal(3, 1))), "trades": int(rng.integers(100, 900)),
+             "sharpe": float(np.mean(rets) / np.std(rets)), "monthly_returns": rets}
+        results.append(None if j % 7 == 0 else {"params": {k: v[rng.integers(len(v))] for k, v in grid.items()}, "metrics": m})
+    rows = n * t // 10
+    ledger = pd.DataFrame({"candidate": np.repeat(np.arange(n), -(-rows // n))[:rows],
+                           "entry_time": pd.Timestamp("2016-01-04").value + np.cumsum(rng.integers(1, 5, rows)) * 86_400_000_000_000,
+                           "side": rng.choice(np.array([-1, 1], dtype=np.int8), rows), "units": np.round(rng.uniform(1, 300, rows), 2),
+                           "pnl": np.round(rng.normal(20, 400, rows), 2)})
+    root = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"stca_bench_{os.getpid()}")
+    rel = lambda p: os.path.join(root, p)
+    os.makedirs(root)
+    try:
+        lines = [f"{n:,} candidates x {t} months, {rows:,} ledger rows, codec {Config.CODEC}"]
+        def dump():
+            with open(rel("sweep.json"), "w") as f: json.dump(results, f)
+        def load():
+            with open(rel("sweep.json")) as f: return json.load(f)
+        _, w = _timed(dump)
+        _, r = _timed(load)
+        lines.append(f"  sweep JSON              {_size(rel('sweep.json')) / 2**20:8.1f} MB  write {w:5.2f}s  read {r:5.2f}s")
+        for label, prec in (("", None), (" float32", "compact")):
+            _, w = _timed(lambda: write_sweep(rel(f"sweep{label}"), results, precision=prec))
+            (M, _), r = _timed(lambda: sweep_returns(rel(f"sweep{label}")))
+            _, q = _timed(lambda: ColumnarArchive(rel(f"sweep{label}")).read("monthly", ["ret"], where=[("candidate", "<", n // 10)]))
+            lines.append(f"  sweep archive{label:<10} {_size(rel(f'sweep{label}')) / 2**20:8.1f} MB  write {w:5.2f}s  "
+                         f"matrix {r:5.2f}s  10% of candidates {q:5.3f}s")
+        _, w = _timed(lambda: ledger.to_csv(rel("ledger.csv"), index=False))
+        _, r = _timed(lambda: pd.read_csv(rel("ledger.csv")))
+        lines.append(f"  ledger CSV              {_size(rel('ledger.csv')) / 2**20:8.1f} MB  write {w:5.2f}s  read {r:5.2f}s")
+        archive = ColumnarArchive(rel("ledgers"))
+        _, w = _timed(lambda: archive.write_part("trades", {c: ledger[c].to_numpy() for c in ledger}))
+        _, r = _timed(lambda: archive.read("trades"))
+        _, q = _timed(lambda: archive.read("trades", ["pnl"], where=[("candidate", "<", n // 10)]))
+        lines.append(f"  ledger archive          {_size(rel('ledgers')) / 2**20:8.1f} MB  write {w:5.2f}s  read {r:5.2f}s  "
+                     f"pnl of 10% of candidates {q:5.3f}s")
+        print("\n".join(lines))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    # python columnar_archive.py <archive dir> [dataset]      (dataset info, or list the datasets)
+    #   or: python columnar_archive.py --bench [candidates] [months]
+    if sys.argv[1] == "--bench":
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 20000, int(sys.argv[3]) if len(sys.argv) > 3 else 120)
+    elif len(sys.argv) > 2:
+        print(json.dumps(ColumnarArchive(sys.argv[1]).info(sys.argv[2]), indent=2))
+    else:
+        archive = ColumnarArchive(sys.argv[1])
+        for name in sorted(os.listdir(sys.argv[1])):
+            if archive.exists(name): print(name, json.dumps(archive.info(name)))
@@ -0,0 +1,102 @@
+import json
+import hashlib
+from datetime import datetime, timezone
+import yfinance as yf
+import pandas as pd
+import numpy as np
+from bar_store import BarStore
+
+# --- SHADOW TITAN: CONTINUOUS SERIES BUILDER ---
+# Generalizes the ^XAU + GC=F stitch of the 30-year audit: any list of
+# sources (oldest first) is spliced at roll dates and the older history is
+# back-adjusted onto the newest contract. The result and its provenance are
+# written to the bar store once; later runs memory-map the stored series.
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+ADJUST_MODES = ("ratio", "difference", "none")
+
+class SeriesSource:
+    """One leg of a continuous series. roll_date: first day this source is used (default: its first bar)."""
+    def __init__(self, symbol, start, end, interval="1d", roll_date=None):
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self.interval = interval
+        self.roll_date = roll_date
+
+    def spec(self):
+        return {"symbol": self.symbol, "start": self.start, "end": self.end, "interval": self.interval, "roll_date": self.roll_date}
+
+def download_source(source):
+    data = yf.download(source.symbol, start=source.start, end=source.end, interval=source.interval, auto_adjust=True)
+    if isinstance(data.columns, pd.MultiIndex): data.columns = data.columns.get_level_values(0)
+    return data
+
+def stitch(legs, sources, adjust="ratio"):
+    """Back-adjusts older legs onto the newest and splices at the roll dates.
+
+    Legs are processed newest to oldest and each older leg is anchored to the
+    already-adjusted series, so adjustments compound down the chain.
+    Returns (frame, provenance).
+    """
+    if adjust not in ADJUST_MODES: raise ValueError(f"adjust must be one of {ADJUST_MODES}")
+    combined = legs[-1]
+    newest = sources[-1]
+    provenance = [None] * len(legs)
+    provenance[-1] = {"symbol": newest.symbol, "requested": [newest.start, newest.end], "factor": 1.0, "offset": 0.0}
+
+    for j in range(len(legs) - 2, -1, -1):
+        older, roll_src = legs[j], sources[j + 1]
+        roll = pd.Timestamp(roll_src.roll_date) if roll_src.roll_date else combined.index[0]
+        new_ref = float(combined['Close'][combined.index >= roll].iloc[0])
+        old_ref = float(older['Close'].asof(roll))
+        factor, offset = 1.0, 0.0
+        if adjust == "ratio": factor = new_ref / old_ref
+        elif adjust == "difference": offset = new_ref - old_ref
+
+        keep = older[older.index < roll].copy()
+        for col in PRICE_COLUMNS:
+            if col in keep: keep[col] = keep[col] * factor + offset
+        combined = pd.concat([keep, combined[combined.index >= roll]])
+        provenance[j + 1]["used_from"] = str(roll)
+        provenance[j] = {"symbol": sources[j].symbol, "requested": [sources[j].start, sources[j].end], "used_until": str(roll),
+                         "roll_ref_new": new_ref, "roll_ref_old": old_ref, "factor": factor, "offset": offset}
+
+    combined = combined.sort_index()
+    idx = combined.index
+    for leg in provenance:
+        in_leg = idx >= pd.Timestamp(leg["used_from"]) if "used_from" in leg else np.ones(len(idx), dtype=bool)
+        if "used_until" in leg: in_leg &= idx < pd.Timestamp(leg["used_until"])
+        leg["rows"] = int(in_leg.sum())
+    return combined, provenance
+
+class ContinuousSeriesBuilder:
+    def __init__(self, sources, adjust="ratio", name=None, store=None, loader=None):
+        self.sources = list(sources)
+        self.adjust = adjust
+        self.store = store or BarStore()
+        self.loader = loader or download_source
+        self.key = name or f"continuous_{self.spec_hash()[:12]}"
+
+    def spec(self):
+        return {"sources": [s.spec() for s in self.sources], "adjust": self.adjust}
+
+    def spec_hash(self):
+        return hashlib.sha256(json.dumps(self.spec(), sort_keys=True).encode()).hexdigest()
+
+    def is_cached(self):
+        return self.store.exists(self.key) and self.store.meta(self.key).get("spec_hash") == self.spec_hash()
+
+    def build(self, force=False):
+        """Returns the continuous series, stitching and persisting it only when the spec changed."""
+        if not force and self.is_cached():
+            return self.store.read(self.key)
+        legs = [self.loader(s) for s in self.sources]
+        frame, provenance = stitch(legs, self.sources, self.adjust)
+        self.store.write(self.key, frame, meta={
+            "spec": self.spec(), "spec_hash": self.spec_hash(), "provenance": provenance,
+            "built_at": datetime.now(timezone.utc).isoformat()})
+        return self.store.read(self.key)
+
+    def provenance(self):
+        return self.store.meta(self.key)["provenance"]
@@ -0,0 +1,260 @@
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+import multiprocessing as mp
+from collections import deque
+from bar_store import BarStore
+import wf_optimizer as wf
+from overfit_stats import returns_matrix, overfit_summary, summary_markdown, Config as OverfitConfig
+
+# --- SHADOW TITAN: DISTRIBUTED GRID SEARCH ---
+# A coordinator shards the wf_optimizer grid into work units and serves them
+# over a JSON-lines TCP queue. Workers on any node attach to their own copy of
+# the bar store, prove it is the same dataset (fingerprint handshake), lease
+# units, heartbeat while evaluating and push metrics back. A lease that is not
+# renewed in time (dead or partitioned worker) goes back to the queue.
+#
+#   python distributed_grid.py coordinator --bind 0.0.0.0:7077
+#   python distributed_grid.py worker --connect coordinator-host:7077
+#   python distributed_grid.py local --workers 4      # everything on one box
+
+class Config:
+    DATA_KEY = "GC=F_1d_wf"
+    UNIT_SIZE = 8            # Candidates per work unit
+    LEASE_SECONDS = 60.0
+    HEARTBEAT_SECONDS = 10.0
+    MAX_ATTEMPTS = 3         # Leases per unit before it is reported as failed
+    BIND = "127.0.0.1:7077"
+
+def parse_addr(addr):
+    host, _, port = addr.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def rpc(addr, msg, timeout=30.0):
+    with socket.create_connection(addr, timeout=timeout) as sock:
+        f = sock.makefile("rwb")
+        f.write((json.dumps(msg, default=float) + "\n").encode()); f.flush()
+        line = f.readline()
+    if not line: raise ConnectionError("coordinator closed the connection")
+    return json.loads(line)
+
+def shard(combinations, unit_size):
+    return [{"unit_id": k, "params": combinations[i:i + unit_size]} for k, i in enumerate(range(0, len(combinations), unit_size))]
+
+def ensure_dataset(store, key):
+    """Coordinator side: make sure the optimizer dataset is in the local bar store."""
+    if not store.exists(key):
+        print(f"Bar store has no '{key}', downloading...")
+        store.write(key, wf.load_dataset(), meta={"symbol": wf.Config.SYMBOL, "source": "yfinance"})
+    return store.fingerprint(key)
+
+class Coordinator:
+    """Work queue with lease-based retry. Thread-safe; served by CoordinatorServer."""
+    def __init__(self, units, fingerprint, lease_seconds=None, max_attempts=None):
+        self.units = {u["unit_id"]: u for u in units}
+        self.fingerprint = fingerprint
+        self.lease_seconds = lease_seconds or Config.LEASE_SECONDS
+        self.max_attempts = max_attempts or Config.MAX_ATTEMPTS
+        self.pending = deque(self.units)
+        self.leases = {}     # unit_id -> (worker, deadline)
+        self.attempts = {uid: 0 for uid in self.units}
+        self.results = {}
+        self.failed = {}
+        self.workers = {}
+        self.released = set()  # Workers already told the queue is drained
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+
+    def _reap(self, now):
+        for uid, (worker, deadline) in list(self.leases.items()):
+            if now > deadline:
+                print(f"[coordinator] lease on unit {uid} held by {worker} expired, requeueing")
+                del self.leases[uid]
+                self._requeue(uid, f"lease expired ({worker})")
+
+    def _requeue(self, uid, reason):
+        if self.attempts[uid] >= self.max_attempts:
+            self.failed[uid] = reason
+            self._check_done()
+        else:
+            self.pending.appendleft(uid)
+
+    def _check_done(self):
+        if len(self.results) + len(self.failed) == len(self.units): self.finished.set()
+
+    def handle(self, msg):
+        op, worker, now = msg.get("op"), msg.get("worker"), time.monotonic()
+        with self.lock:
+            self._reap(now)
+            if op == "hello":
+                if msg.get("fingerprint") != self.fingerprint:
+                    return {"ok": False, "error": f"bar store fingerprint mismatch (expected {self.fingerprint[:12]})"}
+                self.workers[worker] = {"host": msg.get("host"), "units": 0}
+                return {"ok": True, "lease_seconds": self.lease_seconds, "heartbeat_seconds": Config.HEARTBEAT_SECONDS}
+            if worker not in self.workers:
+                return {"ok": False, "error": "unknown worker, send hello first"}
+            if op == "lease":
+                if self.finished.is_set():
+                    self.released.add(worker)
+                    return {"ok": True, "done": True}
+                if not self.pending: return {"ok": True, "wait": 1.0}
+                uid = self.pending.popleft()
+                self.attempts[uid] += 1
+                self.leases[uid] = (worker, now + self.lease_seconds)
+                return {"ok": True, "unit": self.units[uid]}
+            uid = msg.get("unit_id")
+            holder = self.leases.get(uid, (None,))[0]
+            if op == "heartbeat":
+                if holder != worker: return {"ok": False, "error": "lease lost"}
+                self.leases[uid] = (worker, now + self.lease_seconds)
+                return {"ok": True}
+            if op == "result":
+                if uid in self.results: return {"ok": True, "duplicate": True}
+                self.leases.pop(uid, None)
+                if uid in self.pending: self.pending.remove(uid)
+                self.results[uid] = msg["results"]
+                self.failed.pop(uid, None)
+                self.workers[worker]["units"] += 1
+                self._check_done()
+                return {"ok": True}
+            if op == "fail":
+                if holder == worker:
+                    del self.leases[uid]
+                    self._requeue(uid, msg.get("error", "worker error"))
+                return {"ok": True}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def progress(self):
+        with self.lock:
+            return {"done": len(self.results), "failed": len(self.failed), "leased": len(self.leases), "pending": len(self.pending)}
+
+    def collected(self):
+        return [r for uid in sorted(self.results) for r in self.results[uid]]
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, addr, coordinator):
+        self.coordinator = coordinator
+        super().__init__(addr, _Handler)
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.server.coordinator.handle(json.loads(line))
+            except Exception as e:
+                reply = {"ok": False, "error": repr(e)}
+            self.wfile.write((json.dumps(reply, default=float) + "\n").encode())
+
+def start_server(coordinator, addr):
+    server = CoordinatorServer(addr, coordinator)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[coordinator] serving {len(coordinator.units)} units on {server.server_address[0]}:{server.server_address[1]}")
+    return server
+
+def wait_for_results(coordinator, server, poll=5.0, grace=None):
+    try:
+        while not coordinator.finished.wait(poll):
+            with coordinator.lock: coordinator._reap(time.monotonic())
+            print(f"[coordinator] {coordinator.progress()}")
+        # Keep answering until every worker has been released (or stopped polling)
+        deadline = time.monotonic() + (grace if grace is not None else 2 * Config.HEARTBEAT_SECONDS)
+        while time.monotonic() < deadline and set(coordinator.workers) - coordinator.released:
+            time.sleep(0.1)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return coordinator.collected()
+
+# --- Worker ---
+def run_worker(addr, store_root=None, key=None, worker_id=None):
+    store = BarStore(store_root)
+    key = key or Config.DATA_KEY
+    worker_id = worker_id or f"{socket.gethostname()}-{mp.current_process().pid}"
+    hello = rpc(addr, {"op": "hello", "worker": worker_id, "host": socket.gethostname(), "fingerprint": store.fingerprint(key)})
+    if not hello["ok"]:
+        print(f"[{worker_id}] rejected: {hello['error']}")
+        return 0
+    full_data = store.read(key)
+    train, val, fwd = wf.split_dataset(full_data)
+    done = 0
+    while True:
+        try:
+            reply = rpc(addr, {"op": "lease", "worker": worker_id})
+        except OSError:
+            print(f"[{worker_id}] coordinator unreachable, stopping")
+            break
+        if reply.get("done"): break
+        if "wait" in reply:
+            time.sleep(reply["wait"]); continue
+        unit = reply["unit"]
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(addr, worker_id, unit["unit_id"], hello["heartbeat_seconds"], stop), daemon=True)
+        beat.start()
+        try:
+            results = wf.evaluate_candidates(unit["params"], train, val, fwd, full_data)
+            rpc(addr, {"op": "result", "worker": worker_id, "unit_id": unit["unit_id"], "results": results})
+            done += 1
+        except Exception as e:
+            rpc(addr, {"op": "fail", "worker": worker_id, "unit_id": unit["unit_id"], "error": repr(e)})
+        finally:
+            stop.set()
+    print(f"[{worker_id}] finished {done} units")
+    return done
+
+def _heartbeat(addr, worker_id, unit_id, every, stop):
+    while not stop.wait(every):
+        try:
+            rpc(addr, {"op": "heartbeat", "worker": worker_id, "unit_id": unit_id})
+        except OSError:
+            pass
+
+def run_local(workers=4, store_root=None, key=None, bind="127.0.0.1:0"):
+    """Coordinator plus N worker processes on this machine, end to end."""
+    store = BarStore(store_root)
+    key = key or Config.DATA_KEY
+    coordinator = Coordinator(shard(wf.grid_combinations(), Config.UNIT_SIZE), ensure_dataset(store, key))
+    server = start_server(coordinator, parse_addr(bind))
+    procs = [mp.Process(target=run_worker, args=(server.server_address, store.root, key, f"local-{k}")) for k in range(workers)]
+    for p in procs: p.start()
+    results = wait_for_results(coordinator, server)
+    for p in procs: p.join()
+    return results, coordinator
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Shadow Titan distributed grid search")
+    ap.add_argument("mode", choices=["coordinator", "worker", "local"])
+    ap.add_argument("--bind", default=Config.BIND)
+    ap.add_argument("--connect", default=Config.BIND)
+    ap.add_argument("--store", default=None, help="bar store root (default: SHADOW_BAR_STORE)")
+    ap.add_argument("--key", default=Config.DATA_KEY)
+    ap.add_argument("--workers", type=int, default=mp.cpu_count())
+    args = ap.parse_args(argv)
+
+    if args.mode == "worker":
+        run_worker(parse_addr(args.connect), args.store, args.key)
+        return
+    if args.mode == "local":
+        results, coordinator = run_local(args.workers, args.store, args.key)
+    else:
+        store = BarStore(args.store)
+        coordinator = Coordinator(shard(wf.grid_combinations(), Config.UNIT_SIZE), ensure_dataset(store, args.key))
+        results = wait_for_results(coordinator, start_server(coordinator, parse_addr(args.bind)))
+    if coordinator.failed: print(f"Units failed after {coordinator.max_attempts} attempts: {coordinator.failed}")
+    best = wf.rank_candidates(results)
+    print(f"Evaluated {len(results)} candidates on {len(coordinator.workers)} workers.")
+    for cand in best[:5]:
+        print(f"  {cand['params']} -> sharpe {cand['metrics']['sharpe']:.2f}, max DD {cand['metrics']['max_dd']:.2f}%")
+    wf.save_sweep(results)
+    M, params = returns_matrix(results)
+    if M.shape[1] > 1 and M.shape[0] >= 2 * OverfitConfig.BLOCKS:
+        print(summary_markdown(overfit_summary(M, params)))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+import os
+import glob
+import pickle
+import hashlib
+import numpy as np
+
+# --- SHADOW TITAN: ENGINE SNAPSHOTS ---
+# Bar-by-bar engines are pickled at period boundaries together with a hash of
+# the data prefix they have consumed. When the bar store grows, the newest
+# snapshot whose prefix is still identical is loaded and only the new bars are
+# replayed; a revised bar invalidates every snapshot after it, never before.
+
+class Config:
+    ROOT = os.environ.get("SHADOW_SNAPSHOTS", os.path.join(os.path.expanduser("~"), ".shadow_titan", "snapshots"))
+    KEEP = 3   # Most recent boundary snapshots kept per engine spec
+
+def bar_rows(index_ns, columns):
+    """Row-major (n, 1 + k) float64 matrix: the int64 timestamps bit-cast, then the columns."""
+    return np.ascontiguousarray(np.column_stack([np.asarray(index_ns, dtype=np.int64).view(np.float64)] +
+                                                [np.asarray(c, dtype=np.float64) for c in columns]))
+
+def prefix_hash(rows, bars):
+    """sha256 over the first `bars` rows of bar_rows()."""
+    return hashlib.sha256(rows[:bars]).hexdigest()
+
+class PrefixHasher:
+    """prefix_hash at increasing bar counts in O(total rows) instead of O(rows) per call."""
+    def __init__(self, rows, start=0):
+        self.rows = rows
+        self.digest = hashlib.sha256(rows[:start])
+        self.pos = start
+
+    def at(self, bars):
+        self.digest.update(self.rows[self.pos:bars])
+        self.pos = bars
+        return self.digest.copy().hexdigest()
+
+def spec_hash(*parts):
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+class SnapshotStore:
+    """<root>/<key>/<bars>.pkl, each holding {bars, prefix_hash, engine}."""
+    def __init__(self, key, root=None, keep=None):
+        self.dir = os.path.join(root or Config.ROOT, key)
+        self.keep = keep or Config.KEEP
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, bars):
+        return os.path.join(self.dir, f"{bars:012d}.pkl")
+
+    def bars(self):
+        return sorted(int(os.path.basename(p)[:-4]) for p in glob.glob(os.path.join(self.dir, "*.pkl")))
+
+    def save(self, engine, bars, digest):
+        tmp = self._path(bars) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"bars": bars, "prefix_hash": digest, "engine": engine}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(bars))
+        for old in self.bars()[:-self.keep]: os.remove(self._path(old))
+
+    def latest(self, rows):
+        """(engine, bars) of the newest snapshot whose data prefix matches rows, or (None, 0)."""
+        n = len(rows)
+        for bars in reversed(self.bars()):
+            if bars > n: continue
+            with open(self._path(bars), "rb") as f: snap = pickle.load(f)
+            if snap["prefix_hash"] == prefix_hash(rows, bars):
+                return snap["engine"], bars
+        return None, 0
+
+    def clear(self):
+        for bars in self.bars(): os.remove(self._path(bars))
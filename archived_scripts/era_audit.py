@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from rng_streams import RandomStreams
+from shadow_titan_audit import ShadowTitanAuditor, download_history, compute_indicators, Config as AuditConfig
+
+# --- SHADOW TITAN: ERA-PARALLEL AUDIT ---
+# The full history is downloaded and the indicators computed once; every era
+# (a year, a decade, any custom window) then trades only its own bars on that
+# shared frame, with all earlier history as indicator warm-up. Eras run
+# concurrently in a process pool whose workers receive the frame once through
+# the pool initializer, and their monthly stats are merged into one
+# cumulative frame in era order. Total work is one pass over the history
+# however the span is cut.
+
+class Config:
+    HISTORY_START = "2005-01-01"   # One year of warm-up before the first 2006 era
+    HISTORY_END = "2026-03-01"
+    WORKERS = os.cpu_count() or 1
+    SEED = AuditConfig.SEED
+
+Era = namedtuple("Era", "name start end")
+
+def yearly_eras(first_year, last_year):
+    return [Era(str(y), f"{y}-01-01", f"{y + 1}-01-01") for y in range(first_year, last_year + 1)]
+
+def decade_eras(first_year, last_year, span=10):
+    return [Era(f"{y}-{min(y + span, last_year + 1)}", f"{y}-01-01", f"{min(y + span, last_year + 1)}-01-01")
+            for y in range(first_year, last_year + 1, span)]
+
+def load_history(start=None, end=None):
+    """One download and one indicator pass for every era."""
+    data = download_history(start or Config.HISTORY_START, end or Config.HISTORY_END)
+    if data.empty: raise RuntimeError(f"No data for {AuditConfig.SYMBOL}")
+    return compute_indicators(data)
+
+_DATA = None
+
+def _init_worker(data):
+    global _DATA
+    _DATA = data
+
+def _run_era(era, streams):
+    end = int(_DATA.index.searchsorted(pd.Timestamp(era.end)))
+    auditor = ShadowTitanAuditor(era.start, era.end, streams=streams)
+    auditor.run_simulation(_DATA.iloc[:end], trade_start=era.start)
+    return era, auditor.monthly_stats, auditor.trade_log, auditor.balance
+
+def run_eras(data, eras, streams=None, workers=None):
+    """{era name: {monthly, ledger, balance}} for each era, run in a process pool."""
+    streams = streams if streams is not None else RandomStreams(Config.SEED)
+    # Children are spawned in era order, so results do not depend on scheduling
+    children = [streams.child() for _ in eras]
+    workers = min(workers or Config.WORKERS, len(eras))
+    if workers <= 1:
+        _init_worker(data)
+        results = [_run_era(era, s) for era, s in zip(eras, children)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+            results = list(pool.map(_run_era, eras, children))
+    return {era.name: {"era": era, "monthly": pd.DataFrame(stats), "ledger": ledger, "balance": balance}
+            for era, stats, ledger, balance in results}
+
+def merge_eras(results):
+    """Monthly stats of all eras in one frame, with an Era column."""
+    frames = []
+    for name, res in results.items():
+        frame = res["monthly"].copy()
+        frame.insert(0, "Era", name)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def era_summary(results):
+    rows = []
+    for name, res in results.items():
+        df = res["monthly"]
+        rows.append({"Era": name, "Months": len(df),
+                     "Avg Monthly (%)": round(df['Return (%)'].mean(), 2) if len(df) else 0.0,
+                     "Profitable (%)": round((df['Return (%)'] >= 0).mean() * 100, 1) if len(df) else 0.0,
+                     "Trades": len(res["ledger"]), "Final Balance ($)": round(res["balance"], 2)})
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    # python era_audit.py [yearly|decade] [first_year] [last_year]
+    kind = sys.argv[1] if len(sys.argv) > 1 else "yearly"
+    first, last = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) > 3 else (2006, 2025)
+    eras = yearly_eras(first, last) if kind == "yearly" else decade_eras(first, last)
+    started = time.perf_counter()
+    data = load_history(f"{first - 1}-01-01")
+    results = run_eras(data, eras)
+    cumulative = merge_eras(results)
+    print(era_summary(results).to_markdown(index=False))
+    print(f"{len(eras)} eras, {len(cumulative)} months in {time.perf_counter() - started:.1f}s")
+    cumulative.to_csv(f"SHADOW_TITAN_ERA_AUDIT_{kind}_{first}_{last}.csv", index=False)
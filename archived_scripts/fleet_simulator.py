@@ -0,0 +1,247 @@
+import time
+import numpy as np
+import pandas as pd
+from search_space import SearchSpace, Conditional
+from portfolio_backtest import (generate_symbol_trades, trades_since, fill_events, PortfolioAccount, merge_fills,
+                                NS_PER_DAY, MARK, ENTRY, Config as PortfolioConfig)
+from ultra_audit_1996_2025 import Config as AuditConfig, PHASES
+
+# --- SHADOW TITAN: MULTI-ACCOUNT FLEET SIMULATOR ---
+# Account settings (balance, RiskPerTradePercent, internal DD guards, hard
+# prop limits, MODE_CHALLENGE vs MODE_FUNDED, phase targets) change sizing and
+# rule outcomes but never the signals or fills. The fills are generated once
+# (portfolio_backtest workers, one per symbol) and reduced to per-unit PnL and
+# stop distance; every account is then one lane of a vector and the merged
+# entry/exit event stream is replayed for the whole fleet in a single pass.
+# Rules per lane, as in CRiskManagerV2:
+#   - entries are gated and sized on equity: open positions are marked to
+#     the closes shipped back with the fills (portfolio_backtest MARK events)
+#   - entries are blocked below the total guard (from the phase's starting
+#     balance) or the daily guard (from start-of-day max(balance, equity))
+#   - a closed balance below the hard daily / total limit breaches the account
+#   - challenge accounts pass P1 / P2 at their profit targets and restart at
+#     the starting balance for the next phase; funded accounts start FUNDED
+#   - the funded consistency score is the best day over funded profit (35% cap)
+
+class Config:
+    SYMBOLS = ["GC=F"]
+    START = PortfolioConfig.START
+    END = PortfolioConfig.END
+    WARMUP_START = PortfolioConfig.WARMUP_START
+    INTERVAL = PortfolioConfig.INTERVAL
+    BAR_STORE = PortfolioConfig.BAR_STORE
+    PARAMS = AuditConfig.PARAMS
+    # Account defaults (Shadow_Titan_V2.mq5 inputs, ultra_audit targets and guards)
+    BALANCE = AuditConfig.INITIAL_BALANCE
+    RISK_PCT = 0.5                 # RiskPerTradePercent
+    DAILY_GUARD = AuditConfig.DAILY_DD_GUARD
+    TOTAL_GUARD = AuditConfig.TOTAL_DD_GUARD
+    DAILY_LIMIT_PCT = 3.0          # DailyDDLimitPercent (hard prop limit)
+    TOTAL_LIMIT_PCT = 8.0          # TotalDDLimitPercent
+    P1_TARGET_PCT = AuditConfig.P1_TARGET_PCT
+    P2_TARGET_PCT = AuditConfig.P2_TARGET_PCT
+    FUNDED_RISK_CAP = None         # e.g. 0.3 (PropBot v1 funded safety cap); None = no cap
+    CONSISTENCY_THRESHOLD = 0.35   # CONSISTENCY_THRESHOLD (Common.mqh)
+    WORKERS = None
+
+MODES = ("challenge", "funded")
+ACCOUNT_DEFAULTS = {"balance": Config.BALANCE, "risk_pct": Config.RISK_PCT, "daily_guard": Config.DAILY_GUARD,
+                    "total_guard": Config.TOTAL_GUARD, "daily_limit_pct": Config.DAILY_LIMIT_PCT,
+                    "total_limit_pct": Config.TOTAL_LIMIT_PCT, "mode": "challenge",
+                    "p1_target_pct": Config.P1_TARGET_PCT, "p2_target_pct": Config.P2_TARGET_PCT}
+FUNDED = PHASES.index("FUNDED")
+
+def default_fleet_space():
+    """The standard account grid (a few hundred configurations)."""
+    challenge = lambda a: a["mode"] == "challenge"
+    return SearchSpace({
+        "mode": list(MODES),
+        "balance": [25000.0, 50000.0, 100000.0, 200000.0],
+        "risk_pct": [0.25, 0.5, 0.75, 1.0, 1.5],
+        "daily_guard": [Config.DAILY_GUARD, 0.98],
+        "total_guard": [Config.TOTAL_GUARD, 0.95],
+        "daily_limit_pct": [3.0, 5.0],
+        "p1_target_pct": Conditional([8.0, Config.P1_TARGET_PCT], challenge, ["mode"]),
+        "p2_target_pct": Conditional([Config.P2_TARGET_PCT], challenge, ["mode"]),
+    })
+
+def unit_outcomes(results):
+    """Per-unit PnL, per-unit mark PnL, stop distance, open slot and event stream of the merged fills; account-independent."""
+    trades, events = fill_events(results)
+    mt = trades["mark_trade"]
+    return {"unit_pnl": trades["side"] * (trades["exit_px"] - trades["entry_px"]), "sl_dist": trades["sl_dist"],
+            "unit_mark": trades["side"][mt] * (trades["mark_px"] - trades["entry_px"][mt]), "mark_trade": mt,
+            "slot": trades["symbol"].astype(np.int64), "slots": len(results), "events": events}
+
+class FleetSimulator:
+    """Replays one set of fills through many account configurations at once."""
+    def __init__(self, results):
+        self.symbols = [r["symbol"] for r in results]
+        self.outcomes = unit_outcomes(results)
+
+    def _lanes(self, accounts):
+        get = lambda k: np.array([a[k] if a.get(k) is not None else ACCOUNT_DEFAULTS[k] for a in accounts], dtype=float)
+        mode = [a.get("mode") or ACCOUNT_DEFAULTS["mode"] for a in accounts]
+        if set(mode) - set(MODES): raise ValueError(f"mode must be one of {MODES}")
+        lanes = {k: get(k) for k in ACCOUNT_DEFAULTS if k != "mode"}
+        lanes["phase"] = np.array([FUNDED if m == "funded" else 0 for m in mode], dtype=np.int64)
+        cap = Config.FUNDED_RISK_CAP
+        lanes["funded_risk"] = lanes["risk_pct"] if cap is None else np.minimum(lanes["risk_pct"], cap)
+        return lanes
+
+    def run(self, accounts):
+        """Returns a dict of per-account result arrays (account order preserved)."""
+        accounts = list(accounts)
+        L = self._lanes(accounts)
+        A = len(accounts)
+        o = self.outcomes
+        unit_pnl, sl_dist, slot = o["unit_pnl"], o["sl_dist"], o["slot"]
+        unit_mark, mark_trade = o["unit_mark"], o["mark_trade"]
+        ev_time, ev_kind, ev_trade = o["events"]
+
+        start = L["balance"].copy()            # Starting balance of the current phase
+        bal = start.copy()
+        sod = bal.copy()
+        hwm = bal.copy()
+        phase = L["phase"].copy()
+        live = np.ones(A, dtype=bool)
+        units = np.zeros((o["slots"], A))      # One open position per symbol
+        floating = np.zeros((o["slots"], A))   # Its PnL at the last mark
+        open_pnl = np.zeros(A)
+        max_dd = np.zeros(A)
+        trades = np.zeros(A, dtype=np.int64)
+        blocked_daily = np.zeros(A, dtype=np.int64)
+        blocked_total = np.zeros(A, dtype=np.int64)
+        passed_ns = np.full((FUNDED, A), -1, dtype=np.int64)
+        breach_ns = np.full(A, -1, dtype=np.int64)
+        day_pnl = np.zeros(A)
+        best_day = np.zeros(A)
+        funded_pnl = np.zeros(A)
+        daily_floor = 1.0 - L["daily_limit_pct"] / 100.0
+        total_floor = 1.0 - L["total_limit_pct"] / 100.0
+        targets = np.vstack([L["p1_target_pct"], L["p2_target_pct"]])
+
+        day = ev_time // NS_PER_DAY
+        new_day = np.r_[True, day[1:] != day[:-1]] if len(day) else np.empty(0, dtype=bool)
+        for t, kind, k, first in zip(ev_time, ev_kind, ev_trade, new_day):
+            if first:
+                best_day = np.where(phase == FUNDED, np.maximum(best_day, day_pnl), best_day)
+                day_pnl[:] = 0.0
+                sod = np.maximum(bal, bal + open_pnl)
+            if kind == MARK:
+                s = slot[mark_trade[k]]
+                f = unit_mark[k] * units[s]
+                open_pnl += f - floating[s]
+                floating[s] = f
+                continue
+            s = slot[k]
+            if kind == ENTRY:
+                # CRiskManagerV2::IsTradingAllowed on equity, total guard checked first
+                equity = bal + open_pnl
+                total_hit = live & (equity < start * L["total_guard"])
+                daily_hit = live & ~total_hit & (equity < sod * L["daily_guard"])
+                blocked_total += total_hit
+                blocked_daily += daily_hit
+                allowed = live & ~total_hit & ~daily_hit
+                risk = np.where(phase == FUNDED, L["funded_risk"], L["risk_pct"])
+                units[s] = np.where(allowed, equity * risk / 100.0 / sl_dist[k], 0.0) if sl_dist[k] > 0 else 0.0
+                continue
+
+            u = units[s].copy()
+            units[s] = 0.0
+            open_pnl -= floating[s]
+            floating[s] = 0.0
+            if not u.any(): continue
+            pnl = unit_pnl[k] * u
+            bal = bal + pnl
+            trades += u > 0
+            day_pnl += pnl
+            funded_pnl += np.where(phase == FUNDED, pnl, 0.0)
+            hwm = np.maximum(hwm, bal)
+            max_dd = np.maximum(max_dd, (hwm - bal) / hwm * 100)
+
+            breached = live & ((bal < sod * daily_floor) | (bal < start * total_floor))
+            if breached.any():
+                breach_ns[breached] = t
+                live &= ~breached
+                units[:, breached] = 0.0
+                floating[:, breached] = 0.0
+                open_pnl[breached] = 0.0
+
+            profit_pct = (bal - start) / start * 100
+            for ph in range(FUNDED):
+                passed = live & (phase == ph) & (profit_pct >= targets[ph])
+                if not passed.any(): continue
+                # A passed phase hands over a fresh account at the starting balance
+                passed_ns[ph, passed] = t
+                phase[passed] = ph + 1
+                bal = np.where(passed, L["balance"], bal)
+                sod = np.where(passed, bal, sod)
+                hwm = np.where(passed, bal, hwm)
+                day_pnl = np.where(passed, 0.0, day_pnl)
+                profit_pct = np.where(passed, 0.0, profit_pct)
+
+        best_day = np.where(phase == FUNDED, np.maximum(best_day, day_pnl), best_day)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            consistency = np.where(funded_pnl > 0, best_day / funded_pnl, 0.0)
+        return {"balance": bal, "phase": phase, "breached": ~live, "breach_ns": breach_ns, "p1_ns": passed_ns[0],
+                "p2_ns": passed_ns[1], "max_dd_pct": max_dd, "trades": trades, "blocked_daily": blocked_daily,
+                "blocked_total": blocked_total, "funded_pnl": funded_pnl, "consistency": consistency}
+
+    def fleet_table(self, accounts, start=None):
+        """One row per account configuration with its phase outcomes."""
+        accounts = list(accounts)
+        res = self.run(accounts)
+        t0 = pd.Timestamp(start or Config.START).value
+        days = lambda ns: np.where(ns >= 0, (ns - t0) / NS_PER_DAY, np.nan)
+        table = pd.DataFrame([{**ACCOUNT_DEFAULTS, **{k: v for k, v in a.items() if v is not None}} for a in accounts])
+        table["phase"] = [PHASES[ph] for ph in res["phase"]]
+        table["breached"] = res["breached"]
+        table["days_to_p2"] = days(res["p1_ns"])
+        table["days_to_funded"] = days(res["p2_ns"])
+        table["days_to_breach"] = days(res["breach_ns"])
+        table["final_balance"] = res["balance"]
+        table["funded_pnl"] = res["funded_pnl"]
+        table["funded_return_pct"] = res["funded_pnl"] / table["balance"] * 100
+        table["max_dd_pct"] = res["max_dd_pct"]
+        table["trades"] = res["trades"]
+        table["blocked_entries"] = res["blocked_daily"] + res["blocked_total"]
+        table["consistency"] = res["consistency"]
+        table["payout_ok"] = (res["funded_pnl"] > 0) & (res["consistency"] <= Config.CONSISTENCY_THRESHOLD) & ~res["breached"]
+        return table
+
+def verify_single(results, account=None):
+    """A one-lane fleet without limits or targets against PortfolioAccount.merge_fills. Returns True on exact match."""
+    a = {"risk_pct": Config.RISK_PCT, "daily_guard": Config.DAILY_GUARD, "total_guard": Config.TOTAL_GUARD, **(account or {}),
+         "mode": "challenge", "daily_limit_pct": 100.0, "total_limit_pct": 100.0, "p1_target_pct": np.inf, "p2_target_pct": np.inf}
+    res = FleetSimulator(results).run([a])
+    ref = PortfolioAccount(a.get("balance", Config.BALANCE), a["risk_pct"], a["daily_guard"], a["total_guard"])
+    ledger, _ = merge_fills(results, ref)
+    return (res["balance"][0] == ref.balance and res["trades"][0] == len(ledger)
+            and res["blocked_daily"][0] == ref.blocked_daily and res["blocked_total"][0] == ref.blocked_total)
+
+def load_fills(symbols=None, workers=None):
+    symbols = symbols or Config.SYMBOLS
+    results = sorted(generate_symbol_trades(symbols, Config.WARMUP_START, Config.END, Config.INTERVAL, Config.PARAMS,
+                                            workers or Config.WORKERS, Config.BAR_STORE),
+                     key=lambda r: symbols.index(r["symbol"]))
+    for r in results: trades_since(r, Config.START)
+    return results
+
+def run_fleet(accounts=None, symbols=None, workers=None):
+    accounts = list(accounts if accounts is not None else default_fleet_space())
+    print(f"Shadow Titan Fleet: {len(accounts)} accounts on {', '.join(symbols or Config.SYMBOLS)}, {Config.START} -> {Config.END}")
+    results = load_fills(symbols, workers)
+    started = time.perf_counter()
+    table = FleetSimulator(results).fleet_table(accounts)
+    print(f"Fleet replay: {len(accounts)} accounts x {sum(len(r['side']) for r in results):,} trades "
+          f"in {time.perf_counter() - started:.2f}s")
+    summary = table.groupby(["mode", "risk_pct"]).agg(
+        accounts=("phase", "size"), funded_pct=("phase", lambda s: (s == "FUNDED").mean() * 100),
+        breached_pct=("breached", lambda s: s.mean() * 100), median_days_to_funded=("days_to_funded", "median"),
+        median_funded_return_pct=("funded_return_pct", "median"), payout_ok_pct=("payout_ok", lambda s: s.mean() * 100))
+    print(summary.round(1).to_string())
+    return table
+
+if __name__ == "__main__":
+    run_fleet()
@@ -1,7 +1,8 @@
 import yfinance as yf
 import pandas as pd
-import numpy as np
 import os
+from rng_streams import RandomStreams
+from report_pipeline import ResultStore, render_all
 
 # --- FINAL GOD-MODE REPORT GENERATOR ---
 Config = type('Config', (), {
@@ -10,7 +11,8 @@ Config = type('Config', (), {
     'TARGET_MONTHLY_PCT': 20.0,
     'MAX_MONTHLY_DD_LIMIT': 1.95,
     'START': "2016-01-01",
-    'END': "2026-03-01"
+    'END': "2026-03-01",
+    'SEED': 2016
 })
 
 p = {'fast': 5, 'medium': 13, 'slow': 50, 'rsi_max': 75, 'rsi_min': 25, 'sl_mult': 1.0, 'tp_mult': 5.0, 'risk': 1.5}
@@ -37,6 +39,7 @@ def generate_god_audit():
     month_active = True
     month_hwm = balance
     trades_won = total_trades = 0
+    draws = RandomStreams(Config.SEED).bar_draws(len(df))
 
     for i in range(200, len(df)):
         ts = df.index[i]
@@ -78,7 +81,7 @@ def generate_god_audit():
             tp_dist = atr * p['tp_mult']
             units = (balance * final_risk) / sl_dist if sl_dist > 0 else 0
             p_win = 0.92 if (abs(c-o) > atr * 0.2) else 0.82
-            outcome = 1 if np.random.random() < p_win else -1
+            outcome = 1 if draws[i] < p_win else -1
             balance += (tp_dist if outcome == 1 else -sl_dist) * units
             total_trades += 1
 
@@ -86,33 +89,10 @@ def generate_god_audit():
     avg_monthly = df_stats['Return (%)'].mean()
     success_rate = (len(df_stats[df_stats['Return (%)'] >= 20.0]) / len(df_stats) * 100)
     
-    report = f"""# SHADOW TITAN V1: 10-YEAR GOD-MODE AUDIT (2016-2026)
-## 👑 The Sovereign Performance Proof
-
-This audit certifies the SHADOW TITAN V1 for institutional deployment. After 10 years of simulated history with real Gold volatility, the **"Sovereign Set"** has proven to hit the extreme 20% monthly targets while honoring the 2% drawdown floor.
-
-### 🌐 Global Performance Metrics
-- **Verification Span**: Jan 2016 - Jan 2026 (120 Months)
-- **Average Monthly Profit**: {avg_monthly:.2f}%
-- **Max Portfolio Drawdown**: Verified within 1.95% absolute ceiling.
-- **God-Mode Consistency**: {success_rate:.1f}% of months achieved ≥ 20.0% profit.
-- **Final Portfolio Value**: ${balance:,.2f}
-
-### 🧬 Sovereign Optimization
-- **Ema Hierarchy**: 5 / 13 / 50 (High Frequency)
-- **RSI Sniper**: 25 - 75 (Exhaustion Entries)
-- **Risk Profile**: 1.5% Base (Dynamic Throttling Enabled)
-- **Target RR**: 1:5.0
-
-## 📅 Monthly Performance Breakdown
-{df_stats.to_markdown(index=False)}
-
----
-*Verified by Alpha-Generation Protocol.*
-"""
-    with open("/Users/muhammedriyaz/.gemini/antigravity/scratch/shadowbot_pro/SHADOW_TITAN_GOD_MODE_AUDIT.md", "w") as f:
-        f.write(report)
-    print("Final God-Mode Audit Generated.")
+    ResultStore().save("god_mode_audit", {
+        "avg_monthly": avg_monthly, "success_rate": success_rate, "final_balance": balance, "months": len(df_stats),
+    }, tables={"monthly": df_stats})
+    print(f"Final God-Mode Audit: {render_all(['god_mode_audit'])}")
 
 if __name__ == "__main__":
     generate_god_audit()
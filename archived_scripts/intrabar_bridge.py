@@ -0,0 +1,87 @@
+import numpy as np
+
+# --- SHADOW TITAN: BROWNIAN-BRIDGE INTRABAR EXITS ---
+# On daily bars a trade whose stop and target both sit inside the bar's range
+# leaves the order of the two touches unknown. Here the path inside the bar
+# is a Brownian bridge from Open to Close with the Parkinson variance of the
+# bar's range, (High - Low)^2 / (4 ln 2). Knowing that both levels were
+# touched, the chance the upper one came first is a ratio of reflection
+# (image) series, evaluated for every ambiguous bar of every parameter set in
+# one NumPy pass:
+#   P(upper first | both touched) = G_up / (G_up + G_down)
+#   G_x = sum over even n >= 2 of M_n(x-start) - sum over odd n >= 3 of M_n(other-start)
+# where M_n is the bridge weight of paths that touch the two levels in an
+# alternating pattern of length n, found by reflecting the Close back across
+# the levels (reflection principle). Terms fall off as exp(-2 (k w)^2 / var) for corridor
+# width w, so the series is cut once they do.
+
+class Config:
+    MIN_TERMS = 6                  # Reflections per pattern, at least
+    MAX_TERMS = 200                # ... and at most (narrow corridors in wide bars)
+    TAIL_SIGMAS = 4.5              # Images this many bar sigmas past the corridor weigh < exp(-40)
+    MIN_VARIANCE_FRAC = 1e-12      # Variance floor, as a fraction of Open^2
+
+PARKINSON = 1.0 / (4.0 * np.log(2.0))
+
+def parkinson_variance(high, low):
+    """Per-bar variance of an arithmetic Brownian path with this range (price units squared)."""
+    return (np.asarray(high, dtype=float) - np.asarray(low, dtype=float)) ** 2 * PARKINSON
+
+def _log_weight(a, b, e, var):
+    # log phi(e - a) - log phi(b - a): image weight relative to the free bridge density
+    return ((b - a) ** 2 - (e - a) ** 2) / (2.0 * var)
+
+def _reflect_run(e, last, other, m):
+    """e reflected across last, other, last, ... (m reflections); two in a row are a shift by 2 (other - last)."""
+    pairs = m // 2
+    e = e + 2.0 * pairs * (other - last)
+    return np.where(m % 2 == 1, 2.0 * last - e, e)
+
+def _pattern_weights(a, b, first, second, var, terms):
+    """M_n for the alternating touch pattern first, second, first, ... for n = 1..terms; shape (terms, N).
+
+    The Close is reflected back across the pattern, last touch first. A touch
+    needs no reflection when it is forced, i.e. when the path must cross the
+    level anyway to get from the previous touch to the Close; only the last
+    touch of a pattern can be forced.
+    """
+    out = np.empty((terms,) + a.shape)
+    for n in range(1, terms + 1):
+        last, prev = (first, second) if n % 2 == 1 else (second, first)
+        q = prev if n > 1 else a
+        forced = (q - last) * (b - last) < 0
+        e = np.where(forced, _reflect_run(b, prev, last, n - 1), _reflect_run(b, last, prev, n))
+        out[n - 1] = np.exp(np.minimum(_log_weight(a, b, e, var), 0.0))
+    return out
+
+def upper_first_probability(open_, close, lower, upper, var):
+    """P(upper level touched before lower | bridge Open -> Close with variance var, both touched).
+
+    All arguments broadcast against each other. Opens already at or beyond a
+    level touch it first (gap fills).
+    """
+    a, b, lo, hi, var = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (open_, close, lower, upper, var)))
+    var = np.maximum(var, Config.MIN_VARIANCE_FRAC * a * a + 1e-300)
+    w = np.maximum(hi - lo, 1e-300)
+    need = np.ceil(Config.TAIL_SIGMAS * np.sqrt(var) / w) + 1 if a.size else np.zeros(1)
+    terms = int(np.clip(2 * np.max(need), Config.MIN_TERMS, Config.MAX_TERMS))
+    up = _pattern_weights(a, b, hi, lo, var, terms)      # hi, lo, hi, ...
+    down = _pattern_weights(a, b, lo, hi, var, terms)    # lo, hi, lo, ...
+    # Length-n patterns are rows n - 1: evens are rows 1, 3, ...; odds >= 3 are rows 2, 4, ...
+    g_up = up[1::2].sum(axis=0) - down[2::2].sum(axis=0)
+    g_down = down[1::2].sum(axis=0) - up[2::2].sum(axis=0)
+    g_up, g_down = np.maximum(g_up, 0.0), np.maximum(g_down, 0.0)
+    total = g_up + g_down
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Vanishing weights (near-degenerate bars): the nearer level is taken as touched first
+        p = np.where(total > 1e-300, g_up / total, (hi - a < a - lo).astype(float))
+    p = np.where(a >= hi, 1.0, np.where(a <= lo, 0.0, p))
+    return np.clip(p, 0.0, 1.0)
+
+def tp_first_probability(side, open_, high, low, close, sl, tp, var=None):
+    """P(take-profit before stop-loss) for bars where both were inside the range; side 1 long, -1 short."""
+    var = parkinson_variance(high, low) if var is None else var
+    side = np.asarray(side)
+    lower, upper = np.where(side == 1, sl, tp), np.where(side == 1, tp, sl)
+    p_upper = upper_first_probability(open_, close, lower, upper, var)
+    return np.where(side == 1, p_upper, 1.0 - p_upper)
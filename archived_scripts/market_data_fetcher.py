@@ -0,0 +1,285 @@
+import io
+import os
+import time
+import random
+import asyncio
+from urllib.parse import urlsplit, urlencode, parse_qs
+import numpy as np
+import pandas as pd
+from bar_store import BarStore, safe_key
+
+# --- SHADOW TITAN: ASYNC MARKET-DATA FETCHER ---
+# Date ranges are split into chunks that are fetched concurrently through a
+# bounded connection pool with a token-bucket rate limit and exponential
+# backoff. Every finished chunk is written to a parts directory next to the
+# bar store entry, so an interrupted refresh resumes where it stopped; a
+# symbol is consolidated into the store only when all its chunks are in.
+# One failing symbol never aborts the others.
+
+class Config:
+    SYMBOLS = ["GC=F", "SI=F", "^XAU"]
+    START = "1995-12-01"
+    END = "2026-03-01"
+    INTERVAL = "1d"
+    CHUNK_DAYS = 365
+    CONCURRENCY = 4
+    RATE_PER_SEC = 2.0
+    MAX_RETRIES = 5
+    BASE_DELAY = 0.5
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class RetryableError(Exception):
+    pass
+
+class FetchJob:
+    def __init__(self, symbol, start, end, interval="1d", key=None):
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self.interval = interval
+        self.key = key or f"{symbol}_{interval}"
+
+def split_range(start, end, chunk_days):
+    """[(chunk_start, chunk_end)) pairs covering [start, end)."""
+    edges = list(pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq=f"{chunk_days}D"))
+    if not edges or edges[-1] < pd.Timestamp(end): edges.append(pd.Timestamp(end))
+    return list(zip(edges[:-1], edges[1:]))
+
+class RateLimiter:
+    """Token bucket shared by all requests of a fetch run."""
+    def __init__(self, rate_per_sec, burst=None):
+        self.rate = rate_per_sec
+        self.capacity = burst or max(1.0, rate_per_sec)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+# --- Providers ---
+class MarketDataProvider:
+    """Provider interface: return OHLCV bars for [start, end) as a DataFrame indexed by timestamp."""
+    async def fetch(self, symbol, start, end, interval):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class YFinanceProvider(MarketDataProvider):
+    async def fetch(self, symbol, start, end, interval):
+        import yfinance as yf
+        try:
+            df = await asyncio.to_thread(yf.download, symbol, start=start, end=end, interval=interval, auto_adjust=True, progress=False)
+        except Exception as e:
+            raise RetryableError(f"yfinance: {e}") from e
+        if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+        return df[[c for c in BAR_COLUMNS if c in df.columns]]
+
+class ConnectionPool:
+    """Bounded pool of keep-alive HTTP/1.1 connections to one host."""
+    def __init__(self, host, port, size):
+        self.host, self.port = host, port
+        self.slots = asyncio.Semaphore(size)
+        self.idle = []
+
+    async def request(self, path, timeout=30.0):
+        async with self.slots:
+            reader, writer = self.idle.pop() if self.idle else await asyncio.open_connection(self.host, self.port)
+            try:
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n\r\n".encode())
+                await writer.drain()
+                status, headers, body = await asyncio.wait_for(read_http_message(reader), timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                writer.close()
+                raise RetryableError(f"connection error: {e!r}") from e
+            if headers.get("connection", "").lower() == "close": writer.close()
+            else: self.idle.append((reader, writer))
+            return status, body
+
+    async def close(self):
+        for _, writer in self.idle: writer.close()
+        self.idle.clear()
+
+async def read_http_message(reader):
+    """Returns (status_or_request_line, headers, body) of one HTTP/1.1 message."""
+    first = (await reader.readuntil(b"\r\n")).decode().strip()
+    headers = {}
+    while True:
+        line = (await reader.readuntil(b"\r\n")).decode().strip()
+        if not line: break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    status = int(first.split()[1]) if first.startswith("HTTP/") else first
+    return status, headers, body
+
+class HTTPCSVProvider(MarketDataProvider):
+    """Bars served as CSV (ts in ns, OHLCV) from GET {base_url}/bars?symbol=&start=&end=&interval=."""
+    def __init__(self, base_url, pool_size=4):
+        url = urlsplit(base_url)
+        self.prefix = url.path.rstrip("/")
+        self.pool = ConnectionPool(url.hostname, url.port or 80, pool_size)
+
+    async def fetch(self, symbol, start, end, interval):
+        query = urlencode({"symbol": symbol, "start": str(start), "end": str(end), "interval": interval})
+        status, body = await self.pool.request(f"{self.prefix}/bars?{query}")
+        if status == 429 or status >= 500: raise RetryableError(f"HTTP {status}")
+        if status != 200: raise RuntimeError(f"HTTP {status}: {body[:200]!r}")
+        df = pd.read_csv(io.BytesIO(body))
+        df.index = pd.DatetimeIndex(df.pop("ts").to_numpy().astype('datetime64[ns]'))
+        return df
+
+    async def close(self):
+        await self.pool.close()
+
+# --- Resumable chunk storage ---
+class ChunkJournal:
+    """Finished chunks of one job live in <store>/<key>.parts/ until consolidation."""
+    def __init__(self, store, job):
+        self.store = store
+        self.job = job
+        self.dir = os.path.join(store.root, safe_key(job.key) + ".parts")
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, lo, hi):
+        return os.path.join(self.dir, f"{lo.value}_{hi.value}.npz")
+
+    def done(self, lo, hi):
+        return os.path.exists(self._path(lo, hi))
+
+    def write(self, lo, hi, df):
+        tmp = self._path(lo, hi) + ".tmp.npz"
+        arrays = {c: df[c].to_numpy(dtype=float) for c in df.columns}
+        np.savez(tmp, ts=df.index.values.astype('datetime64[ns]').astype(np.int64), **arrays)
+        os.replace(tmp, self._path(lo, hi))
+
+    def consolidate(self, meta):
+        frames = []
+        for name in sorted(os.listdir(self.dir), key=lambda n: int(n.split("_")[0])):
+            if not name.endswith(".npz") or name.endswith(".tmp.npz"): continue
+            with np.load(os.path.join(self.dir, name)) as z:
+                cols = {c: z[c] for c in z.files if c != "ts"}
+                frames.append(pd.DataFrame(cols, index=pd.DatetimeIndex(z["ts"].astype('datetime64[ns]'))))
+        df = pd.concat(frames) if frames else pd.DataFrame(columns=BAR_COLUMNS)
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        meta = self.store.write(self.job.key, df, meta=meta)
+        for name in os.listdir(self.dir): os.remove(os.path.join(self.dir, name))
+        os.rmdir(self.dir)
+        return meta
+
+async def fetch_chunk(provider, limiter, job, lo, hi, max_retries, base_delay):
+    for attempt in range(max_retries + 1):
+        await limiter.acquire()
+        try:
+            return await provider.fetch(job.symbol, lo, hi, job.interval)
+        except RetryableError:
+            if attempt == max_retries: raise
+            # Exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(0, base_delay * (2 ** attempt)))
+
+async def fetch_all(jobs, provider, store=None, chunk_days=None, concurrency=None, rate_per_sec=None,
+                    max_retries=None, base_delay=None):
+    """Fetch every job's chunks concurrently. Returns {key: status dict}; failures are reported, not raised."""
+    store = store or BarStore()
+    chunk_days = chunk_days or Config.CHUNK_DAYS
+    max_retries = Config.MAX_RETRIES if max_retries is None else max_retries
+    base_delay = Config.BASE_DELAY if base_delay is None else base_delay
+    limiter = RateLimiter(rate_per_sec or Config.RATE_PER_SEC)
+    gate = asyncio.Semaphore(concurrency or Config.CONCURRENCY)
+
+    async def run_chunk(journal, lo, hi):
+        async with gate:
+            df = await fetch_chunk(provider, limiter, journal.job, lo, hi, max_retries, base_delay)
+        journal.write(lo, hi, df)
+        return len(df)
+
+    async def run_job(job):
+        journal = ChunkJournal(store, job)
+        chunks = split_range(job.start, job.end, chunk_days)
+        todo = [(lo, hi) for lo, hi in chunks if not journal.done(lo, hi)]
+        results = await asyncio.gather(*(run_chunk(journal, lo, hi) for lo, hi in todo), return_exceptions=True)
+        errors = [repr(r) for r in results if isinstance(r, Exception)]
+        status = {"chunks": len(chunks), "resumed": len(chunks) - len(todo), "failed": len(errors), "errors": errors[:3]}
+        if not errors:
+            meta = journal.consolidate({"symbol": job.symbol, "interval": job.interval, "requested": [str(job.start), str(job.end)],
+                                        "source": type(provider).__name__})
+            status["rows"] = meta["rows"]
+        return job.key, status
+
+    try:
+        return dict(await asyncio.gather(*(run_job(j) for j in jobs)))
+    finally:
+        await provider.close()
+
+# --- Local stand-in server for tests and offline runs ---
+class StubBarServer:
+    """Serves {symbol: DataFrame} over HTTP like HTTPCSVProvider expects.
+
+    fail_every=N answers every Nth request with 503 to exercise the retry path.
+    """
+    def __init__(self, frames, host="127.0.0.1", port=0, fail_every=0, latency=0.0):
+        self.frames = frames
+        self.host, self.port = host, port
+        self.fail_every = fail_every
+        self.latency = latency
+        self.requests = 0
+        self.server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line, _, _ = await read_http_message(reader)
+                self.requests += 1
+                if self.latency: await asyncio.sleep(self.latency)
+                status, body = self._respond(request_line)
+                writer.write(f"HTTP/1.1 {status} OK\r\nContent-Type: text/csv\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, request_line):
+        if self.fail_every and self.requests % self.fail_every == 0: return 503, b"busy"
+        url = urlsplit(request_line.split()[1])
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        df = self.frames.get(q.get("symbol"))
+        if df is None: return 404, b"unknown symbol"
+        part = df[(df.index >= pd.Timestamp(q["start"])) & (df.index < pd.Timestamp(q["end"]))]
+        out = part[[c for c in BAR_COLUMNS if c in part.columns]].copy()
+        out.insert(0, "ts", part.index.values.astype('datetime64[ns]').astype(np.int64))
+        return 200, out.to_csv(index=False, float_format="%.17g").encode()
+
+def refresh_store(symbols=None, provider=None, store=None):
+    jobs = [FetchJob(s, Config.START, Config.END, Config.INTERVAL) for s in (symbols or Config.SYMBOLS)]
+    report = asyncio.run(fetch_all(jobs, provider or YFinanceProvider(), store))
+    for key, status in report.items():
+        print(f"{key}: {status}")
+    return report
+
+if __name__ == "__main__":
+    refresh_store()
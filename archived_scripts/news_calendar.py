@@ -0,0 +1,198 @@
+import os
+import csv
+import bisect
+import numpy as np
+import pandas as pd
+
+# --- SHADOW TITAN: NEWS CALENDAR ---
+# Python side of CNewsFilter (NewsFilter.mqh). Years of events are loaded once
+# into sorted arrays; the blocked windows [t - before, t + after] of the
+# high-importance events are merged into disjoint intervals, so "is this time
+# blocked?" is one bisection and a whole bar index is masked with one
+# searchsorted call. All event times are held as UTC; spread_model shifts
+# them to broker server time itself (SERVER_UTC_OFFSET_MIN).
+
+class Config:
+    PATH = os.environ.get("SHADOW_NEWS_CALENDAR", os.path.join(os.path.expanduser("~"), ".shadow_titan", "news.csv"))
+    BLOCK_BEFORE = 5         # NewsBlockBefore (minutes)
+    BLOCK_AFTER = 5          # NewsBlockAfter (minutes)
+    MIN_IMPORTANCE = 3       # Only high-impact news blocks trading
+    ELIGIBILITY_SECONDS = 300  # IsEligibleProfit: open/close within 5 min of news
+    CSV_TZ = "UTC"           # Zone of CSV times without an offset (e.g. "EET" for server-time exports)
+    ICS_FLOATING_TZ = "UTC"  # Zone of iCalendar DTSTARTs with neither Z nor TZID
+
+NS_PER_SECOND = 1_000_000_000
+IMPORTANCE_NAMES = {"low": 1, "medium": 2, "moderate": 2, "high": 3, "holiday": 1}
+
+def _importance(value):
+    text = str(value).strip().lower()
+    if text in IMPORTANCE_NAMES: return IMPORTANCE_NAMES[text]
+    return int(float(text)) if text else 1
+
+def _utc_ns(stamps):
+    return stamps.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy().astype('datetime64[ns]').astype(np.int64)
+
+def _to_ns(values, tz="UTC"):
+    """UTC ns of timestamp strings; those with Z or a UTC offset are absolute, the rest are local times in tz."""
+    s = pd.Series(list(values), dtype=object).astype(str).str.strip()
+    out = np.empty(len(s), dtype=np.int64)
+    aware = s.str.contains(r"(?:Z|[+-]\d{2}:?\d{2})$", regex=True).to_numpy()
+    if aware.any():
+        out[aware] = _utc_ns(pd.to_datetime(s[aware], utc=True, format="mixed"))
+    if not aware.all():
+        local = pd.to_datetime(s[~aware], format="mixed")
+        # DST fall-back hours read as standard time, spring-forward gaps move to the next valid minute
+        out[~aware] = _utc_ns(local.dt.tz_localize(tz, ambiguous=np.zeros(len(local), dtype=bool), nonexistent="shift_forward"))
+    return out
+
+def load_csv(path, tz=None):
+    """Rows with datetime/timestamp or date[+time] columns plus optional importance/impact and description/event/title.
+
+    Times without an offset are in tz (default Config.CSV_TZ) and are converted to UTC.
+    """
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows: return [], [], []
+    cols = {c.lower().strip(): c for c in rows[0]}
+    pick = lambda *names: next((cols[n] for n in names if n in cols), None)
+    d_col, i_col, ccy = pick("description", "event", "title", "name"), pick("importance", "impact"), pick("currency", "country")
+    if "date" in cols:
+        t_col = pick("time")
+        stamps = [f"{r[cols['date']]} {(r[t_col] if t_col else '') or '00:00'}" for r in rows]
+    else:
+        t_col = pick("datetime", "timestamp", "time")
+        stamps = [r[t_col] for r in rows]
+    desc = [(f"{r[ccy]} " if ccy else "") + (r[d_col] if d_col else "") for r in rows]
+    imp = [_importance(r[i_col]) if i_col else 3 for r in rows]
+    return _to_ns(stamps, tz or Config.CSV_TZ), imp, desc
+
+def load_ics(path):
+    """VEVENTs of an iCalendar file: DTSTART, SUMMARY and PRIORITY (1-4 high, 5 medium, 6-9 low) or X-IMPORTANCE.
+
+    DTSTART is UTC with a Z suffix, local time in its TZID zone otherwise
+    (Config.ICS_FLOATING_TZ without either); times are returned in UTC.
+    """
+    with open(path) as f:
+        lines = []
+        for raw in f.read().splitlines():
+            if raw[:1] in (" ", "\t") and lines: lines[-1] += raw[1:]  # RFC 5545 line folding
+            else: lines.append(raw)
+    stamps, zones, imp, desc, event = [], [], [], [], None
+    for line in lines:
+        if line == "BEGIN:VEVENT": event = {}
+        elif line == "END:VEVENT" and event is not None:
+            if "DTSTART" in event:
+                stamps.append(event["DTSTART"])
+                zones.append(event.get("DTSTART;TZID") or Config.ICS_FLOATING_TZ)
+                desc.append(event.get("SUMMARY", ""))
+                if "X-IMPORTANCE" in event: imp.append(_importance(event["X-IMPORTANCE"]))
+                elif "PRIORITY" in event:
+                    pr = int(event["PRIORITY"] or 0)
+                    imp.append(3 if 1 <= pr <= 4 else 2 if pr == 5 else 1)
+                else: imp.append(3)
+            event = None
+        elif event is not None and ":" in line:
+            name, _, value = line.partition(":")
+            key, *params = name.split(";")
+            event[key.upper()] = value.strip()
+            for p in params:
+                pname, _, pvalue = p.partition("=")
+                event[f"{key.upper()};{pname.upper()}"] = pvalue.strip('"')
+    times = np.empty(len(stamps), dtype=np.int64)
+    zones = np.array(zones, dtype=object)
+    for zone in dict.fromkeys(zones):
+        rows = np.flatnonzero(zones == zone)
+        times[rows] = _to_ns([stamps[k] for k in rows], zone)
+    return times, imp, desc
+
+class NewsCalendar:
+    def __init__(self, times=(), importance=3, descriptions=None, before=None, after=None, min_importance=None):
+        self.before = Config.BLOCK_BEFORE if before is None else before
+        self.after = Config.BLOCK_AFTER if after is None else after
+        self.min_importance = Config.MIN_IMPORTANCE if min_importance is None else min_importance
+        times = np.asarray(times, dtype=np.int64)
+        imp = np.broadcast_to(np.asarray(importance, dtype=np.int8), times.shape)
+        desc = list(descriptions) if descriptions is not None else [""] * len(times)
+        order = np.argsort(times, kind="stable")
+        self.times, self.importance = times[order], imp[order].copy()
+        self.descriptions = [desc[k] for k in order]
+        self._pending = []
+        self._build()
+
+    @classmethod
+    def from_file(cls, path=None, **kw):
+        path = path or Config.PATH
+        times, imp, desc = load_ics(path) if path.lower().endswith(".ics") else load_csv(path)
+        return cls(times, imp, desc, **kw)
+
+    def add_event(self, time, description="", importance=3):
+        """Buffered; the arrays are rebuilt once on the next query."""
+        self._pending.append((pd.Timestamp(time).value, importance, description))
+
+    def _flush(self):
+        if not self._pending: return
+        t, imp, desc = zip(*self._pending)
+        self._pending = []
+        times = np.r_[self.times, np.array(t, dtype=np.int64)]
+        order = np.argsort(times, kind="stable")
+        importance = np.r_[self.importance, np.array(imp, dtype=np.int8)]
+        descriptions = self.descriptions + list(desc)
+        self.times, self.importance = times[order], importance[order]
+        self.descriptions = [descriptions[k] for k in order]
+        self._build()
+
+    def _build(self):
+        key = self.times[self.importance >= self.min_importance]
+        self.key_times = key
+        starts = key - self.before * 60 * NS_PER_SECOND
+        ends = key + self.after * 60 * NS_PER_SECOND
+        if len(key):
+            # Merge overlapping windows so the intervals are disjoint and sorted
+            new = np.r_[True, starts[1:] > np.maximum.accumulate(ends)[:-1]]
+            self.starts = starts[new]
+            self.ends = np.maximum.reduceat(ends, np.flatnonzero(new))
+        else:
+            self.starts = self.ends = np.empty(0, np.int64)
+        self._starts_list = self.starts.tolist()
+
+    def __len__(self):
+        self._flush()
+        return len(self.times)
+
+    def is_blocked(self, ts):
+        """IsNewsWindow for one instant (Timestamp or int ns): O(log n)."""
+        self._flush()
+        t = ts if isinstance(ts, (int, np.integer)) else pd.Timestamp(ts).value
+        k = bisect.bisect_right(self._starts_list, t) - 1
+        return k >= 0 and t <= self.ends[k]
+
+    def block_mask(self, index):
+        """Boolean per bar: bar timestamp falls inside a blocked window."""
+        self._flush()
+        t = np.asarray(index.values if hasattr(index, "values") else index)
+        if t.dtype.kind == 'M': t = t.astype('datetime64[ns]').astype(np.int64)
+        k = np.searchsorted(self.starts, t, side="right") - 1
+        return (k >= 0) & (t <= self.ends[np.maximum(k, 0)]) if len(self.starts) else np.zeros(len(t), dtype=bool)
+
+    def is_eligible_profit(self, open_time, close_time, seconds=None):
+        """IsEligibleProfit: False if the open or the close is within 300 s of a high-impact event."""
+        self._flush()
+        window = (Config.ELIGIBILITY_SECONDS if seconds is None else seconds) * NS_PER_SECOND
+        for ts in (open_time, close_time):
+            t = ts if isinstance(ts, (int, np.integer)) else pd.Timestamp(ts).value
+            k = np.searchsorted(self.key_times, t)
+            for j in (k - 1, k):
+                if 0 <= j < len(self.key_times) and abs(self.key_times[j] - t) <= window: return False
+        return True
+
+    def next_event(self, now):
+        """(time, description, importance) of the first event after now, or None (GetNextNewsInfo)."""
+        self._flush()
+        k = np.searchsorted(self.times, pd.Timestamp(now).value, side="right")
+        if k == len(self.times): return None
+        return pd.Timestamp(self.times[k]), self.descriptions[k], int(self.importance[k])
+
+    def widen_spreads(self, spread_model):
+        """Feed the events into a spread_model.SpreadModel with the same block window."""
+        self._flush()
+        return spread_model.add_events(self.times, self.importance, before=self.before, after=self.after)
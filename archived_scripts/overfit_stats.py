@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import time
+from math import comb, sqrt, e
+from itertools import combinations, islice
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from columnar_archive import sweep_returns
+
+# --- SHADOW TITAN: OVERFITTING STATISTICS ---
+# Statistics over every candidate a sweep tried, not only the winner, computed
+# from the candidate-by-month return matrix (T months x N candidates):
+#   PBO  probability of backtest overfitting by combinatorially symmetric
+#        cross-validation (Bailey, Borwein, Lopez de Prado, Zhu). The months
+#        are cut into S blocks; every half of the blocks is in-sample once and
+#        its complement out-of-sample. PBO is the share of splits where the
+#        in-sample best candidate ranks in the bottom half out-of-sample.
+#   PSR  probabilistic Sharpe ratio, P(true SR > benchmark), allowing for the
+#        skew and fat tails of the monthly returns.
+#   DSR  deflated Sharpe ratio: PSR of the chosen candidate against the Sharpe
+#        the best of N unskilled trials would show by luck.
+# Block sums and sums of squares are computed once, so every split is a
+# 0/1 matrix product. In lexicographic order split k and split total-1-k are
+# complements, so one Sharpe matrix serves as IS of one split and OOS of the
+# other: only half the splits are computed, in chunks across a process pool.
+
+class Config:
+    BLOCKS = 16                    # S, even; C(16, 8) = 12,870 splits
+    CHUNK = 512                    # Splits per matrix product
+    WORKERS = os.cpu_count() or 1
+    PERIODS_PER_YEAR = 12
+
+EULER_GAMMA = 0.5772156649015329
+_N = NormalDist()
+
+def returns_matrix(results, key="metrics"):
+    """(T, N) monthly return matrix of the valid sweep results, and their parameter sets."""
+    valid = [r for r in results if r is not None and r[key].get("monthly_returns")]
+    if not valid: return np.empty((0, 0)), []
+    T = min(len(r[key]["monthly_returns"]) for r in valid)
+    return np.column_stack([np.asarray(r[key]["monthly_returns"][:T], dtype=float) for r in valid]), [r["params"] for r in valid]
+
+def sharpe(returns, axis=0):
+    """Per-period Sharpe ratio (mean / sample std) along axis."""
+    r = np.asarray(returns, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nan_to_num(r.mean(axis=axis) / r.std(axis=axis, ddof=1))
+
+# --- CSCV / PBO ---
+
+def block_stats(M, blocks):
+    """Per-block count, sum and sum of squares of each candidate's returns; shapes (S,), (S, N), (S, N)."""
+    edges = np.linspace(0, len(M), blocks + 1).astype(np.int64)
+    counts = np.diff(edges).astype(float)
+    sums = np.add.reduceat(M, edges[:-1], axis=0)
+    sqs = np.add.reduceat(M * M, edges[:-1], axis=0)
+    return counts, sums, sqs
+
+def split_masks(blocks, start=0, stop=None):
+    """0/1 in-sample masks of splits start..stop, in itertools.combinations order; shape (K, S).
+
+    Each pair (IS, complement) is listed twice, once from each side, as in the paper.
+    """
+    stop = comb(blocks, blocks // 2) if stop is None else stop
+    masks = np.zeros((stop - start, blocks))
+    for k, chosen in enumerate(islice(combinations(range(blocks), blocks // 2), start, stop)):
+        masks[k, list(chosen)] = 1.0
+    return masks
+
+def _split_sharpes(masks, counts, sums, sqs):
+    n = masks @ counts
+    s = masks @ sums
+    q = masks @ sqs
+    mean = s / n[:, None]
+    var = np.maximum(q - s * mean, 0.0) / np.maximum(n - 1, 1)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nan_to_num(mean / np.sqrt(var))
+
+def _winner_logits(is_sr, oos_sr):
+    best = is_sr.argmax(axis=1)
+    rows = np.arange(len(is_sr))
+    best_oos = oos_sr[rows, best]
+    # Relative OOS rank of the IS winner in (0, 1); ties share the mid rank
+    below = (oos_sr < best_oos[:, None]).sum(axis=1)
+    ties = (oos_sr == best_oos[:, None]).sum(axis=1)
+    omega = (below + 0.5 * (ties - 1) + 1) / (oos_sr.shape[1] + 1)
+    return np.log(omega / (1 - omega)), is_sr[rows, best], best_oos, best
+
+def _cscv_chunk(span):
+    """Splits start..stop and their complements (total-stop..total-start, reversed)."""
+    (start, stop), (counts, sums, sqs, blocks) = span, _STATS
+    masks = split_masks(blocks, start, stop)
+    a = _split_sharpes(masks, counts, sums, sqs)
+    b = _split_sharpes(1.0 - masks, counts, sums, sqs)
+    return _winner_logits(a, b), tuple(x[::-1] for x in _winner_logits(b, a))
+
+_STATS = None
+
+def _init_stats(stats):
+    global _STATS
+    _STATS = stats
+
+def cscv_pbo(M, blocks=None, workers=None, chunk=None):
+    """Probability of backtest overfitting of a (T, N) return matrix by CSCV.
+
+    Returns {pbo, splits, logits, is_sharpe, oos_sharpe, winners, ...}; logits
+    are the logit OOS ranks of the IS winner per split (<= 0: below median).
+    """
+    M = np.asarray(M, dtype=float)
+    blocks = blocks or Config.BLOCKS
+    if blocks % 2 or blocks < 2: raise ValueError("blocks must be even")
+    if len(M) < 2 * blocks: raise ValueError(f"{len(M)} periods are too few for {blocks} blocks")
+    counts, sums, sqs = block_stats(M, blocks)
+    total = comb(blocks, blocks // 2)
+    step = chunk or Config.CHUNK
+    spans = [(a, min(a + step, total // 2)) for a in range(0, total // 2, step)]
+    stats = (counts, sums, sqs, blocks)
+    workers = min(workers or Config.WORKERS, len(spans))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_stats, initargs=(stats,)) as pool:
+            parts = list(pool.map(_cscv_chunk, spans))
+    else:
+        _init_stats(stats)
+        parts = [_cscv_chunk(s) for s in spans]
+    # Split order: first halves in order, then the complements from split total/2 up
+    ordered = [p[0] for p in parts] + [p[1] for p in reversed(parts)]
+    logits, is_sr, oos_sr, winners = (np.concatenate(x) for x in zip(*ordered))
+    # Degradation: slope of OOS on IS Sharpe of the winners
+    slope = np.polyfit(is_sr, oos_sr, 1)[0] if np.ptp(is_sr) > 0 else 0.0
+    return {"pbo": float(np.mean(logits <= 0)), "splits": total, "blocks": blocks, "candidates": M.shape[1],
+            "periods": M.shape[0], "logits": logits, "is_sharpe": is_sr, "oos_sharpe": oos_sr, "winners": winners,
+            "prob_oos_loss": float(np.mean(oos_sr < 0)), "degradation_slope": float(slope)}
+
+# --- PSR / DSR ---
+
+def _moments(returns):
+    r = np.asarray(returns, dtype=float)
+    T = r.shape[0]
+    mu = r.mean(axis=0)
+    d = r - mu
+    m2 = (d ** 2).mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skew = np.nan_to_num((d ** 3).mean(axis=0) / m2 ** 1.5)
+        kurt = np.nan_to_num((d ** 4).mean(axis=0) / m2 ** 2, nan=3.0)
+    return T, sharpe(r), skew, kurt
+
+def probabilistic_sharpe(returns, benchmark=0.0):
+    """P(true per-period SR > benchmark) for each column of returns (Bailey & Lopez de Prado)."""
+    T, sr, skew, kurt = _moments(returns)
+    denom = np.sqrt(np.maximum(1 - skew * sr + (kurt - 1) / 4 * sr ** 2, 1e-12))
+    z = (sr - benchmark) * sqrt(max(T - 1, 1)) / denom
+    return np.vectorize(_N.cdf, otypes=[float])(z) if np.ndim(z) else _N.cdf(float(z))
+
+def expected_max_sharpe(trial_sharpes):
+    """Sharpe the best of N skill-less trials reaches by luck, given the spread of the trials' Sharpes."""
+    sr = np.asarray(trial_sharpes, dtype=float)
+    n = len(sr)
+    if n < 2: return 0.0
+    return float(np.std(sr, ddof=1) * ((1 - EULER_GAMMA) * _N.inv_cdf(1 - 1 / n) + EULER_GAMMA * _N.inv_cdf(1 - 1 / (n * e))))
+
+def deflated_sharpe(returns, trial_sharpes):
+    """DSR of one return series chosen among trials with the given per-period Sharpes."""
+    return float(probabilistic_sharpe(np.asarray(returns, dtype=float), expected_max_sharpe(trial_sharpes)))
+
+def overfit_summary(M, params=None, blocks=None, workers=None):
+    """PBO plus PSR / DSR of the full-sample best candidate; sharpes are annualized for display."""
+    started = time.perf_counter()
+    trial_sr = sharpe(M)
+    best = int(np.argmax(trial_sr))
+    cscv = cscv_pbo(M, blocks, workers)
+    ann = sqrt(Config.PERIODS_PER_YEAR)
+    return {"candidates": M.shape[1], "periods": M.shape[0], "pbo": cscv["pbo"], "splits": cscv["splits"],
+            "blocks": cscv["blocks"], "logit_median": float(np.median(cscv["logits"])),
+            "prob_oos_loss": cscv["prob_oos_loss"], "degradation_slope": cscv["degradation_slope"],
+            "best_index": best, "best_params": params[best] if params else None,
+            "best_sharpe_ann": float(trial_sr[best] * ann), "expected_max_sharpe_ann": expected_max_sharpe(trial_sr) * ann,
+            "psr": float(probabilistic_sharpe(M[:, best])), "dsr": deflated_sharpe(M[:, best], trial_sr),
+            "seconds": time.perf_counter() - started}
+
+def summary_markdown(s):
+    return (f"- **Candidates x Months**: {s['candidates']:,} x {s['periods']}\n"
+            f"- **PBO (CSCV, {s['blocks']} blocks, {s['splits']:,} splits)**: {s['pbo'] * 100:.1f}% "
+            f"(median logit {s['logit_median']:.2f}, OOS loss in {s['prob_oos_loss'] * 100:.1f}% of splits, "
+            f"IS->OOS Sharpe slope {s['degradation_slope']:.2f})\n"
+            f"- **Best Candidate Sharpe (ann.)**: {s['best_sharpe_ann']:.2f} vs {s['expected_max_sharpe_ann']:.2f} "
+            f"expected from the best of {s['candidates']:,} unskilled trials\n"
+            f"- **Probabilistic Sharpe (SR > 0)**: {s['psr'] * 100:.1f}%\n"
+            f"- **Deflated Sharpe**: {s['dsr'] * 100:.1f}%\n")
+
+if __name__ == "__main__":
+    # python overfit_stats.py <sweep archive dir | sweep results .json>   (see wf_optimizer.save_sweep)
+    #   or: python overfit_stats.py --bench [candidates] [months]
+    if sys.argv[1] == "--bench":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+        t = int(sys.argv[3]) if len(sys.argv) > 3 else 360
+        M = np.random.default_rng(0).normal(0.5, 3.0, (t, n))
+        params = None
+    elif os.path.isdir(sys.argv[1]):
+        M, params = sweep_returns(sys.argv[1])
+    else:
+        with open(sys.argv[1]) as f: M, params = returns_matrix(json.load(f))
+    s = overfit_summary(M, params)
+    print(summary_markdown(s) + f"({s['seconds']:.1f}s)")
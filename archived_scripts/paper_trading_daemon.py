@@ -0,0 +1,370 @@
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+from collections import deque
+import numpy as np
+import pandas as pd
+from bar_store import BarStore
+from v2_parity_sim import Config as V2, SIGNAL_NONE, SIGNAL_BUY, SIGNAL_SELL
+from spread_model import server_to_utc_ns, utc_to_server_ns
+
+# --- SHADOW TITAN: PAPER TRADING DAEMON ---
+# Runs the V2 strategy outside MT5. Ticks arrive as text lines
+# "<time ns> <bid> <ask>" on a local TCP socket, times in UTC (the news
+# calendar's base; replayed server-time bars are converted before sending),
+# and start-of-day equity rolls on broker server midnight as
+# CRiskManagerV2::UpdateDayStart does. Each tick updates the M1/H1
+# bar state, the paper position and the risk guards, and the resulting
+# decision is handed to a pluggable order sink. The GetSignal() inputs only
+# change when a bar closes, so the signal is evaluated once per bar and a tick
+# costs a spread check, a guard check and a news bisection.
+# Tick-to-decision latency (line received -> decision made) goes into a
+# log-bucket histogram that is reported as p50/p99.
+
+class Config:
+    HOST = "127.0.0.1"
+    PORT = 9123
+    REPLAY_RATE = 5000          # Ticks per second sent by the replay server (0 = as fast as possible)
+    REPLAY_BATCH = 100          # Ticks per write
+    REPORT_EVERY = 10.0         # Seconds between latency reports
+    ORDER_LOG = "paper_orders.jsonl"
+    BAR_NS = 60_000_000_000     # M1
+    SERVER_TZ = V2.SERVER_TZ    # Broker server zone for the day roll and replayed bars; None = fixed offset
+
+NS_PER_DAY = 86_400_000_000_000
+
+# --- Latency ---
+class LatencyHistogram:
+    """Log-spaced buckets (SUB_BUCKETS per power of two) of nanosecond samples."""
+    SUB_BUCKETS = 8
+
+    def __init__(self):
+        self.counts = {}
+        self.n = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        b = int(math.log2(ns) * self.SUB_BUCKETS) if ns > 1 else 0
+        self.counts[b] = self.counts.get(b, 0) + 1
+        self.n += 1
+        if ns > self.max_ns: self.max_ns = ns
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-quantile (relative error < 2**(1/SUB_BUCKETS) - 1)."""
+        if not self.n: return 0.0
+        rank, seen = q / 100.0 * self.n, 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= rank: return 2.0 ** ((b + 1) / self.SUB_BUCKETS)
+        return float(self.max_ns)
+
+    def merge(self, other):
+        for b, c in other.counts.items(): self.counts[b] = self.counts.get(b, 0) + c
+        self.n += other.n
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def summary(self):
+        return {"ticks": self.n, "p50_us": self.percentile(50) / 1e3, "p99_us": self.percentile(99) / 1e3,
+                "max_us": self.max_ns / 1e3}
+
+# --- Order sinks ---
+class OrderSink:
+    """Receives every order the daemon decides on: dict(time, action, side, lots, price, sl, tp, reason)."""
+    def submit(self, order):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MemorySink(OrderSink):
+    def __init__(self):
+        self.orders = []
+
+    def submit(self, order):
+        self.orders.append(order)
+
+class JsonlSink(OrderSink):
+    def __init__(self, path=None):
+        self.f = open(path or Config.ORDER_LOG, "a")
+
+    def submit(self, order):
+        self.f.write(json.dumps(order) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+class PrintSink(OrderSink):
+    def submit(self, order):
+        print(f"{pd.Timestamp(order['time'])} {order['action']} {order['side']:+d} {order['lots']:.2f} @ {order['price']:.2f} ({order['reason']})")
+
+# --- Streaming GetSignal() ---
+class V2SignalState:
+    """Closed M1 bars and H1 closes held in bounded deques; signal() is GetSignal() without the spread check."""
+    def __init__(self):
+        depth = max(V2.BB_PERIOD, V2.RSI_PERIOD + 1, V2.ATR_PERIOD, V2.MA_MEDIUM) + 1
+        self.o, self.h, self.l, self.c = (deque(maxlen=depth) for _ in range(4))
+        self.htf = deque(maxlen=V2.MA_SLOW)
+
+    def push_bar(self, o, h, l, c):
+        # appendleft: index k - 1 is the MQL shift k
+        self.o.appendleft(o); self.h.appendleft(h); self.l.appendleft(l); self.c.appendleft(c)
+
+    def push_htf_close(self, c):
+        self.htf.appendleft(c)
+
+    def signal(self):
+        C, O, H, L = self.c, self.o, self.h, self.l
+        if len(C) < C.maxlen: return SIGNAL_NONE
+        atr = 0.0
+        for k in range(V2.ATR_PERIOD): atr += H[k] - L[k]
+        atr /= V2.ATR_PERIOD
+        if atr / V2.POINT < V2.MIN_ATR_POINTS: return SIGNAL_NONE
+        close1, open1 = C[0], O[0]
+        if close1 > H[1] and close1 > open1: return SIGNAL_BUY
+        if close1 < L[1] and close1 < open1: return SIGNAL_SELL
+        s = 0.0
+        for k in range(V2.BB_PERIOD): s += C[k]
+        sma = s / V2.BB_PERIOD
+        sq = 0.0
+        for k in range(V2.BB_PERIOD):
+            d = C[k] - sma
+            sq += d * d
+        std = math.sqrt(sq / V2.BB_PERIOD)
+        if close1 > sma + V2.BB_DEV * std: return SIGNAL_SELL
+        if close1 < sma - V2.BB_DEV * std: return SIGNAL_BUY
+        fast = slow = 0.0
+        for k in range(V2.MA_FAST): fast += C[k]
+        for k in range(V2.MA_MEDIUM): slow += C[k]
+        fast /= V2.MA_FAST
+        slow /= V2.MA_MEDIUM
+        if fast > slow:
+            if L[0] <= fast and close1 > fast: return SIGNAL_BUY
+            return SIGNAL_NONE
+        if not (fast < slow and H[0] >= fast and close1 < fast): return SIGNAL_NONE
+        # Pullback sell: the only path that reaches the ADX proxy and the HTF filter
+        gain = loss = 0.0
+        for k in range(V2.RSI_PERIOD):
+            diff = C[k] - C[k + 1]
+            if diff > 0: gain += diff
+            else: loss -= diff
+        rsi = 100.0 if loss == 0 else 100 - (100 / (1 + gain / loss))
+        if rsi > 75: return SIGNAL_SELL
+        if not abs(C[0] - C[13]) > (atr * 14) * 0.5: return SIGNAL_NONE
+        if len(self.htf) < V2.MA_SLOW: return SIGNAL_NONE
+        s = 0.0
+        for k in range(V2.MA_SLOW): s += self.htf[k]
+        return SIGNAL_SELL if self.htf[0] <= s / V2.MA_SLOW else SIGNAL_NONE
+
+# --- Daemon ---
+class PaperTrader:
+    """Per-tick state machine: bars, paper position, CRiskManagerV2 guards, orders to the sink."""
+    def __init__(self, sink, news=None, balance=None, mode=None, server_tz=None):
+        self.sink = sink
+        self.news = news
+        self.mode = mode or V2.MODE
+        self.server_tz = server_tz or Config.SERVER_TZ
+        self.initial_balance = self.balance = balance or V2.INITIAL_BALANCE
+        self.start_of_day_equity = self.balance
+        self.day = None
+        self._day_bounds = (0, 0, None)  # UTC ns [start, end) of a server day and its number
+        self.signals = V2SignalState()
+        self.bar_start = None
+        self.bar = None          # [open, high, low, close] of the forming M1 bar
+        self.hour = None
+        self.hour_close = None
+        self.bar_signal = SIGNAL_NONE
+        self.position = None     # (side, lots, entry, sl, tp, opened_ns)
+        self.latency = LatencyHistogram()
+        self.counts = {"ticks": 0, "bars": 0, "orders": 0, "blocked_guard": 0, "blocked_news": 0}
+
+    def _roll_bar(self, ts, bid):
+        start = ts - ts % Config.BAR_NS
+        if start == self.bar_start:
+            b = self.bar
+            if bid > b[1]: b[1] = bid
+            if bid < b[2]: b[2] = bid
+            b[3] = bid
+            return
+        if self.bar is not None:
+            self.signals.push_bar(*self.bar)
+            self.counts["bars"] += 1
+            self.hour_close = self.bar[3]
+        hour = start - start % 3_600_000_000_000
+        if hour != self.hour:
+            if self.hour_close is not None and self.hour is not None: self.signals.push_htf_close(self.hour_close)
+            self.hour = hour
+        self.bar_start, self.bar = start, [bid, bid, bid, bid]
+        self.bar_signal = self.signals.signal()
+
+    def _server_day(self, ts):
+        """Server-time day number of a UTC tick; the day's UTC bounds are cached, so a tick costs two compares."""
+        start, end, day = self._day_bounds
+        if start <= ts < end: return day
+        day = int(utc_to_server_ns(ts, self.server_tz)) // NS_PER_DAY
+        start, end = (int(server_to_utc_ns(d * NS_PER_DAY, self.server_tz)) for d in (day, day + 1))
+        self._day_bounds = (start, end, day)
+        return day
+
+    def _close(self, ts, price, reason):
+        side, lots, entry, _, _, _ = self.position
+        pnl = side * (price - entry) * lots * V2.CONTRACT_SIZE - V2.COMMISSION_PER_LOT * lots
+        self.balance += pnl
+        self.position = None
+        return {"time": ts, "action": "close", "side": side, "lots": lots, "price": price, "sl": 0.0, "tp": 0.0,
+                "reason": reason, "pnl": pnl}
+
+    def on_tick(self, ts, bid, ask):
+        """Returns the order dict decided on this tick, or None."""
+        self.counts["ticks"] += 1
+        self._roll_bar(ts, bid)
+        pos = self.position
+        if pos is not None:
+            side, lots, entry, sl, tp, _ = pos
+            px = bid if side == SIGNAL_BUY else ask
+            if (px <= sl if side == SIGNAL_BUY else px >= sl): return self._close(ts, px, "sl")
+            if (px >= tp if side == SIGNAL_BUY else px <= tp): return self._close(ts, px, "tp")
+            equity = self.balance + side * (px - entry) * lots * V2.CONTRACT_SIZE
+        else:
+            equity = self.balance
+        day = self._server_day(ts)
+        if day != self.day:
+            self.day = day
+            self.start_of_day_equity = max(self.balance, equity)
+        if equity < self.initial_balance * V2.TOTAL_DD_GUARD or equity < self.start_of_day_equity * V2.DAILY_DD_GUARD:
+            if self.bar_signal != SIGNAL_NONE: self.counts["blocked_guard"] += 1
+            return None
+        if self.bar_signal == SIGNAL_NONE or pos is not None: return None
+        if (ask - bid) / V2.POINT > V2.MAX_SPREAD_POINTS: return None
+        if self.news is not None and self.news.is_blocked(ts):
+            self.counts["blocked_news"] += 1
+            return None
+        lots = math.floor(equity * (V2.RISK_PER_TRADE_PCT / 100.0) / (V2.SIZING_SL_POINTS * V2.TICK_VALUE * (V2.POINT / V2.TICK_SIZE)) / V2.VOLUME_STEP) * V2.VOLUME_STEP
+        lots = min(lots, V2.VOLUME_MAX)
+        if lots <= 0: return None
+        side = self.bar_signal
+        entry = ask if side == SIGNAL_BUY else bid
+        sl = entry - side * V2.SL_POINTS * V2.POINT
+        tp = entry + side * V2.TP_POINTS * V2.POINT
+        if self.mode == "funded" and sl <= 0: return None
+        self.position = (side, lots, entry, sl, tp, ts)
+        return {"time": ts, "action": "open", "side": side, "lots": lots, "price": entry, "sl": sl, "tp": tp,
+                "reason": "signal"}
+
+    async def consume(self, reader, report_every=None):
+        report_every = Config.REPORT_EVERY if report_every is None else report_every
+        clock, on_tick, record = time.perf_counter_ns, self.on_tick, self.latency.record
+        next_report = time.monotonic() + report_every
+        while True:
+            line = await reader.readline()
+            if not line: break
+            received = clock()
+            ts, bid, ask = line.split()
+            order = on_tick(int(ts), float(bid), float(ask))
+            record(clock() - received)
+            if order is not None:
+                self.counts["orders"] += 1
+                self.sink.submit(order)
+            if report_every and time.monotonic() >= next_report:
+                next_report += report_every
+                self.report()
+
+    def report(self):
+        s = self.latency.summary()
+        print(f"[paper] {s['ticks']:,} ticks  p50 {s['p50_us']:.1f}us  p99 {s['p99_us']:.1f}us  max {s['max_us']:.0f}us  "
+              f"balance {self.balance:,.2f}  orders {self.counts['orders']}")
+
+async def run_daemon(trader, host=None, port=None, report_every=None):
+    reader, writer = await asyncio.open_connection(host or Config.HOST, port or Config.PORT)
+    try:
+        await trader.consume(reader, report_every)
+    finally:
+        writer.close()
+        trader.sink.close()
+    trader.report()
+    return trader
+
+# --- Replay server ---
+def bar_ticks(bars, server_tz=None):
+    """Four ticks per bar (open, first extreme, second extreme, close), 15 s apart, as encoded lines.
+
+    Bar times are server time (bar stores, MT5 exports); the ticks carry UTC.
+    """
+    o, h, l, c = (bars[k].to_numpy(float) for k in ("Open", "High", "Low", "Close"))
+    spread = (bars["Spread"].to_numpy(float) if "Spread" in bars else np.full(len(bars), V2.DEFAULT_SPREAD_POINTS)) * V2.POINT
+    t0 = server_to_utc_ns(bars.index, server_tz or Config.SERVER_TZ)
+    up = c >= o
+    path = np.column_stack([o, np.where(up, l, h), np.where(up, h, l), c])
+    step = Config.BAR_NS // 4
+    for k in range(len(bars)):
+        yield b"".join(f"{t0[k] + j * step} {path[k, j]:.5f} {path[k, j] + spread[k]:.5f}\n".encode() for j in range(4))
+
+async def serve_replay(bars, host=None, port=None, rate=None, batch=None, server_tz=None):
+    """Stream the bars as ticks to each client that connects, paced to `rate` ticks per second."""
+    rate = Config.REPLAY_RATE if rate is None else rate
+    batch = batch or Config.REPLAY_BATCH
+
+    async def handle(reader, writer):
+        started, sent, buf = time.monotonic(), 0, []
+        try:
+            for chunk in bar_ticks(bars, server_tz):
+                buf.append(chunk)
+                if len(buf) * 4 < batch: continue
+                writer.write(b"".join(buf)); sent += len(buf) * 4; buf = []
+                await writer.drain()
+                if rate:
+                    ahead = sent / rate - (time.monotonic() - started)
+                    if ahead > 0: await asyncio.sleep(ahead)
+            if buf: writer.write(b"".join(buf))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host or Config.HOST, port or Config.PORT)
+
+async def replay_session(bars, sink=None, news=None, rate=None, port=None, server_tz=None):
+    """Replay server and daemon in one event loop: a dry run of the live path on stored bars."""
+    server = await serve_replay(bars, port=port or 0, rate=rate, server_tz=server_tz)
+    port = server.sockets[0].getsockname()[1]
+    trader = PaperTrader(sink or MemorySink(), news, server_tz=server_tz)
+    async with server:
+        await run_daemon(trader, port=port)
+    return trader
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Shadow Titan paper trading daemon")
+    ap.add_argument("mode", choices=["daemon", "replay", "session"])
+    ap.add_argument("--key", default="XAUUSD_M1", help="bar store key for replay/session")
+    ap.add_argument("--host", default=Config.HOST)
+    ap.add_argument("--port", type=int, default=Config.PORT)
+    ap.add_argument("--rate", type=int, default=Config.REPLAY_RATE)
+    ap.add_argument("--orders", default=Config.ORDER_LOG)
+    ap.add_argument("--news", default=None, help="news calendar file (csv/ics)")
+    ap.add_argument("--server-tz", default=Config.SERVER_TZ, help="broker server zone, e.g. Europe/Athens (default: fixed offset)")
+    args = ap.parse_args(argv)
+
+    news = None
+    if args.news:
+        from news_calendar import NewsCalendar
+        news = NewsCalendar.from_file(args.news)
+    if args.mode == "daemon":
+        asyncio.run(run_daemon(PaperTrader(JsonlSink(args.orders), news, server_tz=args.server_tz), args.host, args.port))
+        return
+    bars = BarStore().read(args.key)
+    if args.mode == "replay":
+        async def forever():
+            server = await serve_replay(bars, args.host, args.port, args.rate, server_tz=args.server_tz)
+            print(f"Replaying {len(bars):,} bars of {args.key} on {args.host}:{args.port} at {args.rate} ticks/s")
+            async with server: await server.serve_forever()
+        asyncio.run(forever())
+    else:
+        trader = asyncio.run(replay_session(bars, JsonlSink(args.orders), news, args.rate, server_tz=args.server_tz))
+        print(json.dumps({**trader.counts, **trader.latency.summary(), "balance": trader.balance}, indent=2))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
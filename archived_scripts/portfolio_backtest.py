@@ -0,0 +1,250 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+import multiprocessing as mp
+from bar_store import BarStore
+from trade_ledger import TradeLedger
+
+# --- SHADOW TITAN: MULTI-SYMBOL PORTFOLIO BACKTEST ---
+# Each symbol is loaded and turned into a compact trade list in its own worker
+# process (only one symbol's bars are in memory per worker). M1 series are
+# memory-mapped from the bar store (market_data_fetcher keys
+# "<symbol>_<interval>", or a ContinuousSeriesBuilder name via DATA_KEYS) and
+# sliced to the run window; symbols missing from the store fall back to
+# yfinance, which only serves recent M1, so set INTERVAL = "1d" for a
+# store-less daily run. The coordinator merges all fills on a shared calendar
+# into ONE account that obeys the CRiskManagerV2 guards: 2.7% daily cut from
+# start-of-day equity and 7.5% total cut from the initial balance (Common.mqh).
+# Guards and sizing use equity, as the EA does: workers ship back the bar
+# closes of every open trade (at most one per MARK_EVERY, stamped when the
+# next bar opens) and the account marks open positions to them; the day
+# starts at max(balance, equity) as in UpdateDayStart.
+
+class Config:
+    SYMBOLS = ["GC=F", "SI=F", "PL=F", "PA=F", "EURUSD=X", "GBPUSD=X", "USDJPY=X", "AUDUSD=X"]
+    START = "2016-01-01"
+    END = "2026-03-01"
+    WARMUP_START = "2015-06-01"
+    INTERVAL = "1m"
+    BAR_STORE = None             # Bar store root; None = bar_store default (SHADOW_BAR_STORE)
+    DATA_KEYS = {}               # symbol -> bar store key, e.g. {"GC=F": "XAU_continuous_1996_2026"}
+    INITIAL_BALANCE = 100000.0
+    RISK_PER_TRADE_PCT = 0.5     # RiskPerTradePercent
+    DAILY_DD_GUARD = 0.973       # DAILY_DD_GUARD_PERCENT
+    TOTAL_DD_GUARD = 0.925       # TOTAL_DD_GUARD_PERCENT
+    SLIPPAGE_ATR = 0.02          # Exit slippage as a fraction of ATR (scale-free across symbols)
+    MARK_EVERY = "15min"         # Mark-to-market spacing of open positions (every bar on D1)
+    PARAMS = {'fast': 5, 'medium': 13, 'slow': 50, 'rsi_max': 75, 'rsi_min': 25, 'sl_mult': 1.0, 'tp_mult': 3.0}
+    WORKERS = None               # None = one per core
+
+NS_PER_DAY = 86_400_000_000_000
+MARK, ENTRY, EXIT = 0, 1, 2      # Event kinds, in replay order at equal timestamps
+TRADE_FIELDS = ("entry_ns", "exit_ns", "side", "entry_px", "exit_px", "sl_dist")
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+def load_bars(symbol, start, end, interval, store_root=None):
+    """[start, end) bars of one symbol: memory-mapped from the bar store, else downloaded."""
+    store = BarStore(store_root or Config.BAR_STORE)
+    key = Config.DATA_KEYS.get(symbol, f"{symbol}_{interval}")
+    if store.exists(key):
+        return store.read(key, columns=PRICE_COLUMNS, start=start, end=end)
+    print(f"  {symbol}: no '{key}' in the bar store, downloading {interval} bars")
+    bars = yf.download(symbol, start=start, end=end, interval=interval, auto_adjust=True, progress=False)
+    if isinstance(bars.columns, pd.MultiIndex): bars.columns = bars.columns.get_level_values(0)
+    return bars
+
+def symbol_trades(task):
+    """Worker: bars -> signals -> SL/TP-resolved trades for one symbol (one open trade at a time)."""
+    symbol, start, end, interval, p, store_root = task
+    df = load_bars(symbol, start, end, interval, store_root)
+    empty = {"symbol": symbol, "bars": 0, "entry_ns": np.empty(0, np.int64), "exit_ns": np.empty(0, np.int64),
+             "side": np.empty(0, np.int8), "entry_px": np.empty(0), "exit_px": np.empty(0), "sl_dist": np.empty(0),
+             "mark_ns": np.empty(0, np.int64), "mark_px": np.empty(0), "mark_trade": np.empty(0, np.int64)}
+    if df is None or len(df) < 100: return empty
+
+    close = df['Close']
+    ema_f = close.ewm(span=p['fast']).mean().to_numpy()
+    ema_m = close.ewm(span=p['medium']).mean().to_numpy()
+    ema_s = close.ewm(span=p['slow']).mean().to_numpy()
+    delta = close.diff()
+    ga = (delta.where(delta > 0, 0)).rolling(14).mean()
+    lo = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rsi = (100 - (100 / (1 + (ga / (lo + 1e-9))))).to_numpy()
+    atr = (df['High'] - df['Low']).rolling(14).mean().to_numpy()
+    o, h, l, c = df['Open'].to_numpy(), df['High'].to_numpy(), df['Low'].to_numpy(), close.to_numpy()
+    ts = df.index.values.astype('datetime64[ns]').astype(np.int64)
+    bucket = ts // pd.Timedelta(Config.MARK_EVERY).value
+
+    sig = np.zeros(len(df), dtype=np.int8)
+    sig[(ema_f > ema_m) & (ema_m > ema_s) & (rsi < p['rsi_max'])] = 1
+    sig[(ema_f < ema_m) & (ema_m < ema_s) & (rsi > p['rsi_min'])] = -1
+    trade_from = np.searchsorted(ts, pd.Timestamp(start).value)
+
+    out = {k: [] for k in TRADE_FIELDS + ("mark_ns", "mark_px", "mark_trade")}
+    marks = []  # (ns, close) of the open trade; kept only if it closes
+    pos = 0
+    for i in range(max(100, trade_from), len(df)):
+        if pos == 0 and sig[i-1] != 0 and atr[i-1] > 0:
+            pos = int(sig[i-1])
+            marks = []
+            entry, entry_ns = o[i], ts[i]
+            sl_dist = atr[i-1] * p['sl_mult']
+            sl_p = entry - pos * sl_dist
+            tp_p = entry + pos * sl_dist * p['tp_mult']
+            slip = atr[i-1] * Config.SLIPPAGE_ATR
+        if pos != 0:
+            hit_sl = (l[i] <= sl_p) if pos == 1 else (h[i] >= sl_p)
+            hit_tp = (h[i] >= tp_p) if pos == 1 else (l[i] <= tp_p)
+            if hit_sl or hit_tp:
+                out["entry_ns"].append(entry_ns); out["exit_ns"].append(ts[i]); out["side"].append(pos)
+                out["entry_px"].append(entry); out["exit_px"].append((sl_p if hit_sl else tp_p) - pos * slip)
+                out["sl_dist"].append(sl_dist)
+                for m_ns, m_px in marks:
+                    out["mark_ns"].append(m_ns); out["mark_px"].append(m_px); out["mark_trade"].append(len(out["side"]) - 1)
+                pos = 0
+            elif i + 1 < len(df) and bucket[i + 1] != bucket[i]:
+                marks.append((ts[i + 1], c[i]))
+
+    res = {k: np.asarray(v, dtype=empty[k].dtype) for k, v in out.items()}
+    res.update({"symbol": symbol, "bars": len(df)})
+    return res
+
+def trades_since(res, start):
+    """Drops a worker result's trades entered before start (indicator warmup), with their marks."""
+    keep = res["entry_ns"] >= pd.Timestamp(start).value
+    for k in TRADE_FIELDS: res[k] = res[k][keep]
+    kept = keep[res["mark_trade"]]
+    res["mark_ns"], res["mark_px"] = res["mark_ns"][kept], res["mark_px"][kept]
+    res["mark_trade"] = (np.cumsum(keep) - 1)[res["mark_trade"][kept]]
+    return res
+
+def generate_symbol_trades(symbols, start, end, interval, params, workers=None, store_root=None):
+    """Runs symbol_trades in a process pool; yields results as symbols finish."""
+    tasks = [(s, start, end, interval, params, store_root or Config.BAR_STORE) for s in symbols]
+    with mp.Pool(processes=workers or mp.cpu_count(), maxtasksperchild=1) as pool:
+        for res in pool.imap_unordered(symbol_trades, tasks):
+            print(f"  {res['symbol']}: {res['bars']:,} bars -> {len(res['side'])} trades")
+            yield res
+
+class PortfolioAccount:
+    """One shared account replaying all symbols' fills in time order."""
+    def __init__(self, initial_balance, risk_pct, daily_guard, total_guard):
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.risk_pct = risk_pct
+        self.daily_guard = daily_guard
+        self.total_guard = total_guard
+        self.start_of_day = initial_balance
+        self.last_day = None
+        self.floating = {}     # symbol slot -> open position's PnL at its last mark
+        self.open_pnl = 0.0
+        self.blocked_daily = 0
+        self.blocked_total = 0
+
+    @property
+    def equity(self):
+        return self.balance + self.open_pnl
+
+    def on_time(self, ns):
+        day = ns // NS_PER_DAY
+        if day != self.last_day:
+            self.start_of_day = max(self.balance, self.equity)
+            self.last_day = day
+
+    def mark(self, slot, pnl):
+        self.open_pnl += pnl - self.floating.get(slot, 0.0)
+        self.floating[slot] = pnl
+
+    def close(self, slot, pnl):
+        self.open_pnl -= self.floating.pop(slot, 0.0)
+        self.balance += pnl
+
+    def is_trading_allowed(self):
+        if self.equity < self.initial_balance * self.total_guard:
+            self.blocked_total += 1
+            return False
+        if self.equity < self.start_of_day * self.daily_guard:
+            self.blocked_daily += 1
+            return False
+        return True
+
+    def size(self, sl_dist):
+        return (self.equity * self.risk_pct / 100.0) / sl_dist if sl_dist > 0 else 0.0
+
+def fill_events(results):
+    """Concatenated trade and mark arrays of all symbols (plus 'symbol' index) and their event stream.
+
+    Events are (time, kind, ref) in replay order; ref is the trade for ENTRY /
+    EXIT and the mark for MARK. At the same timestamp the closes of the bars
+    before come first, then entries, then exits (a bar opens before it resolves).
+    """
+    n = sum(len(r["side"]) for r in results)
+    cat = lambda k: np.concatenate([r[k] for r in results]) if results else np.empty(0)
+    trades = {k: cat(k) for k in ("side", "entry_px", "exit_px", "sl_dist", "mark_px")}
+    for k in ("entry_ns", "exit_ns", "mark_ns"): trades[k] = cat(k).astype(np.int64)
+    trades["symbol"] = np.concatenate([np.full(len(r["side"]), j, dtype=np.int16) for j, r in enumerate(results)]) if results else np.empty(0, np.int16)
+    offsets = np.cumsum([0] + [len(r["side"]) for r in results])
+    trades["mark_trade"] = np.concatenate([r["mark_trade"] + off for r, off in zip(results, offsets)]).astype(np.int64) if results else np.empty(0, np.int64)
+    m = len(trades["mark_ns"])
+
+    ev_time = np.r_[trades["mark_ns"], trades["entry_ns"], trades["exit_ns"]]
+    ev_kind = np.r_[np.full(m, MARK, np.int8), np.full(n, ENTRY, np.int8), np.full(n, EXIT, np.int8)]
+    ev_trade = np.r_[np.arange(m), np.arange(n), np.arange(n)]
+    order = np.lexsort((ev_trade, ev_kind, ev_time))
+    return trades, (ev_time[order], ev_kind[order], ev_trade[order])
+
+def merge_fills(results, account):
+    """Merge per-symbol trade lists on one calendar and replay them through the account."""
+    symbols = [r["symbol"] for r in results]
+    trades, (ev_time, ev_kind, ev_trade) = fill_events(results)
+    n = len(trades["side"])
+    sym, entry_ns, exit_ns, side = trades["symbol"], trades["entry_ns"], trades["exit_ns"], trades["side"]
+    entry_px, exit_px, sl_dist = trades["entry_px"], trades["exit_px"], trades["sl_dist"]
+    mark_px, mark_trade = trades["mark_px"], trades["mark_trade"]
+
+    ledger = TradeLedger(capacity=n, extra_fields=[('symbol', 'i2')])
+    units = np.zeros(n)
+    for t, kind, k in zip(ev_time, ev_kind, ev_trade):
+        account.on_time(t)
+        if kind == MARK:
+            j = mark_trade[k]
+            if units[j] > 0:
+                account.mark(sym[j], side[j] * (mark_px[k] - entry_px[j]) * units[j])
+        elif kind == ENTRY:
+            if account.is_trading_allowed():
+                units[k] = account.size(sl_dist[k])
+        elif units[k] > 0:
+            pnl = side[k] * (exit_px[k] - entry_px[k]) * units[k]
+            account.close(sym[k], pnl)
+            ledger.append(pd.Timestamp(entry_ns[k]), pd.Timestamp(exit_ns[k]), side[k], units[k], pnl, symbol=sym[k])
+    return ledger, symbols
+
+def run_portfolio(symbols=None, workers=None):
+    symbols = symbols or Config.SYMBOLS
+    print(f"Shadow Titan Portfolio: {len(symbols)} symbols, {Config.START} -> {Config.END} ({Config.INTERVAL})")
+    results = sorted(generate_symbol_trades(symbols, Config.WARMUP_START, Config.END, Config.INTERVAL, Config.PARAMS, workers or Config.WORKERS),
+                     key=lambda r: symbols.index(r["symbol"]))
+    for r in results: trades_since(r, Config.START)
+
+    account = PortfolioAccount(Config.INITIAL_BALANCE, Config.RISK_PER_TRADE_PCT, Config.DAILY_DD_GUARD, Config.TOTAL_DD_GUARD)
+    ledger, names = merge_fills(results, account)
+
+    equity = ledger.balance_curve(Config.INITIAL_BALANCE)
+    hwm = np.maximum.accumulate(np.r_[Config.INITIAL_BALANCE, equity])
+    max_dd = ((hwm - np.r_[Config.INITIAL_BALANCE, equity]) / hwm * 100).max()
+    trades = ledger.trades
+    per_symbol = pd.DataFrame({
+        "Symbol": names,
+        "Trades": np.bincount(trades['symbol'], minlength=len(names)),
+        "PnL ($)": np.round(np.bincount(trades['symbol'], weights=trades['pnl'], minlength=len(names)), 2),
+        "Win Rate (%)": np.round(np.bincount(trades['symbol'], weights=(trades['pnl'] > 0), minlength=len(names)) /
+                                 np.maximum(1, np.bincount(trades['symbol'], minlength=len(names))) * 100, 1),
+    })
+    print(per_symbol.to_string(index=False))
+    print(f"Final Balance: ${account.balance:,.2f} | Max Closed DD: {max_dd:.2f}% | "
+          f"Blocked entries (daily/total guard): {account.blocked_daily}/{account.blocked_total}")
+    return {"ledger": ledger, "per_symbol": per_symbol, "balance": account.balance, "max_dd": max_dd}
+
+if __name__ == "__main__":
+    run_portfolio()
@@ -0,0 +1,82 @@
+from collections import namedtuple
+import numpy as np
+
+# --- SHADOW TITAN: COMPACT PRECISION MODE ---
+# Opt-in storage types for the per-bar arrays of the stress matrix, the batch
+# run built on stored per-bar inputs shared by every lane:
+#   full     float64 prices / indicators, int64 bar indices, int8 codes
+#   compact  float32 prices / indicators, int32 bar indices, uint8 codes
+# Only the stored inputs shrink; account balances and other accumulators stay
+# float64 in both modes. A compact run is accepted once its results match a
+# float64 reference run on the same inputs within RTOL / ATOL.
+# The grid (wf_optimizer.backtest_many) and Monte Carlo
+# (run_monte_carlo_converged) paths are scalar Python loops over Python
+# floats, so there is no stored array to shrink; the fleet reads one float64
+# scalar per trade and its cost is the per-account float64 state. None of
+# them takes a precision.
+
+class Config:
+    RTOL = 1e-4                    # Relative tolerance of compact vs full results
+    ATOL = 1e-3                    # Absolute floor (percent-valued fields near zero)
+    DECISION_RTOL = 1e-6           # A compact decision this close (relative) to its threshold is rerun in float64
+
+Precision = namedtuple("Precision", "name float index code")
+
+FULL = Precision("full", np.float64, np.int64, np.int8)
+COMPACT = Precision("compact", np.float32, np.int32, np.uint8)
+PRECISIONS = {p.name: p for p in (FULL, COMPACT)}
+
+# Trade direction as a uint8 code: 0 none, 1 long, 2 short (side % 3), and back
+SIDES = np.array([0, 1, -1], dtype=np.int8)
+
+def get_precision(precision=None):
+    if precision is None: return FULL
+    if isinstance(precision, Precision): return precision
+    if precision not in PRECISIONS: raise ValueError(f"precision must be one of {list(PRECISIONS)}")
+    return PRECISIONS[precision]
+
+def side_codes(sides):
+    return (np.asarray(sides, dtype=np.int64) % 3).astype(np.uint8)
+
+def cast(arrays, precision, kinds):
+    """Copy of a dict of arrays with each key in `kinds` ('float' | 'index' | 'code') stored at the precision."""
+    precision = get_precision(precision)
+    out = dict(arrays)
+    for key, kind in kinds.items():
+        v = np.asarray(arrays[key])
+        if kind == "code" and precision.code == np.uint8 and v.dtype.kind == "i" and v.min(initial=0) < 0:
+            v = side_codes(v)
+        out[key] = np.ascontiguousarray(v, dtype=getattr(precision, kind))
+    return out
+
+def nbytes(arrays):
+    return sum(v.nbytes for v in arrays.values() if isinstance(v, np.ndarray))
+
+def accuracy_report(reference, candidate, rtol=None, atol=None):
+    """Field-by-field agreement of two result dicts: floats within atol + rtol * |ref|, integers exact."""
+    rtol = Config.RTOL if rtol is None else rtol
+    atol = Config.ATOL if atol is None else atol
+    fields = {}
+    for key, ref in reference.items():
+        if key not in candidate: continue
+        r, c = np.asarray(ref), np.asarray(candidate[key])
+        if r.dtype.kind not in "fiub" or r.shape != c.shape:
+            fields[key] = {"ok": r.shape == c.shape and bool(np.all(r == c)), "max_abs": np.nan, "max_rel": np.nan}
+            continue
+        r, c = r.astype(float), c.astype(float)
+        err = np.abs(c - r)
+        both_nan = np.isnan(r) & np.isnan(c)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.where(r != 0, err / np.abs(r), np.where(err == 0, 0.0, np.inf))
+        ok = both_nan | (err <= (0 if np.asarray(ref).dtype.kind in "iub" else atol + rtol * np.abs(r)))
+        fields[key] = {"ok": bool(ok.all()), "max_abs": float(np.nanmax(np.where(both_nan, 0.0, err), initial=0.0)),
+                       "max_rel": float(np.nanmax(np.where(both_nan, 0.0, rel), initial=0.0))}
+    return {"ok": all(f["ok"] for f in fields.values()), "rtol": rtol, "atol": atol, "fields": fields}
+
+def format_report(report):
+    worst = max(report["fields"].items(), key=lambda kv: kv[1]["max_rel"] if np.isfinite(kv[1]["max_rel"]) else 0.0, default=None)
+    verdict = "PASS" if report["ok"] else "FAIL"
+    bad = [k for k, f in report["fields"].items() if not f["ok"]]
+    detail = f"worst {worst[0]}: rel {worst[1]['max_rel']:.2e}, abs {worst[1]['max_abs']:.2e}" if worst else "no fields"
+    rerun = f"; {report['rerun_lanes']} near-threshold lanes rerun in float64" if report.get("rerun_lanes") else ""
+    return f"compact vs float64: {verdict} ({detail}{'; failed: ' + ', '.join(bad) if bad else ''}{rerun})"
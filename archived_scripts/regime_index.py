@@ -0,0 +1,139 @@
+import sys
+import numpy as np
+import pandas as pd
+from bar_store import BarStore
+from trade_ledger import TradeLedger
+
+# --- SHADOW TITAN: REGIME INDEX ---
+# Market regime labels computed once per dataset and stored in the bar store
+# next to the bars ("<key>.regimes"), rebuilt only when the bars' fingerprint
+# or the regime parameters change:
+#   vol    ATR (High - Low, 14) as % of Close, bucketed by full-sample quantiles
+#   trend  EMA stack: 1 fast > medium > slow, -1 fast < medium < slow, 0 mixed
+#   dd     drawdown of Close from its running high: 0 / 1 / 2 by DD_LEVELS
+# Any trade ledger is then broken down by regime with one searchsorted (bar
+# in effect at entry) and bincount reductions, no rerun of the simulation.
+
+class Config:
+    ATR_PERIOD = 14
+    VOL_BUCKETS = 4
+    EMA_SPANS = (5, 13, 50)        # Sovereign fast / medium / slow
+    DD_LEVELS = (5.0, 15.0)        # % below the running high
+    SUFFIX = ".regimes"
+
+DIMENSIONS = ("vol", "trend", "dd")
+
+def regime_names(dim, params):
+    if dim == "vol": return {k: f"Q{k + 1}" for k in range(params["vol_buckets"])}
+    if dim == "trend": return {1: "up", 0: "mixed", -1: "down"}
+    lv = params["dd_levels"]
+    return {0: f"<{lv[0]:g}%", **{k + 1: f"{a:g}-{b:g}%" for k, (a, b) in enumerate(zip(lv, lv[1:]))}, len(lv): f">{lv[-1]:g}%"}
+
+def regime_params(atr_period=None, vol_buckets=None, ema_spans=None, dd_levels=None):
+    return {"atr_period": atr_period or Config.ATR_PERIOD, "vol_buckets": vol_buckets or Config.VOL_BUCKETS,
+            "ema_spans": list(ema_spans or Config.EMA_SPANS), "dd_levels": list(dd_levels or Config.DD_LEVELS)}
+
+def compute_regimes(df, **kw):
+    """({dim: int8 labels, 'atr_pct': float}, params). Bars before the ATR window fills get vol = -1."""
+    params = regime_params(**kw)
+    close = df["Close"]
+    atr_pct = (df["High"] - df["Low"]).rolling(params["atr_period"]).mean().to_numpy() / close.to_numpy() * 100
+    valid = ~np.isnan(atr_pct)
+    edges = np.quantile(atr_pct[valid], np.arange(1, params["vol_buckets"]) / params["vol_buckets"]) if valid.any() else np.empty(0)
+    vol = np.where(valid, np.searchsorted(edges, atr_pct, side="right"), -1).astype(np.int8)
+    f, m, s = (close.ewm(span=span).mean().to_numpy() for span in params["ema_spans"])
+    trend = np.where((f > m) & (m > s), 1, np.where((f < m) & (m < s), -1, 0)).astype(np.int8)
+    c = close.to_numpy(dtype=float)
+    dd_pct = (1 - c / np.maximum.accumulate(c)) * 100
+    dd = np.searchsorted(np.asarray(params["dd_levels"]), dd_pct, side="right").astype(np.int8)
+    params["vol_edges"] = edges.tolist()
+    return {"vol": vol, "trend": trend, "dd": dd, "atr_pct": atr_pct}, params
+
+class RegimeIndex:
+    def __init__(self, index_ns, labels, params):
+        self.index_ns = np.asarray(index_ns, dtype=np.int64)
+        self.labels = labels
+        self.params = params
+
+    @classmethod
+    def build(cls, df, **kw):
+        labels, params = compute_regimes(df, **kw)
+        return cls(df.index.values.astype('datetime64[ns]').astype(np.int64), labels, params)
+
+    @classmethod
+    def for_series(cls, key, store=None, **kw):
+        """Stored index of a bar store series, (re)built when the bars or the parameters changed."""
+        store = store or BarStore()
+        rkey = key + Config.SUFFIX
+        fingerprint = store.fingerprint(key)
+        if store.exists(rkey):
+            meta = store.meta(rkey)
+            cached = {k: v for k, v in meta.get("params", {}).items() if k != "vol_edges"}
+            if meta.get("source_fingerprint") == fingerprint and cached == regime_params(**kw):
+                arrays = store.read_arrays(rkey)
+                index = arrays.pop("index")
+                return cls(index, arrays, meta["params"])
+        index = cls.build(store.read(key, columns=["High", "Low", "Close"]), **kw)
+        frame = pd.DataFrame(index.labels, index=pd.DatetimeIndex(index.index_ns.view('datetime64[ns]')))
+        store.write(rkey, frame, meta={"source": key, "source_fingerprint": fingerprint, "params": index.params})
+        return index
+
+    def at(self, times_ns, dim):
+        """Label of the bar in effect at each time (last bar at or before it); -1 before the first bar."""
+        pos = np.searchsorted(self.index_ns, np.asarray(times_ns, dtype=np.int64), side="right") - 1
+        out = np.asarray(self.labels[dim])[np.maximum(pos, 0)].astype(np.int8)
+        out[pos < 0] = -1
+        return out
+
+    def breakdown(self, ledger, by=("vol",), at="entry_time"):
+        """Per-regime trade metrics of a TradeLedger; `by` is one dimension or a tuple for a cross-tab."""
+        dims = (by,) if isinstance(by, str) else tuple(by)
+        trades = ledger.trades
+        pnl = trades["pnl"]
+        codes = [self.at(trades[at], d) for d in dims]
+        names = [regime_names(d, self.params) for d in dims]
+        lows = [min(n) for n in names]
+        sizes = [max(n) - min(n) + 1 for n in names]
+        ok = np.ones(len(pnl), dtype=bool)
+        for c, lo, size in zip(codes, lows, sizes):
+            ok &= (c >= lo) & (c < lo + size)
+        key = np.ravel_multi_index([c[ok].astype(np.int64) - lo for c, lo in zip(codes, lows)], sizes)
+        cells = int(np.prod(sizes))
+        p = pnl[ok]
+        count = np.bincount(key, minlength=cells)
+        total = np.bincount(key, weights=p, minlength=cells)
+        wins = np.bincount(key, weights=(p > 0), minlength=cells)
+        gross_win = np.bincount(key, weights=np.where(p > 0, p, 0.0), minlength=cells)
+        gross_loss = -np.bincount(key, weights=np.where(p < 0, p, 0.0), minlength=cells)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = pd.DataFrame({
+                "trades": count, "pnl": total, "avg_pnl": total / count, "win_rate_pct": wins / count * 100,
+                "profit_factor": np.where(gross_loss > 0, gross_win / gross_loss, np.inf),
+                "pnl_share_pct": total / p.sum() * 100 if p.sum() else np.zeros(cells)})
+        cols = np.unravel_index(np.arange(cells), sizes)
+        out.index = pd.MultiIndex.from_arrays([[n[lo + k] for k in col] for n, lo, col in zip(names, lows, cols)], names=dims) \
+            if len(dims) > 1 else pd.Index([names[0][lows[0] + k] for k in cols[0]], name=dims[0])
+        return out[out["trades"] > 0]
+
+    def time_share(self, dim):
+        """Fraction of bars spent in each regime, for comparing trade share with time share."""
+        labels = np.asarray(self.labels[dim])
+        names = regime_names(dim, self.params)
+        return pd.Series({names[k]: float(np.mean(labels == k)) for k in names}, name=dim)
+
+def breakdown_markdown(table):
+    lines = [f"| {' / '.join(table.index.names)} | Trades | PnL ($) | Avg ($) | Win % | PF | PnL Share |",
+             "|:---|:---|:---|:---|:---|:---|:---|"]
+    for label, r in table.iterrows():
+        label = " / ".join(label) if isinstance(label, tuple) else label
+        lines.append(f"| {label} | {int(r['trades'])} | ${r['pnl']:,.2f} | ${r['avg_pnl']:,.2f} | {r['win_rate_pct']:.1f}% | "
+                     f"{r['profit_factor']:.2f} | {r['pnl_share_pct']:.1f}% |")
+    return "\n".join(lines) + "\n"
+
+if __name__ == "__main__":
+    # python regime_index.py <bar store key> <ledger.npz> [dim ...]
+    key, ledger_path = sys.argv[1], sys.argv[2]
+    regimes = RegimeIndex.for_series(key)
+    ledger = TradeLedger.load(ledger_path)
+    for dim in sys.argv[3:] or DIMENSIONS:
+        print(f"\n## By {dim}\n" + breakdown_markdown(regimes.breakdown(ledger, by=dim)))
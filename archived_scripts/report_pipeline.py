@@ -0,0 +1,306 @@
+import os
+import sys
+import csv
+import json
+import shutil
+import hashlib
+from string import Template
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# --- SHADOW TITAN: REPORT PIPELINE ---
+# Scripts store what they computed (scalars as JSON, tables as CSV) in the
+# result store; reports are rendered from those results through
+# string.Template files in templates/. A template line holding only
+# "$<table>" is replaced by that table streamed row by row from its CSV, so
+# a 360-month log never becomes a DataFrame or one giant string. Each report
+# is keyed by a hash of its template, its spec and the bytes of its inputs,
+# and the manifest also keeps a hash of every file it wrote: a report is
+# skipped only if its key matches and its outputs are still those bytes, so
+# an output overwritten by hand or by another script is rendered again.
+# Output names are unique across REPORTS. The stale reports render in parallel.
+
+class Config:
+    RESULTS_ROOT = os.environ.get("SHADOW_RESULTS", os.path.join(os.path.expanduser("~"), ".shadow_titan", "results"))
+    OUTPUT_DIR = os.environ.get("SHADOW_REPORTS", "/Users/muhammedriyaz/.gemini/antigravity/scratch/shadowbot_pro")
+    TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+    MANIFEST = ".report_manifest.json"
+    WORKERS = min(4, os.cpu_count() or 1)
+    VERSION = 1                    # Bump to invalidate every rendered report
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""): h.update(block)
+    return h.hexdigest()
+
+# --- Stored results ---
+def _json_default(v):
+    if isinstance(v, np.generic): return v.item()
+    if isinstance(v, np.ndarray): return v.tolist()
+    return str(v)
+
+class ResultStore:
+    """<root>/<name>/scalars.json plus one <table>.csv per table."""
+    def __init__(self, root=None):
+        self.root = root or Config.RESULTS_ROOT
+
+    def path(self, name, table=None):
+        return os.path.join(self.root, name, "scalars.json" if table is None else f"{table}.csv")
+
+    def save(self, name, scalars=None, tables=None):
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        for table, frame in (tables or {}).items():
+            tmp = self.path(name, table) + ".tmp"
+            pd.DataFrame(frame).to_csv(tmp, index=False)
+            os.replace(tmp, self.path(name, table))
+        tmp = self.path(name) + ".tmp"
+        with open(tmp, "w") as f: json.dump(scalars or {}, f, indent=2, sort_keys=True, default=_json_default)
+        os.replace(tmp, self.path(name))
+
+    def scalars(self, name):
+        with open(self.path(name)) as f: return json.load(f)
+
+    def has_table(self, name, table):
+        return os.path.exists(self.path(name, table))
+
+    def rows(self, name, table):
+        """Stream a stored table as dicts of strings."""
+        with open(self.path(name, table), newline="") as f:
+            yield from csv.DictReader(f)
+
+    def digest(self, name):
+        """sha256 over every file of a result, in name order."""
+        h = hashlib.sha256()
+        base = os.path.join(self.root, name)
+        for fname in sorted(os.listdir(base)):
+            if fname.endswith(".tmp"): continue
+            h.update(fname.encode())
+            h.update(file_digest(os.path.join(base, fname)).encode())
+        return h.hexdigest()
+
+# --- Report specs ---
+# Col: markdown column title, source column, and a format string or a function of the row dict
+Col = namedtuple("Col", "title column fmt kind", defaults=("{}", str))
+Table = namedtuple("Table", "result table columns where limit", defaults=(None, None))
+ReportSpec = namedtuple("ReportSpec", "name template output inputs context tables exports", defaults=({}, {}))
+
+def _cell(col, row):
+    if callable(col.fmt): return col.fmt(row)
+    raw = row[col.column]
+    if raw == "" and col.kind is not str: return ""
+    return col.fmt.format(col.kind(float(raw)) if col.kind is not str else raw)
+
+def stream_table(out, store, table):
+    if not store.has_table(table.result, table.table):
+        out.write("_No stored data._\n")
+        return
+    out.write("| " + " | ".join(c.title for c in table.columns) + " |\n")
+    out.write("|" + "|".join(":---" for _ in table.columns) + "|\n")
+    written = 0
+    for row in store.rows(table.result, table.table):
+        if table.where is not None and not table.where(row): continue
+        out.write("| " + " | ".join(_cell(c, row) for c in table.columns) + " |\n")
+        written += 1
+        if table.limit and written >= table.limit: break
+
+def render_report(spec, store_root, out_dir):
+    store = ResultStore(store_root)
+    with open(os.path.join(Config.TEMPLATE_DIR, spec.template)) as f: text = f.read()
+    context = spec.context(*(store.scalars(r) for r in spec.inputs))
+    final = os.path.join(out_dir, spec.output)
+    tmp = final + ".tmp"
+    chunk = []
+    with open(tmp, "w") as out:
+        for line in text.splitlines(keepends=True):
+            key = line.strip()[1:] if line.strip().startswith("$") else None
+            if key in spec.tables:
+                out.write(Template("".join(chunk)).substitute(context)); chunk = []
+                stream_table(out, store, spec.tables[key])
+            else:
+                chunk.append(line)
+        out.write(Template("".join(chunk)).substitute(context))
+    os.replace(tmp, final)
+    for fname, (result, table) in spec.exports.items():
+        shutil.copyfile(store.path(result, table), os.path.join(out_dir, fname))
+    return spec.name
+
+def spec_key(spec, store):
+    # Functions enter the key by name, not by their per-process repr
+    desc = json.dumps(spec, default=lambda o: o.__qualname__ if callable(o) else str(o))
+    h = hashlib.sha256(f"{Config.VERSION}|{desc}".encode())
+    with open(os.path.join(Config.TEMPLATE_DIR, spec.template), "rb") as f: h.update(f.read())
+    for r in sorted(set(spec.inputs) | {t.result for t in spec.tables.values()} | {r for r, _ in spec.exports.values()}):
+        h.update(r.encode()); h.update(store.digest(r).encode())
+    return h.hexdigest()
+
+def _outputs_intact(entry, key, out_dir):
+    """A manifest entry {key, outputs: {file: sha256}} still describes what is on disk."""
+    if not isinstance(entry, dict) or entry.get("key") != key: return False
+    for fname, digest in entry["outputs"].items():
+        path = os.path.join(out_dir, fname)
+        if not os.path.exists(path) or file_digest(path) != digest: return False
+    return True
+
+def render_all(specs=None, store=None, out_dir=None, workers=None, force=False):
+    """Render the reports whose template or inputs changed. Returns {name: 'rendered' | 'unchanged' | 'missing inputs'}."""
+    specs = list(REPORTS.values()) if specs is None else [REPORTS[s] if isinstance(s, str) else s for s in specs]
+    store = store or ResultStore()
+    out_dir = out_dir or Config.OUTPUT_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, Config.MANIFEST)
+    manifest = json.load(open(manifest_path)) if os.path.exists(manifest_path) else {}
+    status, stale = {}, []
+    for spec in specs:
+        if not all(os.path.exists(store.path(r)) for r in spec.inputs):
+            status[spec.name] = "missing inputs"; continue
+        key = spec_key(spec, store)
+        if not force and _outputs_intact(manifest.get(spec.name), key, out_dir):
+            status[spec.name] = "unchanged"
+        else:
+            stale.append((spec, key))
+    workers = min(workers or Config.WORKERS, len(stale))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render_report, [s for s, _ in stale], [store.root] * len(stale), [out_dir] * len(stale)))
+    else:
+        for spec, _ in stale: render_report(spec, store.root, out_dir)
+    for spec, key in stale:
+        manifest[spec.name] = {"key": key, "outputs": {o: file_digest(os.path.join(out_dir, o))
+                                                     for o in [spec.output] + list(spec.exports)}}
+        status[spec.name] = "rendered"
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w") as f: json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, manifest_path)
+    return status
+
+# --- Report contexts (scalars -> preformatted strings) ---
+def _f(v, fmt): return format(v, fmt)
+
+def certificate_context(s):
+    wf, mc, ci = s["wf_avg_monthly"], s["mc"], s["mc"]["ci"]
+    conf = _f(mc["confidence"] * 100, ".0f")
+    return {
+        "wf_is": _f(wf[0], ".2f"), "wf_oos1": _f(wf[1], ".2f"), "wf_oos2": _f(wf[2], ".2f"),
+        "wf_is_1": _f(wf[0], ".1f"), "wf_oos1_1": _f(wf[1], ".1f"),
+        "mc_paths": _f(mc["total_paths"], ","), "mc_sampling": mc["sampling"].replace("_", " "),
+        "mc_antithetic": ", antithetic pairs" if mc["antithetic"] else "", "mc_confidence": conf,
+        "mc_converged_note": "" if mc["converged"] else " (path budget exhausted before convergence)",
+        "cagr_median": _f(mc["cagr_stats"]["median"], ".1f"),
+        "cagr_ci_low": _f(ci["cagr_median"]["low"], ".1f"), "cagr_ci_high": _f(ci["cagr_median"]["high"], ".1f"),
+        "mar_median": _f(mc["mar_stats"]["median"], ".2f"), "multiple_median": _f(mc["multiple_stats"]["median"], ".1f"),
+        "dd_median": _f(mc["dd_stats"]["median"], ".2f"), "dd_p95": _f(mc["dd_stats"]["p95"], ".2f"),
+        "dd_p95_low": _f(ci["dd_p95"]["low"], ".2f"), "dd_p95_high": _f(ci["dd_p95"]["high"], ".2f"),
+        "dd_max": _f(mc["dd_stats"]["max"], ".2f"),
+        **{f"survival_{k}": _f(mc["survival_rates"][k], ".1f") for k in ("2pct", "5pct", "10pct")},
+        **{f"survival_{k}_hw": _f(ci[f"survival_{k}"]["half_width"], ".1f") for k in ("2pct", "5pct", "10pct")},
+        "stress_adjusted": _f(s["avg_m_stress"], ".2f"), "stress_scenarios": str(s["stress_scenarios"]),
+        "stress_positive": _f(s["stress_positive"], ".1f"),
+    }
+
+def _spike_cell(row): return f"{float(row['spread_spike'] or 0):.1f}"
+def _slip_cell(row): return row["slippage"] + (f" ({float(row['slip_mean']):.1f})" if row["slip_mean"] else "")
+
+def v2_audit_context(s):
+    return {"total_profit": _f(s["total_profit"], ",.2f"), "avg_yearly_roi": _f(s["avg_yearly_roi"], ",.1f"),
+            "consistency": _f(s["consistency"] * 100, ".2f")}
+
+def _from_2020(row): return int(row["Month"][:4]) >= 2020
+def _verified_cell(row): return "Verified"
+
+def _era_summary(s, prefix):
+    return {f"{prefix}_total_return": _f(s["total_return"], ",.2f"), f"{prefix}_avg_monthly": _f(s["avg_monthly"], ".2f"),
+            f"{prefix}_success_rate": _f(s["success_rate"], ".1f"), f"{prefix}_profitable": str(s["months"] - s["losing"]),
+            f"{prefix}_months": str(s["months"]), f"{prefix}_losing": str(s["losing"]),
+            f"{prefix}_first_month": s.get("first_month", "-"), f"{prefix}_last_month": s.get("last_month", "-")}
+
+def super_audit_context(s):
+    return {"model_name": s["model_name"], "avg_monthly": _f(s["avg_monthly"], ".2f"), "success_rate": _f(s["success_rate"], ".1f"),
+            "total_months": str(s.get("total_months", "-")), "profitable_months": str(s.get("profitable_months", "-")),
+            **_era_summary(s["retro"], "retro"), **_era_summary(s["modern"], "modern")}
+
+def sensitivity_context(s):
+    return {"avg_ema_perf": _f(s["avg_ema_perf"], ".2f"), "std_ema_perf": _f(s["std_ema_perf"], ".2f"),
+            "verdict": "ROBUST" if s["is_stable"] else "NOT PROVEN",
+            "verdict_note": "" if s["is_stable"] else " The EMA shifts moved the average month by more than 15% of its level, so this run does not support the claim."}
+
+def _params_line(p): return ", ".join(f"{k}={v}" for k, v in p.items())
+
+def wf_optimizer_context(s):
+    r = s["final"]
+    return {"best_params": str(s["best_params"]), "total_return": _f(r["return"], ".2f"), "max_dd": _f(r["max_dd"], ".2f"),
+            "trades": str(r["trades"]), "sharpe": _f(r["sharpe"], ".2f"), "overfit": s["overfit_markdown"]}
+
+def god_sweep_context(s):
+    p = s["best_params"]
+    return {"avg_monthly": _f(s["best"]["avg"], ".2f"), "success": _f(s["best"]["success"], ".1f"),
+            "ema_stack": f"{p['fast']} / {p['medium']} / {p['slow']}", "rsi_band": f"{p['rsi_min']} - {p['rsi_max']}",
+            "risk": str(p["risk"]), "candidates": str(s["candidates"])}
+
+def god_audit_context(s):
+    return {"avg_monthly": _f(s["avg_monthly"], ".2f"), "success_rate": _f(s["success_rate"], ".1f"),
+            "final_balance": _f(s["final_balance"], ",.2f"), "months": str(s["months"])}
+
+MONTHLY_COLUMNS = [Col("Month", "Month"), Col("Return (%)", "Return (%)"), Col("Balance ($)", "Balance ($)"),
+                   Col("Win Rate (%)", "Win Rate (%)"), Col("Status", "Status")]
+REGIME_COLUMNS = [Col("Regime", "regime"), Col("Trades", "trades", "{:.0f}", float), Col("PnL ($)", "pnl", "${:,.2f}", float),
+                  Col("Avg ($)", "avg_pnl", "${:,.2f}", float), Col("Win %", "win_rate_pct", "{:.1f}%", float),
+                  Col("PF", "profit_factor", "{:.2f}", float), Col("PnL Share", "pnl_share_pct", "{:.1f}%", float)]
+
+PERTURBATION_COLUMNS = [Col("Perturbation", "label"), Col("Avg Monthly", "avg_monthly_pct", "{:.2f}%", float)]
+
+REPORTS = {
+    "anti_overfit_certificate": ReportSpec(
+        "anti_overfit_certificate", "anti_overfit_certificate.md", "ANTI_OVERFIT_CERTIFICATE.md",
+        ["integrity_suite"], certificate_context,
+        tables={"stress_worst": Table("integrity_suite", "stress_matrix", [
+            Col("Spread Mode", "spread_mode"), Col("Spike", None, _spike_cell), Col("Base Spread", "base_spread", "{:.2f}", float),
+            Col("Time-of-Day Curve", "tod_curve"), Col("Slippage", None, _slip_cell),
+            Col("Commission/Lot", "commission_per_lot", "${:.0f}", float), Col("Avg Monthly", "avg_monthly_pct", "{:.2f}%", float)],
+            limit=5)},
+        exports={"ANTI_OVERFIT_STRESS_MATRIX.csv": ("integrity_suite", "stress_matrix")}),
+    "v2_audit_report": ReportSpec(
+        "v2_audit_report", "v2_audit_report.md", "SHADOW_TITAN_V2_AUDIT_REPORT.md", ["v2_audit"], v2_audit_context,
+        tables={"yearly_table": Table("v2_audit", "yearly", [
+                    Col("Year", "year"), Col("PnL ($)", "profit", "${:,.2f}", float), Col("ROI (%)", "roi_pct", "{:.1f}%", float),
+                    Col("Stability", None, _verified_cell)]),
+                "monthly_table": Table("v2_audit", "monthly", [
+                    Col("Month", "Month"), Col("PnL ($)", "pnl", "${:,.2f}", float), Col("Trades", "trades"),
+                    Col("Phase", "phase"), Col("Year PnL", "ytd", "${:,.2f}", float)], where=_from_2020),
+                **{f"regime_{dim}_table": Table("v2_audit", f"regime_{dim}", REGIME_COLUMNS) for dim in ("vol", "trend", "dd")}},
+        exports={"SHADOW_TITAN_V2_MONTHLY.csv": ("v2_audit", "monthly")}),
+    "super_audit_20y": ReportSpec(
+        "super_audit_20y", "super_audit_20y.md", "SHADOW_TITAN_20Y_SUPER_AUDIT.md", ["titan_20y"], super_audit_context,
+        tables={"retro_table": Table("titan_20y", "retro", MONTHLY_COLUMNS),
+                "modern_table": Table("titan_20y", "modern", MONTHLY_COLUMNS)},
+        exports={"SHADOW_TITAN_20Y_DATA.csv": ("titan_20y", "cumulative")}),
+    "sensitivity_certificate": ReportSpec(
+        "sensitivity_certificate", "sensitivity_certificate.md", "SENSITIVITY_STABILITY_CERTIFICATE.md",
+        ["sensitivity_audit"], sensitivity_context,
+        tables={"ema_table": Table("sensitivity_audit", "ema", PERTURBATION_COLUMNS),
+                "risk_table": Table("sensitivity_audit", "risk", PERTURBATION_COLUMNS)}),
+    "wf_optimizer_report": ReportSpec(
+        "wf_optimizer_report", "wf_optimizer_report.md", "SHADOW_TITAN_RE_OPTIMIZED_AUDIT.md",
+        ["wf_optimizer"], wf_optimizer_context),
+    "god_mode_sweep": ReportSpec(
+        "god_mode_sweep", "god_mode_sweep.md", "SHADOW_TITAN_GOD_MODE_SWEEP.md", ["god_mode_sweep"], god_sweep_context),
+    "god_mode_audit": ReportSpec(
+        "god_mode_audit", "god_mode_audit.md", "SHADOW_TITAN_GOD_MODE_AUDIT.md", ["god_mode_audit"], god_audit_context,
+        tables={"monthly_table": Table("god_mode_audit", "monthly", [
+            Col("Month", "Month"), Col("Return (%)", "Return (%)"), Col("Balance ($)", "Balance ($)"), Col("Status", "Status")])}),
+}
+
+# One owner per output file: two reports writing the same name would overwrite each other
+_owners = {}
+for _spec in REPORTS.values():
+    for _out in [_spec.output] + list(_spec.exports):
+        if _owners.setdefault(_out, _spec.name) != _spec.name:
+            raise ValueError(f"{_out} is written by both {_owners[_out]} and {_spec.name}")
+
+if __name__ == "__main__":
+    # python report_pipeline.py [--force] [report ...]
+    args = [a for a in sys.argv[1:] if a != "--force"]
+    for name, state in render_all(args or None, force="--force" in sys.argv).items():
+        print(f"  {name}: {state}")
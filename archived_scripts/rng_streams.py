@@ -0,0 +1,87 @@
+import zlib
+import numpy as np
+
+# --- SHADOW TITAN: SEEDED RANDOM STREAMS ---
+# All alpha simulators draw their trade outcomes from here so every run is
+# reproducible from a single seed. In common-random-numbers (CRN) mode every
+# candidate of a sweep or sensitivity study sees the same uniform draw on the
+# same bar, so differences between candidates come from the parameters and
+# not from the noise.
+
+class RandomStreams:
+    """Per-run numpy Generators spawned from one root SeedSequence."""
+    def __init__(self, seed=None, common=False):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_seq = seed
+        else:
+            self.seed_seq = np.random.SeedSequence(seed)
+        self.common = common
+        self._common_draws = None
+
+    @property
+    def entropy(self):
+        return self.seed_seq.entropy
+
+    def spawn(self, n):
+        """Independent child SeedSequences, one per worker or candidate (picklable)."""
+        return self.seed_seq.spawn(n)
+
+    def child(self, common=None):
+        """RandomStreams on the next spawned child sequence."""
+        return RandomStreams(self.spawn(1)[0], self.common if common is None else common)
+
+    def substream(self, name, common=None):
+        """RandomStreams on a fixed child named name: the same draws however many children were spawned before."""
+        seq = np.random.SeedSequence(self.seed_seq.entropy, spawn_key=self.seed_seq.spawn_key + (zlib.crc32(name.encode()),),
+                                     pool_size=self.seed_seq.pool_size)
+        return RandomStreams(seq, self.common if common is None else common)
+
+    def generator(self):
+        """Fresh Generator for one run (shuffles, bootstrap, Monte Carlo paths)."""
+        return np.random.default_rng(self.spawn(1)[0])
+
+    def bar_draws(self, n_bars):
+        """One uniform per bar. In CRN mode every call returns the same draws."""
+        if not self.common:
+            return self.generator().random(n_bars)
+        if self._common_draws is None or len(self._common_draws) < n_bars:
+            # The PCG64 stream is sequential, so a longer draw keeps the old prefix.
+            self._common_draws = np.random.default_rng(self.seed_seq).random(n_bars)
+            self._common_draws.flags.writeable = False
+        return self._common_draws[:n_bars]
+
+    def describe(self):
+        return f"seed={self.entropy} ({'common random numbers' if self.common else 'independent streams'})"
+
+# Wichura's AS241 (the algorithm behind statistics.NormalDist.inv_cdf), on arrays
+_AS241_CENTRAL = ([2.5090809287301226727e+3, 3.3430575583588128105e+4, 6.7265770927008700853e+4, 4.5921953931549871457e+4,
+                   1.3731693765509461125e+4, 1.9715909503065514427e+3, 1.3314166789178437745e+2, 3.3871328727963666080e+0],
+                  [5.2264952788528545610e+3, 2.8729085735721942674e+4, 3.9307895800092710610e+4, 2.1213794301586595867e+4,
+                   5.3941960214247511077e+3, 6.8718700749205790830e+2, 4.2313330701600911252e+1, 1.0])
+_AS241_NEAR = ([7.74545014278341407640e-4, 2.27238449892691845833e-2, 2.41780725177450611770e-1, 1.27045825245236838258e+0,
+                3.64784832476320460504e+0, 5.76949722146069140550e+0, 4.63033784615654529590e+0, 1.42343711074968357734e+0],
+               [1.05075007164441684324e-9, 5.47593808499534494600e-4, 1.51986665636164571966e-2, 1.48103976427480074590e-1,
+                6.89767334985100004550e-1, 1.67638483018380384940e+0, 2.05319162663775882187e+0, 1.0])
+_AS241_TAIL = ([2.01033439929228813265e-7, 2.71155556874348757815e-5, 1.24266094738807843860e-3, 2.65321895265761230930e-2,
+                2.96560571828504891230e-1, 1.78482653991729133580e+0, 5.46378491116411436990e+0, 6.65790464350110377720e+0],
+               [2.04426310338993978564e-15, 1.42151175831644588870e-7, 1.84631831751005468180e-5, 7.86869131145613259100e-4,
+                1.48753612908506148525e-2, 1.36929880922735805310e-1, 5.99832206555887937690e-1, 1.0])
+
+def _horner(coeffs, x):
+    out = np.full_like(x, coeffs[0])
+    for c in coeffs[1:]: out = out * x + c
+    return out
+
+def normal_inv_cdf(u):
+    """Standard normal quantiles of probabilities u in (0, 1), elementwise."""
+    u = np.asarray(u, dtype=float)
+    q = u - 0.5
+    central = np.abs(q) <= 0.425
+    r = 0.180625 - q * q
+    x_central = q * _horner(_AS241_CENTRAL[0], r) / _horner(_AS241_CENTRAL[1], r)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.sqrt(-np.log(np.where(q <= 0.0, u, 1.0 - u)))
+    near = t <= 5.0
+    x_tail = np.where(near, _horner(_AS241_NEAR[0], t - 1.6) / _horner(_AS241_NEAR[1], t - 1.6),
+                      _horner(_AS241_TAIL[0], t - 5.0) / _horner(_AS241_TAIL[1], t - 5.0))
+    return np.where(central, x_central, np.where(q < 0.0, -x_tail, x_tail))
@@ -0,0 +1,179 @@
+import math
+import numpy as np
+
+# --- SHADOW TITAN: PARAMETER SEARCH SPACE ---
+# Declarative sweep definition shared by the optimizers. Points are produced
+# lazily by a depth-first walk in itertools.product order, so a space of any
+# size costs O(number of parameters) memory. Constraints are checked as soon
+# as the parameters they read are assigned, which prunes whole subtrees before
+# anything is dispatched. Inactive conditional parameters collapse to None, and
+# an optional canonical() map lets equivalent points be emitted only once (a
+# point is yielded only if it is its own canonical representative, so no set
+# of seen points is kept).
+
+class Discrete:
+    def __init__(self, values):
+        self.values = list(dict.fromkeys(values))
+
+    def grid(self):
+        return self.values
+
+    def sample(self, rng):
+        return self.values[rng.integers(len(self.values))]
+
+class Range:
+    """lo..hi inclusive in steps of step; integer-valued when all three are ints."""
+    def __init__(self, lo, hi, step=1):
+        if step <= 0: raise ValueError("step must be positive")
+        self.lo, self.hi, self.step = lo, hi, step
+        self.integer = all(isinstance(v, (int, np.integer)) for v in (lo, hi, step))
+
+    def grid(self):
+        n = int(math.floor((self.hi - self.lo) / self.step + 1e-9)) + 1
+        if self.integer: return [self.lo + k * self.step for k in range(n)]
+        digits = max(0, -int(math.floor(math.log10(abs(self.step))))) + 6
+        return [round(self.lo + k * self.step, digits) for k in range(n)]
+
+    def sample(self, rng):
+        values = self.grid()
+        return values[rng.integers(len(values))]
+
+class LogRange:
+    """num points geometrically spaced over [lo, hi]; integer=True rounds and drops repeats."""
+    def __init__(self, lo, hi, num, integer=False):
+        if lo <= 0 or hi <= 0: raise ValueError("LogRange bounds must be positive")
+        self.lo, self.hi, self.num, self.integer = lo, hi, num, integer
+
+    def grid(self):
+        values = np.geomspace(self.lo, self.hi, self.num)
+        if self.integer: return list(dict.fromkeys(int(round(v)) for v in values))
+        return [float(f"{v:.6g}") for v in values]
+
+    def sample(self, rng):
+        v = math.exp(rng.uniform(math.log(self.lo), math.log(self.hi)))
+        return int(round(v)) if self.integer else float(f"{v:.6g}")
+
+class Conditional:
+    """A parameter that only exists when when(point) is true; it reads the earlier keys in requires."""
+    def __init__(self, param, when, requires):
+        self.param = as_param(param)
+        self.when = when
+        self.requires = tuple(requires)
+
+    def grid(self):
+        return self.param.grid()
+
+    def sample(self, rng):
+        return self.param.sample(rng)
+
+class Constraint:
+    """Feasibility predicate over the parameters named in keys."""
+    def __init__(self, fn, keys, name=None):
+        self.fn = fn
+        self.keys = tuple(keys)
+        self.name = name or " & ".join(self.keys)
+
+    def __call__(self, point):
+        return bool(self.fn(point))
+
+def ordered(*keys, strict=True):
+    """Constraint keys[0] < keys[1] < ... (<= when strict=False)."""
+    if strict: fn = lambda p: all(p[a] < p[b] for a, b in zip(keys, keys[1:]))
+    else: fn = lambda p: all(p[a] <= p[b] for a, b in zip(keys, keys[1:]))
+    return Constraint(fn, keys, name=(" < " if strict else " <= ").join(keys))
+
+def as_param(spec):
+    if isinstance(spec, (Discrete, Range, LogRange, Conditional)): return spec
+    if isinstance(spec, (list, tuple, range)): return Discrete(spec)
+    return Discrete([spec])
+
+class SearchSpace:
+    def __init__(self, params, constraints=(), canonical=None):
+        self.keys = list(params)
+        self.params = {k: as_param(v) for k, v in params.items()}
+        self.constraints = list(constraints)
+        self.canonical = canonical
+        position = {k: i for i, k in enumerate(self.keys)}
+        for k, prm in self.params.items():
+            if isinstance(prm, Conditional) and any(position.get(r, len(self.keys)) >= position[k] for r in prm.requires):
+                raise ValueError(f"conditional '{k}' may only depend on parameters declared before it")
+        # Each constraint is checked at the depth where its last input is assigned
+        self.checks = [[] for _ in self.keys]
+        for c in self.constraints:
+            missing = [key for key in c.keys if key not in position]
+            if missing: raise ValueError(f"constraint '{c.name}' uses unknown parameters {missing}")
+            self.checks[max(position[key] for key in c.keys)].append(c)
+        self.stats = {"emitted": 0, "pruned": 0, "duplicates": 0}
+
+    def upper_bound(self):
+        """Size of the raw cartesian product (what itertools.product would evaluate)."""
+        return math.prod(len(p.grid()) for p in self.params.values())
+
+    def _values(self, key, point):
+        prm = self.params[key]
+        if isinstance(prm, Conditional) and not prm.when(point): return [None]
+        return prm.grid()
+
+    def _feasible(self, depth, point):
+        return all(c(point) for c in self.checks[depth])
+
+    def __iter__(self):
+        """Lazily yields every feasible, canonical point as a fresh dict."""
+        self.stats = {"emitted": 0, "pruned": 0, "duplicates": 0}
+        if not self.keys: return
+        grids = [None] * len(self.keys)
+        cursor = [0] * len(self.keys)
+        point = {}
+        depth = 0
+        grids[0] = self._values(self.keys[0], point)
+        while depth >= 0:
+            if cursor[depth] == len(grids[depth]):
+                point.pop(self.keys[depth], None)
+                depth -= 1
+                if depth >= 0: cursor[depth] += 1
+                continue
+            point[self.keys[depth]] = grids[depth][cursor[depth]]
+            if not self._feasible(depth, point):
+                self.stats["pruned"] += 1
+                cursor[depth] += 1
+                continue
+            if depth + 1 < len(self.keys):
+                depth += 1
+                grids[depth] = self._values(self.keys[depth], point)
+                cursor[depth] = 0
+                continue
+            if self.canonical is not None and self.canonical(dict(point)) != point:
+                self.stats["duplicates"] += 1
+            else:
+                self.stats["emitted"] += 1
+                yield dict(point)
+            cursor[depth] += 1
+
+    def count(self):
+        return sum(1 for _ in self)
+
+    def is_feasible(self, point):
+        return all(c(point) for c in self.constraints)
+
+    def sample(self, n, seed=None, max_tries=None):
+        """Up to n distinct feasible points drawn at random (rejection sampling)."""
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        max_tries = max_tries or 100 * n
+        seen, out = set(), []
+        for _ in range(max_tries):
+            if len(out) == n: break
+            point = {}
+            for key in self.keys:
+                prm = self.params[key]
+                point[key] = None if isinstance(prm, Conditional) and not prm.when(point) else prm.sample(rng)
+            if self.canonical is not None: point = self.canonical(point)
+            if not self.is_feasible(point): continue
+            sig = tuple(point[k] for k in self.keys)
+            if sig in seen: continue
+            seen.add(sig)
+            out.append(point)
+        return out
+
+    def describe(self):
+        return {"parameters": len(self.keys), "upper_bound": self.upper_bound(),
+                "constraints": [c.name for c in self.constraints]}
@@ -2,6 +2,8 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 import os
+from rng_streams import RandomStreams
+from report_pipeline import ResultStore, render_all
 
 # --- SHADOW TITAN: SENSITIVITY & STABILITY AUDITOR ---
 class Config:
@@ -10,13 +12,16 @@ class Config:
     END = "2026-03-01"
     INITIAL_BALANCE = 100000.0
     MAX_MONTHLY_DD_LIMIT = 1.95
+    SEED = 2016
+    COMMON_RANDOM_NUMBERS = True
 
 # The Sovereign Set
 SOVEREIGN = {'fast': 5, 'medium': 13, 'slow': 50, 'rsi_max': 75, 'rsi_min': 25, 'sl_mult': 1.0, 'tp_mult': 5.0, 'risk': 1.5}
 
 class StabilityAuditor:
-    def __init__(self, data):
+    def __init__(self, data, streams=None):
         self.data = data
+        self.streams = streams if streams is not None else RandomStreams(Config.SEED, common=Config.COMMON_RANDOM_NUMBERS)
 
     def run_sim(self, p):
         df = self.data.copy()
@@ -36,6 +41,7 @@ class StabilityAuditor:
         month_active = True
         month_start_bal = balance
         month_hwm = balance
+        draws = self.streams.bar_draws(len(df))
 
         for i in range(100, len(df)):
             ts = df.index[i]
@@ -69,7 +75,7 @@ class StabilityAuditor:
                 tp_dist = sl_dist * p['tp_mult']
                 units = (balance * final_risk) / sl_dist if sl_dist > 0 else 0
                 p_win = 0.92 if (abs(c-o) > prev['ATR'] * 0.2) else 0.82
-                outcome = 1 if np.random.random() < p_win else -1
+                outcome = 1 if draws[i] < p_win else -1
                 balance += (tp_dist if outcome == 1 else -sl_dist) * units
 
         return np.mean(monthly_returns) if monthly_returns else 0
@@ -80,6 +86,7 @@ def run_stability_test():
     if isinstance(data.columns, pd.MultiIndex): data.columns = data.columns.get_level_values(0)
     
     auditor = StabilityAuditor(data)
+    print(f"Random streams: {auditor.streams.describe()}")
     
     # Test 1: EMA Sensitivity (+/- 20% value shift)
     print("\n--- TEST 1: EMA SENSITIVITY ---")
@@ -108,25 +115,12 @@ def run_stability_test():
     
     is_stable = std_ema_perf < (avg_ema_perf * 0.15) # If variance is less than 15% of profit, it's structural
     
-    report = f"""# SHADOW TITAN: ANTI-OVERFIT STABILITY CERTIFICATE
-## 🏛️ Result Integrity Verification (2016-2026)
-
-To ensure the "God-Mode" results are 100% reliable and NOT overfitted, we subjected the Sovereign Set to **Parameter Perturbation** and **Sensitivity Analysis**.
-
-### 🧬 Sensitivity Test Results
-- **EMA Stability**: Results maintained a consistent {avg_ema_perf:.2f}% average across +/- 20% shifts in EMA lengths. This proves the edge is a structural property of the Gold trend, not a "lucky" specific number.
-- **Risk Resilience**: Increasing or decreasing risk by 25% showed a linear, predictable impact on profit without crashing the strategy or breaching the DD floor.
-- **Volatility Decay**: Tested on historical High/Low wicks to eliminate "perfect entry" bias.
-
-### 🛡️ Final Verdict: ROBUST
-The probability of this being a curve-fitted fluke over a 10-year span (120 months) is effectively **Zero**. The strategy relies on **Trend Persistence** and **Impulse Momentum**, which are foundational laws of liquid markets like XAUUSD.
-
----
-*Verified by Shadow Titan Quantum Suite.*
-"""
-    with open("/Users/muhammedriyaz/.gemini/antigravity/scratch/shadowbot_pro/ANTI_OVERFIT_CERTIFICATE.md", "w") as f:
-        f.write(report)
-    print("\nAnti-Overfit Certificate Generated.")
+    # Stored results; the certificate is rendered from them under its own output name
+    ResultStore().save("sensitivity_audit", {
+        "avg_ema_perf": avg_ema_perf, "std_ema_perf": std_ema_perf, "is_stable": bool(is_stable),
+    }, tables={"ema": pd.DataFrame({"label": [f"EMA shift {s:+d}" for s, _ in results_ema], "avg_monthly_pct": [r for _, r in results_ema]}),
+               "risk": pd.DataFrame({"label": [f"Risk {r}%" for r, _ in results_risk], "avg_monthly_pct": [v for _, v in results_risk]})})
+    print(f"\nStability Certificate: {render_all(['sensitivity_certificate'])}")
 
 if __name__ == "__main__":
     run_stability_test()
@@ -1,9 +1,11 @@
 import yfinance as yf
 import pandas as pd
-import numpy as np
 from datetime import datetime
 import os
 from pathlib import Path
+from rng_streams import RandomStreams
+from trade_ledger import TradeLedger
+from report_pipeline import ResultStore, render_all
 
 # --- Institutional Configuration: SHADOW TITAN V1 ---
 class Config:
@@ -14,41 +16,57 @@ class Config:
     MAX_MONTHLY_DD_LIMIT = 1.95 
     START_DATE = "2016-01-01"
     END_DATE = "2026-03-01"
+    SEED = 2016
+    WARMUP_BARS = 200
+
+def download_history(start_date, end_date):
+    data = yf.download(Config.SYMBOL, start=start_date, end=end_date, interval="1d", auto_adjust=True)
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    return data
+
+def compute_indicators(data):
+    """Shadow Titan Precision Indicators, added to data in place."""
+    data['EMA_F'] = data['Close'].ewm(span=5).mean()
+    data['EMA_M'] = data['Close'].ewm(span=13).mean()
+    data['EMA_S'] = data['Close'].ewm(span=200).mean()
+
+    delta = data['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / (loss + 1e-9)
+    data['RSI'] = 100 - (100 / (1 + rs))
+    data['ATR'] = data['High'].sub(data['Low']).rolling(window=14).mean()
+    return data
 
 class ShadowTitanAuditor:
-    def __init__(self, start_date, end_date):
+    def __init__(self, start_date, end_date, streams=None):
         self.start_date = start_date
         self.end_date = end_date
+        self.streams = streams if streams is not None else RandomStreams(Config.SEED)
         self.balance = Config.INITIAL_BALANCE
         self.equity_curve = []
-        self.trade_log = []
+        self.trade_log = TradeLedger()
         self.monthly_stats = []
         self.data = None
 
     def fetch_data(self):
         print(f"[{Config.MODEL_NAME}] Initializing Data Feed for {Config.SYMBOL} ({self.start_date} -> {self.end_date})...")
-        self.data = yf.download(Config.SYMBOL, start=self.start_date, end=self.end_date, interval="1d", auto_adjust=True)
+        self.data = download_history(self.start_date, self.end_date)
         if self.data.empty: return False
-        
-        if isinstance(self.data.columns, pd.MultiIndex):
-            self.data.columns = self.data.columns.get_level_values(0)
-            
-        # Shadow Titan Precision Indicators
-        self.data['EMA_F'] = self.data['Close'].ewm(span=5).mean()
-        self.data['EMA_M'] = self.data['Close'].ewm(span=13).mean()
-        self.data['EMA_S'] = self.data['Close'].ewm(span=200).mean()
-        
-        delta = self.data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / (loss + 1e-9)
-        self.data['RSI'] = 100 - (100 / (1 + rs))
-        self.data['ATR'] = self.data['High'].sub(self.data['Low']).rolling(window=14).mean()
+        compute_indicators(self.data)
         return True
 
-    def run_simulation(self):
-        """Alpha-Stage Execution: Zero-Loss Hedge Fund Logic"""
-        if not self.fetch_data(): return
+    def run_simulation(self, data=None, trade_start=None):
+        """Alpha-Stage Execution: Zero-Loss Hedge Fund Logic.
+
+        data: history with compute_indicators() columns, shared between eras; downloaded when None.
+        trade_start: first bar to trade; the bars before it only warm up the indicators.
+        """
+        if data is None:
+            if not self.fetch_data(): return
+        else:
+            self.data = data
         
         monthly_start_bal = Config.INITIAL_BALANCE
         current_month = -1
@@ -58,16 +76,25 @@ class ShadowTitanAuditor:
         monthly_hwm = Config.INITIAL_BALANCE
         
         # Ensure we have enough data for indicators
-        start_idx = 200
+        start_idx = Config.WARMUP_BARS
+        if trade_start is not None:
+            start_idx = max(start_idx, int(self.data.index.searchsorted(pd.Timestamp(trade_start))))
         if len(self.data) <= start_idx: return
+        # Draw i - offset goes to bar i, so the first trading bar takes draw WARMUP_BARS as it did
+        # when each era traded from bar WARMUP_BARS of its own download; draws follow the trade
+        # start, not the calendar, so moving the start gives each date a different draw
+        offset = start_idx - Config.WARMUP_BARS
+        draws = self.streams.bar_draws(len(self.data) - offset)
+        index = self.data.index
+        # Plain float lists: faster per-bar access than .iloc
+        opens, closes = self.data['Open'].to_numpy(dtype=float).tolist(), self.data['Close'].to_numpy(dtype=float).tolist()
+        ema_fs, ema_ms, ema_ss = (self.data[k].to_numpy(dtype=float).tolist() for k in ('EMA_F', 'EMA_M', 'EMA_S'))
+        rsis, atrs = self.data['RSI'].to_numpy(dtype=float).tolist(), self.data['ATR'].to_numpy(dtype=float).tolist()
 
         for i in range(start_idx, len(self.data)): 
-            timestamp = self.data.index[i]
-            # Handle float values from yfinance
-            o = float(self.data['Open'].iloc[i])
-            h = float(self.data['High'].iloc[i])
-            l = float(self.data['Low'].iloc[i])
-            c = float(self.data['Close'].iloc[i])
+            timestamp = index[i]
+            o = opens[i]
+            c = closes[i]
             
             if timestamp.month != current_month:
                 if current_month != -1:
@@ -92,11 +119,11 @@ class ShadowTitanAuditor:
             if monthly_ret >= Config.MONTHLY_TARGET_PCT: month_active = False; continue
             if local_dd >= Config.MAX_MONTHLY_DD_LIMIT: month_active = False; continue
             
-            ema_f = float(self.data['EMA_F'].iloc[i-1])
-            ema_m = float(self.data['EMA_M'].iloc[i-1])
-            ema_s = float(self.data['EMA_S'].iloc[i-1])
-            rsi = float(self.data['RSI'].iloc[i-1])
-            atr = float(self.data['ATR'].iloc[i-1])
+            ema_f = ema_fs[i-1]
+            ema_m = ema_ms[i-1]
+            ema_s = ema_ss[i-1]
+            rsi = rsis[i-1]
+            atr = atrs[i-1]
             
             sig = 0
             if (ema_f > ema_m > ema_s) and rsi < 70: sig = 1
@@ -115,14 +142,14 @@ class ShadowTitanAuditor:
                 units = (self.balance * final_risk_pct) / sl_dist if sl_dist > 0 else 0
                 
                 p_win = 0.90 if (abs(c-o) > atr * 0.2) else 0.75
-                outcome = np.random.choice([1, -1], p=[p_win, 1-p_win])
+                outcome = 1 if draws[i - offset] < p_win else -1
                 
                 pnl = (tp_dist if outcome == 1 else -sl_dist) * units
                 self.balance += pnl
                 total_trades += 1
                 if outcome == 1: trades_won += 1
                 
-                self.trade_log.append({"Time": timestamp, "PnL": pnl, "Bal": self.balance})
+                self.trade_log.append(timestamp, timestamp, sig, units, pnl)
 
     def save_monthly_stat(self, ts, start_bal, won, total):
         ret = (self.balance - start_bal) / start_bal * 100.0 if start_bal > 0 else 0
@@ -135,77 +162,46 @@ class ShadowTitanAuditor:
             "Status": "✅ PASS" if ret >= 20.0 else "🛡️ SAFE" if ret >= 0 else "🛑 FAIL"
         })
 
-    def generate_report_markdown(self, df):
-        success_rate = (len(df[df['Return (%)'] >= 0]) / len(df) * 100) if not df.empty else 0
-        avg_monthly_profit = df['Return (%)'].mean() if not df.empty else 0
+    @staticmethod
+    def era_stats(df):
+        """Scalars of one era's monthly stats for the super-audit report."""
         total_months = len(df)
-        losing_months = len(df[df['Return (%)'] < 0])
-        
-        return f"""
-- **Total Portfolio Return**: +{((df['Balance ($)'].iloc[-1] if not df.empty else 0) / Config.INITIAL_BALANCE * 100 - 100):,.2f}%
-- **Average Monthly Profit**: {avg_monthly_profit:.2f}%
-- **Monthly Success Rate**: {success_rate:.1f}% ({total_months - losing_months}/{total_months} Months)
-- **Zero-Loss Resilience**: {losing_months} Months in Loss over {total_months} Months.
-
-## 📅 Monthly Performance Breakdown
-{df.to_markdown(index=False)}
-"""
+        return {
+            "total_return": (df['Balance ($)'].iloc[-1] if not df.empty else 0) / Config.INITIAL_BALANCE * 100 - 100,
+            "avg_monthly": df['Return (%)'].mean() if not df.empty else 0,
+            "success_rate": (len(df[df['Return (%)'] >= 0]) / total_months * 100) if not df.empty else 0,
+            "months": total_months,
+            "losing": len(df[df['Return (%)'] < 0]),
+            "first_month": str(df['Month'].iloc[0]) if not df.empty else "-",
+            "last_month": str(df['Month'].iloc[-1]) if not df.empty else "-",
+        }
 
 def run_titan_audit():
     """Master Method for SHADOW TITAN V1 20-Year Global Stress Test"""
     print(f"--- INITIALIZING {Config.MODEL_NAME} 20-YEAR GLOBAL STRESS TEST ---")
     
-    root_dir = "/Users/muhammedriyaz/.gemini/antigravity/scratch/shadowbot_pro"
-    
-    # 1. Retro-Audit (2006-2016)
-    retro_auditor = ShadowTitanAuditor(start_date="2006-01-01", end_date="2016-01-01")
-    retro_auditor.run_simulation()
-    retro_df = pd.DataFrame(retro_auditor.monthly_stats)
-    
-    # 2. Modern-Audit (2016-2026)
-    modern_auditor = ShadowTitanAuditor(start_date="2016-01-01", end_date="2026-03-01")
-    modern_auditor.run_simulation()
-    modern_df = pd.DataFrame(modern_auditor.monthly_stats)
+    streams = RandomStreams(Config.SEED)
+    print(f"Random streams: {streams.describe()}")
     
+    # One download and indicator pass; both eras trade on it in parallel
+    from era_audit import Era, load_history, run_eras, merge_eras
+    eras = [Era("Retro-Audit", "2006-01-01", "2016-01-01"), Era("Modern-Audit", "2016-01-01", "2026-03-01")]
+    results = run_eras(load_history("2005-01-01", "2026-03-01"), eras, streams=streams)
+    retro_df, modern_df = results["Retro-Audit"]["monthly"], results["Modern-Audit"]["monthly"]
+
     # Cumulative Stats
-    cumulative_df = pd.concat([retro_df, modern_df], ignore_index=True)
+    cumulative_df = merge_eras(results)
     total_months = len(cumulative_df)
     success_rate = (len(cumulative_df[cumulative_df['Return (%)'] >= 0]) / total_months * 100) if total_months > 0 else 0
     avg_monthly = cumulative_df['Return (%)'].mean() if total_months > 0 else 0
     
-    # Reports
-    report_content = f"""# {Config.MODEL_NAME}: 20-YEAR CUMULATIVE SUPER-AUDIT
-## 🏛️ Institutional Portfolio Performance (2006-2026)
-- **Status**: GOD-MODE VERIFIED (2-Decade Resilience)
-- **Total Evaluation Span**: 20 Years (240 Months)
-- **Average Monthly Profit**: {avg_monthly:.2f}%
-- **Global Success Rate**: {success_rate:.1f}% (236+/240 Months Profitable)
-- **Max Monthly Drawdown**: Compliance within 2% absolute limits preserved for 20 years.
-
-## 🛡️ Reliability Overview
-- **2008 Financial Crisis**: Successfully navigated with Zero account breaches.
-- **2020 Pandemic**: Successfully navigated with 100% profitable months.
-- **2022 Inflation Spike**: Maintained >20% average monthly profit.
-
-## 📊 Summary by Era
-### Era 1: Retro-Audit (2006-2016)
-{retro_auditor.generate_report_markdown(retro_df)}
-
-### Era 2: Modern-Audit (2016-2026)
-{modern_auditor.generate_report_markdown(modern_df)}
-
----
-*Verified for Alpha-Generation and Sovereign Wealth Fund deployment.*
-"""
-    
-    md_path = os.path.join(root_dir, "SHADOW_TITAN_20Y_SUPER_AUDIT.md")
-    csv_path = os.path.join(root_dir, "SHADOW_TITAN_20Y_DATA.csv")
-    
-    with open(md_path, "w") as f: f.write(report_content)
-    cumulative_df.to_csv(csv_path, index=False)
-    
-    print(f"Super-Audit Generated: {md_path}")
-    print(f"Global Data Ready: {csv_path}")
+    # Stored results; the report and the CSV export are rendered from them
+    ResultStore().save("titan_20y", {
+        "model_name": Config.MODEL_NAME, "avg_monthly": avg_monthly, "success_rate": success_rate,
+        "total_months": total_months, "profitable_months": int((cumulative_df['Return (%)'] >= 0).sum()) if total_months else 0,
+        "retro": ShadowTitanAuditor.era_stats(retro_df), "modern": ShadowTitanAuditor.era_stats(modern_df),
+    }, tables={"retro": retro_df, "modern": modern_df, "cumulative": cumulative_df})
+    print(f"Super-Audit: {render_all(['super_audit_20y'])}")
 
 if __name__ == "__main__":
     run_titan_audit()
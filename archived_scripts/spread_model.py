@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+# --- SHADOW TITAN: VARIABLE SPREAD MODEL ---
+# Replaces the fixed slippage constants of the backtests with a spread that
+# depends on when the fill happens: a precomputed spread for every minute of
+# the trading week (10080 buckets) times a widening factor inside news windows
+# (the periods CNewsFilter blocks in NewsFilter.mqh). A lookup is two integer
+# operations, one array read and one dict probe, so it costs nothing on M1
+# replay.
+
+class Config:
+    BASE_SPREAD = 0.25             # XAUUSD, price units, liquid hours
+    SLIPPAGE_RATIO = 0.5           # Expected slippage as a fraction of the current spread
+    SERVER_UTC_OFFSET_MIN = 120    # Broker server time (EET) minus UTC
+    NEWS_BLOCK_BEFORE = 5          # NewsBlockBefore (minutes)
+    NEWS_BLOCK_AFTER = 5           # NewsBlockAfter (minutes)
+    NEWS_WIDENING = {3: 4.0, 2: 2.0}  # Spread multiplier inside the window, by importance
+
+MINUTES_PER_WEEK = 7 * 24 * 60
+NS_PER_MINUTE = 60_000_000_000
+EPOCH_MINUTE_OF_WEEK = 3 * 24 * 60  # 1970-01-01 was a Thursday; weeks start Monday 00:00
+
+def _ns_values(ts):
+    values = np.asarray(ts.values if hasattr(ts, "values") else ts)
+    if values.dtype.kind == 'M': values = values.astype('datetime64[ns]').astype(np.int64)
+    return values.astype(np.int64)
+
+def server_to_utc_ns(ts, server_tz=None):
+    """UTC ns of naive broker server-time stamps (datetime64 / int64 ns, array or scalar).
+
+    server_tz (e.g. "Europe/Athens") localizes with DST; None shifts by the
+    fixed SERVER_UTC_OFFSET_MIN, the offset the spread profile is built on.
+    """
+    ns = _ns_values(ts)
+    if server_tz is None: return ns - Config.SERVER_UTC_OFFSET_MIN * NS_PER_MINUTE
+    local = pd.DatetimeIndex(np.atleast_1d(ns).astype('datetime64[ns]'))
+    # DST fall-back hours read as standard time, spring-forward gaps move to the next valid minute
+    utc = local.tz_localize(server_tz, ambiguous=np.zeros(len(local), dtype=bool), nonexistent="shift_forward")
+    out = utc.tz_convert("UTC").tz_localize(None).values.astype('datetime64[ns]').astype(np.int64)
+    return out.reshape(ns.shape)
+
+def utc_to_server_ns(ts, server_tz=None):
+    """Inverse of server_to_utc_ns: naive server-time ns of UTC stamps."""
+    ns = _ns_values(ts)
+    if server_tz is None: return ns + Config.SERVER_UTC_OFFSET_MIN * NS_PER_MINUTE
+    utc = pd.DatetimeIndex(np.atleast_1d(ns).astype('datetime64[ns]')).tz_localize("UTC")
+    return utc.tz_convert(server_tz).tz_localize(None).values.astype('datetime64[ns]').astype(np.int64).reshape(ns.shape)
+
+def minute_index(ts):
+    """Epoch minute (int64) of a Timestamp, datetime64 array/index or int64 ns values."""
+    if isinstance(ts, (pd.Timestamp, np.datetime64)): return pd.Timestamp(ts).value // NS_PER_MINUTE
+    if isinstance(ts, (int, np.integer)): return int(ts) // NS_PER_MINUTE
+    values = np.asarray(ts)
+    if values.dtype.kind == 'M': values = values.astype('datetime64[ns]').astype(np.int64)
+    return values // NS_PER_MINUTE
+
+def session_profile(base=None, asia=1.6, rollover=5.0, weekly_open=8.0, friday_close=2.5):
+    """Default minute-of-week spread profile (server time) for spot gold."""
+    base = base if base is not None else Config.BASE_SPREAD
+    hour_mult = np.array([3.0, 2.0, 1.6, asia, asia, asia, asia, asia, asia, 1.2, 1.0, 1.0,
+                          1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.1, 1.2, 1.4, 1.8, 2.5])
+    profile = np.tile(np.repeat(hour_mult, 60), 7) * base
+    day = 24 * 60
+    for d in range(5):
+        # Daily rollover: 23:55 - 00:10 server time
+        profile[(d + 1) * day - 5:(d + 1) * day + 10] = base * rollover
+    profile[:30] = base * weekly_open                          # Monday open
+    profile[4 * day + 23 * 60:5 * day] = base * friday_close   # Friday last hour
+    return profile
+
+class SpreadModel:
+    """Spread and slippage (price units) as a function of fill time."""
+    def __init__(self, profile=None, slippage_ratio=None, utc_offset_min=None):
+        self.profile = np.asarray(profile if profile is not None else session_profile(), dtype=float)
+        if self.profile.shape != (MINUTES_PER_WEEK,): raise ValueError(f"profile must have {MINUTES_PER_WEEK} entries")
+        self.slippage_ratio = Config.SLIPPAGE_RATIO if slippage_ratio is None else slippage_ratio
+        self.offset = EPOCH_MINUTE_OF_WEEK + (Config.SERVER_UTC_OFFSET_MIN if utc_offset_min is None else utc_offset_min)
+        self.event_widening = {}   # epoch minute -> multiplier
+        self._event_minutes = np.empty(0, np.int64)
+        self._event_mult = np.empty(0)
+
+    @classmethod
+    def from_observations(cls, timestamps, spreads, utc_offset_min=None, **kw):
+        """Median observed spread per minute of week (e.g. an MT5 tick/bar export); empty buckets get the overall median."""
+        offset = EPOCH_MINUTE_OF_WEEK + (Config.SERVER_UTC_OFFSET_MIN if utc_offset_min is None else utc_offset_min)
+        bucket = (minute_index(timestamps) + offset) % MINUTES_PER_WEEK
+        med = pd.Series(np.asarray(spreads, dtype=float)).groupby(bucket).median()
+        profile = np.full(MINUTES_PER_WEEK, float(np.median(spreads)))
+        profile[med.index.to_numpy()] = med.to_numpy()
+        return cls(profile, utc_offset_min=utc_offset_min, **kw)
+
+    def add_events(self, times, importance=3, before=None, after=None, widening=None):
+        """Widen the spread for [t - before, t + after] minutes around each event."""
+        before = Config.NEWS_BLOCK_BEFORE if before is None else before
+        after = Config.NEWS_BLOCK_AFTER if after is None else after
+        importance = np.broadcast_to(np.asarray(importance), np.shape(minute_index(times)))
+        widening = widening or Config.NEWS_WIDENING
+        for m, imp in zip(np.atleast_1d(minute_index(times)), np.atleast_1d(importance)):
+            mult = widening.get(int(imp), 1.0)
+            if mult == 1.0: continue
+            for k in range(int(m) - before, int(m) + after + 1):
+                if mult > self.event_widening.get(k, 1.0): self.event_widening[k] = mult
+        keys = np.fromiter(self.event_widening, dtype=np.int64, count=len(self.event_widening))
+        order = np.argsort(keys)
+        self._event_minutes = keys[order]
+        self._event_mult = np.fromiter(self.event_widening.values(), dtype=float, count=len(keys))[order]
+        return self
+
+    def spread_at(self, ts):
+        """Spread at one fill time (Timestamp or int ns): O(1)."""
+        m = minute_index(ts)
+        return self.profile[(m + self.offset) % MINUTES_PER_WEEK] * self.event_widening.get(m, 1.0)
+
+    def fill_cost(self, ts):
+        """Price concession of one market fill: half the spread plus expected slippage."""
+        return self.spread_at(ts) * (0.5 + self.slippage_ratio)
+
+    def spreads(self, ts):
+        """Vectorized spread_at for a whole bar index."""
+        m = minute_index(ts)
+        out = self.profile[(m + self.offset) % MINUTES_PER_WEEK]
+        if len(self._event_minutes):
+            pos = np.clip(np.searchsorted(self._event_minutes, m), 0, len(self._event_minutes) - 1)
+            hit = self._event_minutes[pos] == m
+            out = np.where(hit, out * self._event_mult[pos], out)
+        return out
+
+    def fill_costs(self, ts):
+        return self.spreads(ts) * (0.5 + self.slippage_ratio)
+
+    def save(self, path):
+        np.savez(path, profile=self.profile, slippage_ratio=self.slippage_ratio, offset=self.offset,
+                 event_minutes=self._event_minutes, event_mult=self._event_mult)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            model = cls(z["profile"], float(z["slippage_ratio"]), int(z["offset"]) - EPOCH_MINUTE_OF_WEEK)
+            model._event_minutes, model._event_mult = z["event_minutes"], z["event_mult"]
+        model.event_widening = dict(zip(model._event_minutes.tolist(), model._event_mult.tolist()))
+        return model
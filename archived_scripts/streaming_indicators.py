@@ -0,0 +1,64 @@
+import math
+from collections import deque
+
+# --- SHADOW TITAN: STREAMING INDICATORS ---
+# Bar-by-bar versions of the pandas indicators the audits use, carrying only
+# O(window) state so an engine can be snapshotted mid-history and resumed.
+# They reproduce the vectorized formulas: ewm(span, adjust=True).mean(),
+# rolling(n).mean() (NaN until the window is full) and the audits' RSI, in
+# which the first close-to-close change counts as zero.
+
+class EWM:
+    """pandas ewm(span=span, adjust=True).mean(), same recurrence as pandas so values match bit for bit."""
+    def __init__(self, span):
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self.old_wt = 1.0
+        self.value = math.nan
+
+    def update(self, x):
+        if self.value != self.value:
+            self.value = x
+            return self.value
+        self.old_wt *= self.decay
+        if self.value != x:
+            self.value = (self.old_wt * self.value + x) / (self.old_wt + 1.0)
+        self.old_wt += 1.0
+        return self.value
+
+class RollingMean:
+    """rolling(window).mean(): NaN until window values have been seen."""
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.value = math.nan
+
+    def update(self, x):
+        self.values.append(x)
+        self.value = math.fsum(self.values) / self.window if len(self.values) == self.window else math.nan
+        return self.value
+
+class RSI:
+    """100 - 100 / (1 + avg_gain / (avg_loss + 1e-9)) over simple rolling means."""
+    def __init__(self, period=14):
+        self.gain = RollingMean(period)
+        self.loss = RollingMean(period)
+        self.prev_close = None
+        self.value = math.nan
+
+    def update(self, close):
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        g = self.gain.update(delta if delta > 0 else 0.0)
+        l = self.loss.update(-delta if delta < 0 else 0.0)
+        self.value = 100 - (100 / (1 + (g / (l + 1e-9))))
+        return self.value
+
+class RangeATR:
+    """(High - Low).rolling(period).mean(), the audits' ATR proxy."""
+    def __init__(self, period=14):
+        self.mean = RollingMean(period)
+        self.value = math.nan
+
+    def update(self, high, low):
+        self.value = self.mean.update(high - low)
+        return self.value
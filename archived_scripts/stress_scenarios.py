@@ -0,0 +1,250 @@
+import time
+import numpy as np
+import pandas as pd
+from rng_streams import RandomStreams, normal_inv_cdf
+from search_space import SearchSpace, Conditional
+from precision import FULL, get_precision, cast, nbytes, accuracy_report, format_report, Config as PrecisionConfig
+
+# --- SHADOW TITAN: FRICTION STRESS SCENARIOS ---
+# Signals, trade geometry and the per-bar outcome draws of the alpha simulator
+# are computed once. Every friction scenario (spread regime, time-of-day spread
+# curve, slippage distribution, commission) is then carried as one lane of a
+# vector: the bar loop visits only signal and month-change bars and updates all
+# accounts together, so a few hundred scenarios cost about one backtest.
+# With precision="compact" the per-bar arrays are stored as float32 / int32 /
+# uint8 and no float64 copy is kept. A compact run flags the lanes where
+# rounding could have flipped a decision, with margin precision.Config.
+# DECISION_RTOL: a win draw or month return that close to its threshold, or a
+# trade that left less than that fraction of the DD headroom it started from
+# (stakes are sized on headroom, so drawdown errors shrink with it and the
+# gate only flips when one trade wipes the headroom out). Only those lanes
+# are rerun, on float64 inputs rebuilt from the source data. An evenly spaced
+# sample of lanes is then checked against float64 over the first CHECK_BARS
+# bars; if it disagrees the whole matrix is rerun in float64.
+
+class Config:
+    INITIAL_BALANCE = 100000.0
+    MONTHLY_DD_LIMIT = 1.95
+    MONTHLY_TARGET = 20.0
+    WARMUP_BARS = 100
+    BASE_SPREAD = 0.05            # Price units per unit traded (the simulator's fixed friction)
+    COMMISSION_PER_LOT = 7.0      # Round turn, USD
+    CONTRACT_SIZE = 100.0         # oz per lot (XAUUSD)
+    SEED = 2016
+    PRECISION = "full"            # or "compact"
+    CHECK_PRECISION = True        # Verify compact runs against float64 ...
+    CHECK_LANES = 64              # ... metrics on this many sampled scenarios (decisions on all of them)
+    CHECK_BARS = 20000            # ... over this many leading bars
+
+# Storage kind of each per-bar array (see precision.cast)
+BAR_KINDS = {"sig": "code", "sl_dist": "float", "tp_dist": "float", "p_win": "float", "month": "index",
+             "hour": "code", "draws": "float", "slip_exp": "float", "slip_norm": "float"}
+
+# Spread multipliers by hour of the bar timestamp (server time). Daily bars all sit at hour 0.
+TOD_CURVES = {
+    "flat": np.ones(24),
+    "fx_session": np.array([2.5, 2.0, 1.6, 1.3, 1.2, 1.1, 1.1, 1.0, 1.0, 1.0, 1.0, 1.0,
+                            1.0, 1.0, 1.0, 1.0, 1.0, 1.1, 1.2, 1.3, 1.5, 1.8, 2.2, 3.0]),
+    "rollover_spike": np.where(np.arange(24) == 23, 4.0, 1.0),
+}
+SLIPPAGE_MODELS = ("none", "fixed", "normal", "exponential")
+
+def default_scenario_space():
+    """The standard sensitivity grid (a few hundred friction scenarios)."""
+    return SearchSpace({
+        "spread_mode": ["static", "variable"],
+        "spread_spike": Conditional([1.0, 2.5, 5.0, 7.5], lambda s: s["spread_mode"] == "variable", ["spread_mode"]),
+        "base_spread": [0.03, 0.05, 0.10],
+        "tod_curve": list(TOD_CURVES),
+        "slippage": list(SLIPPAGE_MODELS),
+        "slip_mean": Conditional([0.1, 0.3], lambda s: s["slippage"] != "none", ["slippage"]),
+        "commission_per_lot": [0.0, Config.COMMISSION_PER_LOT],
+    })
+
+def trade_geometry(data, p):
+    """Per-bar arrays the simulator needs, independent of friction and account state."""
+    close = data['Close']
+    ema_f = close.ewm(span=p['fast']).mean().to_numpy()
+    ema_m = close.ewm(span=p['medium']).mean().to_numpy()
+    ema_s = close.ewm(span=p['slow']).mean().to_numpy()
+    delta = close.diff()
+    ga = (delta.where(delta > 0, 0)).rolling(14).mean()
+    lo = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rsi = (100 - (100 / (1 + (ga / (lo + 1e-9))))).to_numpy()
+    atr = data['High'].sub(data['Low']).rolling(14).mean().to_numpy()
+    o, c = data['Open'].to_numpy(), close.to_numpy()
+
+    n = len(data)
+    sig = np.zeros(n, dtype=np.int8)
+    prev = np.s_[:-1]
+    sig[1:][(ema_f[prev] > ema_m[prev]) & (ema_m[prev] > ema_s[prev]) & (rsi[prev] < p['rsi_max'])] = 1
+    sig[1:][(ema_f[prev] < ema_m[prev]) & (ema_m[prev] < ema_s[prev]) & (rsi[prev] > p['rsi_min'])] = -1
+    sl_dist = np.r_[np.nan, atr[:-1]] * p['sl_mult']
+    idx = data.index
+    month = (idx.year * 12 + idx.month).to_numpy()
+    return {
+        "sig": sig, "sl_dist": sl_dist, "tp_dist": sl_dist * p['tp_mult'],
+        "p_win": np.where(np.abs(c - o) > np.r_[np.nan, atr[:-1]] * 0.2, 0.92, 0.82),
+        "month": month, "hour": idx.hour.to_numpy(), "risk": p['risk'],
+    }
+
+class StressScenarioRunner:
+    """Runs a matrix of friction scenarios against one set of signals in a single pass."""
+    def __init__(self, data, p, streams=None, precision=None, check=None):
+        self.data = data
+        self.p = p
+        self.streams = streams if streams is not None else RandomStreams(Config.SEED, common=True)
+        self.precision = get_precision(precision or Config.PRECISION)
+        self.check = Config.CHECK_PRECISION if check is None else check
+        # Compact runs rebuild float64 inputs on demand, which needs the same bar draws every time
+        if self.precision is not FULL and not self.streams.common: self.streams = self.streams.child(common=True)
+        self.bars = cast(self._bars(), self.precision, BAR_KINDS)
+        self.accuracy = None
+
+    def _bars(self, stop=None):
+        """float64 per-bar inputs of the first `stop` bars (all by default), built from the source data."""
+        data = self.data if stop is None else self.data.iloc[:stop]
+        n = len(data)
+        bars = trade_geometry(data, self.p)
+        bars["draws"] = self.streams.bar_draws(n)
+        # Slippage noise is also common across scenarios (and runners): one standard draw per bar
+        u = np.clip(self.streams.substream("slippage", common=True).bar_draws(n), 1e-12, 1 - 1e-12)
+        bars["slip_exp"] = -np.log1p(-u)
+        bars["slip_norm"] = normal_inv_cdf(u)
+        return bars
+
+    def _lanes(self, scenarios):
+        get = lambda k, default: np.array([s.get(k, default) if s.get(k) is not None else default for s in scenarios], dtype=float)
+        variable = np.array([s.get("spread_mode", "static") == "variable" for s in scenarios])
+        spike = get("spread_spike", 0.0)
+        return {
+            "spread": get("base_spread", Config.BASE_SPREAD) + spike,
+            # Simulator convention: a variable-spread regime also degrades the fill edge
+            "p_penalty": np.where(variable, spike * 0.1, 0.0),
+            "curve": np.vstack([TOD_CURVES[s.get("tod_curve", "flat")] for s in scenarios]),
+            "slip_model": np.array([SLIPPAGE_MODELS.index(s.get("slippage") or "none") for s in scenarios]),
+            "slip_mean": get("slip_mean", 0.0),
+            "commission": get("commission_per_lot", 0.0) / Config.CONTRACT_SIZE,
+        }
+
+    @staticmethod
+    def _slippage(lanes, g, i):
+        model, mean = lanes["slip_model"], lanes["slip_mean"]
+        return np.select([model == 1, model == 2, model == 3],
+                         [mean, np.maximum(0.0, mean * (1.0 + 0.5 * float(g["slip_norm"][i]))), mean * float(g["slip_exp"][i])], 0.0)
+
+    def run(self, scenarios):
+        """Returns a dict of per-scenario result arrays (scenario order preserved).
+
+        Compact lanes with a near-threshold decision are rerun in float64 and
+        a sample is checked over the leading bars; the
+        report is kept in self.accuracy (with the rerun lane count) and the
+        matrix is rerun in float64 if the sample disagrees.
+        """
+        scenarios = list(scenarios)
+        check = self.precision is not FULL and self.check and scenarios
+        res = self._run(scenarios, self.bars, margin=PrecisionConfig.DECISION_RTOL if check else None)
+        if check:
+            near = np.flatnonzero(res.pop("near"))
+            if len(near):
+                redo = self._run([scenarios[k] for k in near], self._bars())
+                for k, v in redo.items(): res[k][..., near] = v
+            pick = np.unique(np.linspace(0, len(scenarios) - 1, min(len(scenarios), Config.CHECK_LANES)).astype(np.int64))
+            sample = [scenarios[k] for k in pick]
+            window = {k: v[:Config.CHECK_BARS] if isinstance(v, np.ndarray) else v for k, v in self.bars.items()}
+            self.accuracy = accuracy_report(self._run(sample, self._bars(Config.CHECK_BARS)), self._run(sample, window))
+            self.accuracy["rerun_lanes"] = len(near)
+            if not self.accuracy["ok"]:
+                print(f"[stress] {format_report(self.accuracy)}; rerunning in float64")
+                return self._run(scenarios, self._bars())
+        return res
+
+    def _run(self, scenarios, g, margin=None):
+        """One pass over the events. With a margin, result["near"] flags lanes with a decision that close to its threshold."""
+        lanes = self._lanes(scenarios)
+        S = len(scenarios)
+        bal = np.full(S, Config.INITIAL_BALANCE)
+        month_start = bal.copy()
+        hwm = bal.copy()
+        active = np.ones(S, dtype=bool)
+        trades = np.zeros(S, dtype=np.int64)
+        friction_paid = np.zeros(S)
+        monthly = []
+        near = np.zeros(S, dtype=bool)
+        prev_headroom = np.full(S, Config.MONTHLY_DD_LIMIT)
+
+        month = g["month"]
+        # Account state only moves on signal bars, so those and month starts are the only events
+        bars = np.arange(Config.WARMUP_BARS, len(month), dtype=month.dtype)
+        new_month = np.r_[True, month[1:] != month[:-1]][bars]
+        new_month[0] = True
+        keep = (g["sig"][bars] != 0) | new_month
+        events, new_month = bars[keep], new_month[keep]
+        # Win draws do not depend on account state: find the bars where any lane's draw sits near its edge up front
+        near_draw = np.zeros(len(events), dtype=bool)
+        if margin is not None:
+            penalties = np.unique(lanes["p_penalty"])
+            gap = g["draws"][events][:, None] - (g["p_win"][events][:, None] - penalties)
+            near_draw = (g["sig"][events] != 0) & (np.abs(gap) <= margin).any(axis=1)
+
+        for i, first_bar, draw_check in zip(events, new_month, near_draw):
+            if first_bar:
+                if i != events[0]: monthly.append((bal - month_start) / month_start * 100)
+                month_start = bal.copy(); hwm = bal.copy(); active[:] = True
+            sig = g["sig"][i]
+            # Stopped lanes stay stopped until the month changes
+            if sig == 0 or not active.any(): continue
+            hwm = np.maximum(hwm, bal)
+            local_dd = (hwm - bal) / hwm * 100
+            month_ret = (bal - month_start) / month_start * 100
+            headroom = Config.MONTHLY_DD_LIMIT - local_dd
+            if margin is not None:
+                near |= active & ((np.abs(month_ret - Config.MONTHLY_TARGET) <= 100.0 * margin)
+                                  | (np.abs(headroom) <= margin * prev_headroom))
+                prev_headroom = headroom
+            active &= ~((month_ret >= Config.MONTHLY_TARGET) | (local_dd >= Config.MONTHLY_DD_LIMIT))
+            if not active.any(): continue
+
+            # Per-bar inputs as Python floats: a float32 scalar against float64 lanes takes numpy's slow promotion path
+            sl_dist, tp_dist, draw = float(g["sl_dist"][i]), float(g["tp_dist"][i]), float(g["draws"][i])
+            final_risk = np.minimum(g["risk"], headroom * 0.45) / 100.0
+            units = bal * final_risk / sl_dist if sl_dist > 0 else np.zeros(S)
+            edge = float(g["p_win"][i]) - lanes["p_penalty"]
+            win = draw < edge
+            friction = units * (lanes["spread"] * lanes["curve"][:, g["hour"][i]] + self._slippage(lanes, g, i) + lanes["commission"])
+            if draw_check: near |= active & (np.abs(draw - edge) <= margin)
+            pnl = np.where(win, tp_dist, -sl_dist) * units - friction
+            bal = np.where(active, bal + pnl, bal)
+            trades += active
+            friction_paid += np.where(active, friction, 0.0)
+
+        monthly = np.array(monthly).reshape(-1, S)
+        res = {"balance": bal, "monthly_rets": monthly, "trades": trades, "friction": friction_paid}
+        if margin is not None: res["near"] = near
+        return res
+
+    def sensitivity_table(self, scenarios, baseline=None):
+        """One row per scenario, with the change in average monthly return versus the baseline."""
+        scenarios = list(scenarios)
+        base = baseline or {"spread_mode": "static", "base_spread": Config.BASE_SPREAD}
+        res = self.run(scenarios + [base])
+        monthly = res["monthly_rets"]
+        avg = monthly.mean(axis=0) if len(monthly) else np.zeros(len(scenarios) + 1)
+        table = pd.DataFrame(scenarios)
+        table["avg_monthly_pct"] = avg[:-1]
+        table["worst_month_pct"] = monthly.min(axis=0)[:-1] if len(monthly) else np.nan
+        table["final_balance"] = res["balance"][:-1]
+        table["trades"] = res["trades"][:-1]
+        table["friction_paid"] = res["friction"][:-1]
+        table["delta_vs_base_pct"] = avg[:-1] - avg[-1]
+        return table.sort_values("avg_monthly_pct").reset_index(drop=True)
+
+def run_stress_matrix(data, p, scenarios=None, streams=None, precision=None):
+    scenarios = list(scenarios if scenarios is not None else default_scenario_space())
+    started = time.perf_counter()
+    runner = StressScenarioRunner(data, p, streams, precision)
+    table = runner.sensitivity_table(scenarios)
+    print(f"Stress matrix: {len(scenarios)} scenarios in {time.perf_counter() - started:.2f}s "
+          f"({runner.precision.name} precision, {nbytes(runner.bars) / 2**20:.1f} MB of bar arrays)")
+    if runner.accuracy is not None: print(f"  {format_report(runner.accuracy)}")
+    return table
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts are flat modules in archived_scripts/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
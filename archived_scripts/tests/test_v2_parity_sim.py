@@ -0,0 +1,74 @@
+import os
+import pandas as pd
+import v2_parity_sim as v2
+from news_calendar import NewsCalendar
+
+# 360 M1 bars of 2024-03-05 in MT5 export format (server time, EET = UTC+2)
+# and a UTC news calendar whose high-impact event at 22:33 UTC the day before
+# is 00:33 server time (blocked 00:28-00:38). The day covers SL and TP exits, a stop on
+# the entry bar (02:18), news blocks, and the daily DD guard, which blocks
+# all 71 signals after the 03:55 loss leaves the balance under 97.3%.
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURE = os.path.join(FIXTURES, "xauusd_m1_parity.csv")
+NEWS = os.path.join(FIXTURES, "news_utc.csv")
+
+SL, TP = v2.REASON_SL, v2.REASON_TP
+# (entry, exit, side, lots, pnl, entry_px, exit_px, reason); prices and money on the cent grid
+EXPECTED_TRADES = [
+    ("00:22", "00:30", 1, 5.00, -1035.00, 2148.04, 2146.04, SL),
+    ("00:39", "00:47", 1, 4.94, 2929.42, 2146.69, 2152.69, TP),
+    ("00:48", "01:31", 1, 5.09, 3018.37, 2153.28, 2159.28, TP),
+    ("01:32", "01:38", 1, 5.24, -1084.68, 2160.31, 2158.31, SL),
+    ("01:39", "02:01", -1, 5.19, -1074.33, 2158.56, 2160.56, SL),
+    ("02:02", "02:05", 1, 5.13, -1061.91, 2160.40, 2158.40, SL),
+    ("02:06", "02:17", -1, 5.08, -1051.56, 2158.21, 2160.21, SL),
+    ("02:18", "02:18", 1, 5.03, -1041.21, 2159.99, 2157.99, SL),
+    ("02:19", "02:20", -1, 4.97, -1028.79, 2157.63, 2159.63, SL),
+    ("02:21", "02:33", 1, 4.92, -1018.44, 2159.33, 2157.33, SL),
+    ("02:34", "03:22", -1, 4.87, 2887.91, 2157.10, 2151.10, TP),
+    ("03:23", "03:31", -1, 5.02, -1039.14, 2150.15, 2152.15, SL),
+    ("03:32", "03:51", 1, 4.97, -1028.79, 2153.35, 2151.35, SL),
+    ("03:52", "03:53", -1, 4.91, -1016.37, 2151.12, 2153.12, SL),
+    ("03:54", "03:55", 1, 4.86, -1006.02, 2153.90, 2151.90, SL),
+]
+EXPECTED_STATS = {"signals": 89, "blocked_total_guard": 0, "blocked_daily_guard": 71, "blocked_news": 3,
+                  "zero_lot": 0, "open_at_end": 0}
+
+def run_fixture(server_tz=None):
+    bars = v2.load_mt5_csv(FIXTURE)
+    sim = v2.V2ParitySimulator(bars, news=NewsCalendar.from_file(NEWS), mode="challenge", server_tz=server_tz)
+    ledger, stats = sim.run()
+    return sim, ledger, stats
+
+def test_fixture_loads():
+    bars = v2.load_mt5_csv(FIXTURE)
+    assert len(bars) == 360
+    assert bars.index[0] == pd.Timestamp("2024-03-05 00:00") and bars.index[-1] == pd.Timestamp("2024-03-05 05:59")
+
+def test_trade_list():
+    _, ledger, _ = run_fixture()
+    hhmm = lambda ns: pd.Timestamp(int(ns)).strftime("%H:%M")
+    col = {k: ledger.column(k) for k in ("entry_time", "exit_time", "side", "units", "pnl", "entry_px", "exit_px", "reason")}
+    trades = [(hhmm(col["entry_time"][k]), hhmm(col["exit_time"][k]), int(col["side"][k]), round(col["units"][k], 2),
+               round(col["pnl"][k], 2), round(col["entry_px"][k], 2), round(col["exit_px"][k], 2), int(col["reason"][k]))
+              for k in range(len(ledger))]
+    assert trades == EXPECTED_TRADES
+
+def test_final_balance_and_blocks():
+    sim, _, stats = run_fixture()
+    assert sim.balance == 96349.46
+    assert stats == EXPECTED_STATS
+
+def test_news_in_utc_against_server_time_bars():
+    # The fixed offset and the EET zone agree in March
+    sim, _, stats = run_fixture("Europe/Athens")
+    assert stats == EXPECTED_STATS and sim.balance == 96349.46
+    assert pd.Timestamp(int(sim.utc_ns[33])) == pd.Timestamp("2024-03-04 22:33")
+
+def test_news_block_changes_the_trades():
+    # Without the event the 00:31 sell is taken and stopped out
+    sim = v2.V2ParitySimulator(v2.load_mt5_csv(FIXTURE))
+    ledger, stats = sim.run()
+    assert stats["blocked_news"] == 0
+    assert pd.Timestamp(int(ledger.column("entry_time")[1])).strftime("%H:%M") == "00:31"
+    assert int(ledger.column("reason")[1]) == SL
@@ -0,0 +1,156 @@
+import numpy as np
+from columnar_archive import ColumnarArchive
+
+# --- SHADOW TITAN: COLUMNAR TRADE LEDGER ---
+# Trades live in one preallocated NumPy structured array that doubles when
+# full, instead of a dict per trade. Engines append in chronological order,
+# so every month is a contiguous slice and monthly grouping returns views
+# into the ledger without copying. Ledgers are saved as one .npz file, or as
+# a compressed columnar archive (any other path) that many ledgers can share.
+
+TRADE_FIELDS = [
+    ('entry_time', 'i8'),   # ns since epoch
+    ('exit_time', 'i8'),    # ns since epoch
+    ('side', 'i1'),         # 1 long, -1 short
+    ('units', 'f8'),
+    ('pnl', 'f8'),
+    ('month_id', 'i4'),     # year * 12 + month - 1
+]
+
+def month_id(ts):
+    return ts.year * 12 + ts.month - 1
+
+def month_label(mid):
+    return f"{int(mid) // 12}-{int(mid) % 12 + 1:02d}"
+
+def to_ns(ts):
+    if hasattr(ts, 'value'): return int(ts.value)
+    if isinstance(ts, np.datetime64): return int(ts.astype('datetime64[ns]').astype(np.int64))
+    return int(ts)
+
+class TradeLedger:
+    """Append-only trade ledger backed by a growable structured array."""
+    def __init__(self, capacity=1024, extra_fields=()):
+        self.dtype = np.dtype(TRADE_FIELDS + list(extra_fields))
+        self._extra = [name for name, _ in extra_fields]
+        self._buf = np.zeros(max(1, capacity), dtype=self.dtype)
+        self._n = 0
+        # Every month the engine visited, including months without trades
+        self._months = []
+
+    def __len__(self):
+        return self._n
+
+    def __getstate__(self):
+        # Pickle (snapshots, worker results) only the filled part of the buffer
+        state = dict(self.__dict__)
+        state['_buf'] = self._buf[:max(1, self._n)].copy()
+        return state
+
+    def _grow(self):
+        new = np.zeros(len(self._buf) * 2, dtype=self.dtype)
+        new[:self._n] = self._buf[:self._n]
+        self._buf = new
+
+    def mark_month(self, mid):
+        if not self._months or self._months[-1] != mid:
+            self._months.append(mid)
+
+    def append(self, entry_time, exit_time, side, units, pnl, **extra):
+        if self._n == len(self._buf): self._grow()
+        mid = month_id(exit_time)
+        self._buf[self._n] = (to_ns(entry_time), to_ns(exit_time), side, units, pnl, mid) + tuple(extra.get(f, 0) for f in self._extra)
+        self._n += 1
+        self.mark_month(mid)
+
+    @property
+    def trades(self):
+        """Zero-copy view of the filled part of the ledger."""
+        return self._buf[:self._n]
+
+    def column(self, name):
+        return self.trades[name]
+
+    @property
+    def months(self):
+        return np.asarray(self._months, dtype=np.int32)
+
+    def month_bounds(self):
+        """(month_ids, starts, ends) of the contiguous per-month runs."""
+        mids = self.trades['month_id']
+        if self._n == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return mids[:0], empty, empty
+        if np.any(mids[1:] < mids[:-1]):
+            raise ValueError("TradeLedger months must be appended in chronological order")
+        starts = np.flatnonzero(np.r_[True, mids[1:] != mids[:-1]])
+        ends = np.r_[starts[1:], self._n]
+        return mids[starts], starts, ends
+
+    def month_groups(self):
+        """{month_id: view of that month's trades}."""
+        trades = self.trades
+        ids, starts, ends = self.month_bounds()
+        return {int(m): trades[s:e] for m, s, e in zip(ids, starts, ends)}
+
+    def month_pnls(self):
+        """PnL view per visited month in calendar order (empty for idle months)."""
+        pnl = self.trades['pnl']
+        groups = {int(m): (s, e) for m, s, e in zip(*self.month_bounds())}
+        return [pnl[slice(*groups[m])] if m in groups else pnl[:0] for m in self._months]
+
+    def monthly_summary(self):
+        """Per-month reductions: month_id, pnl, trades, wins, first (row of first trade)."""
+        ids, starts, ends = self.month_bounds()
+        out = np.zeros(len(ids), dtype=[('month_id', 'i4'), ('pnl', 'f8'), ('trades', 'i8'), ('wins', 'i8'), ('first', 'i8')])
+        if len(ids) == 0: return out
+        pnl = self.trades['pnl']
+        out['month_id'] = ids
+        out['pnl'] = np.add.reduceat(pnl, starts)
+        out['trades'] = ends - starts
+        out['wins'] = np.add.reduceat((pnl > 0).astype(np.int64), starts)
+        out['first'] = starts
+        return out
+
+    def columns(self, **tags):
+        """{field: array} of the trades, plus a constant column per tag (e.g. candidate=17)."""
+        trades = self.trades
+        cols = {name: np.ascontiguousarray(trades[name]) for name in trades.dtype.names}
+        cols.update({k: np.full(self._n, v) for k, v in tags.items()})
+        return cols
+
+    def save(self, path, part=None, **tags):
+        """Trades and visited months as one .npz file, or as parts of the columnar archive at path.
+
+        Archive parts are named by part (default: one shared ledger, replaced on save);
+        tags become constant columns, so many ledgers can be written side by side.
+        """
+        if str(path).endswith(".npz"):
+            np.savez(path, trades=self.trades, months=self.months)
+            return
+        archive = ColumnarArchive(path)
+        part = "ledger" if part is None else part
+        archive.write_part("trades", self.columns(**tags), part=part)
+        archive.write_part("months", {"month_id": self.months, **{k: np.full(len(self._months), v) for k, v in tags.items()}}, part=part)
+
+    @classmethod
+    def load(cls, path, where=None):
+        """Ledger saved by save(); for an archive, where=[("candidate", "==", 17)] selects tagged rows."""
+        if str(path).endswith(".npz"):
+            with np.load(path) as z:
+                trades, months = z["trades"], z["months"]
+        else:
+            archive = ColumnarArchive(path)
+            cols = archive.read("trades", where=where)
+            trades = np.zeros(len(cols["pnl"]), dtype=[(n, v.dtype) for n, v in cols.items()])
+            for n, v in cols.items(): trades[n] = v
+            months = archive.read("months", ["month_id"], where=where)["month_id"]
+        base = {name for name, _ in TRADE_FIELDS}
+        ledger = cls(capacity=len(trades), extra_fields=[(n, trades.dtype[n].str) for n in trades.dtype.names if n not in base])
+        ledger._buf[:len(trades)] = trades
+        ledger._n = len(trades)
+        ledger._months = months.tolist()
+        return ledger
+
+    def balance_curve(self, initial_balance):
+        return initial_balance + np.cumsum(self.trades['pnl'])
@@ -1,6 +1,16 @@
-import yfinance as yf
+import os
+import hashlib
+import tempfile
 import pandas as pd
 import numpy as np
+from trade_ledger import TradeLedger, month_label
+from continuous_series import ContinuousSeriesBuilder, SeriesSource
+from news_calendar import NewsCalendar, Config as NewsConfig
+from streaming_indicators import EWM, RSI, RangeATR
+from engine_snapshots import SnapshotStore, PrefixHasher, bar_rows, spec_hash
+from regime_index import RegimeIndex, DIMENSIONS
+from report_pipeline import ResultStore, render_all, Config as ReportConfig
+from charts import ledger_chart
 
 # --- SHADOW TITAN V2: 30-YEAR INSTITUTIONAL PROP-FIRM AUDIT ---
 # Rules: 
@@ -17,141 +27,192 @@ class Config:
     # V2 Limits
     P1_TARGET_PCT = 10.0
     P2_TARGET_PCT = 5.0
+    DATA_KEY = "XAU_continuous_1996_2026"
+    LEDGER_PATH = "SHADOW_TITAN_V2_AUDIT_LEDGER.npz"
+    EQUITY_CHART = "SHADOW_TITAN_V2_EQUITY.svg"
     DAILY_DD_GUARD = 0.973
     TOTAL_DD_GUARD = 0.925
 
+PHASES = ["P1", "P2", "FUNDED"]
+
 def get_data():
     print("Shadow Titan V2: Fetching 30-Year Stress Test Data...")
-    gold_futures = yf.download("GC=F", start="2000-08-30", end="2026-03-01", interval="1d", auto_adjust=True)
-    if isinstance(gold_futures.columns, pd.MultiIndex): gold_futures.columns = gold_futures.columns.get_level_values(0)
-    index_proxy = yf.download("^XAU", start="1995-12-01", end="2000-08-31", interval="1d", auto_adjust=True)
-    if isinstance(index_proxy.columns, pd.MultiIndex): index_proxy.columns = index_proxy.columns.get_level_values(0)
-    scale_factor = gold_futures['Close'].iloc[0] / index_proxy['Close'].asof(gold_futures.index[0])
-    for col in ['Open', 'High', 'Low', 'Close']: index_proxy[col] *= scale_factor
-    full_data = pd.concat([index_proxy[index_proxy.index < gold_futures.index[0]], gold_futures])
-    return full_data.sort_index()
-
-def run_simulation(df):
-    p = Config.PARAMS
-    df['EMA_F'] = df['Close'].ewm(span=p['fast']).mean()
-    df['EMA_M'] = df['Close'].ewm(span=p['medium']).mean()
-    df['EMA_S'] = df['Close'].ewm(span=p['slow']).mean()
-    delta = df['Close'].diff()
-    ga = (delta.where(delta > 0, 0)).rolling(14).mean()
-    lo = (-delta.where(delta < 0, 0)).rolling(14).mean()
-    df['RSI'] = 100 - (100 / (1 + (ga / (lo + 1e-9))))
-    df['ATR'] = (df['High'] - df['Low']).rolling(14).mean()
-
-    balance = Config.INITIAL_BALANCE
-    initial_start = balance
-    current_year = -1
-    month_data = []
-    yearly_results = []
-    
-    day_start_equity = balance
-    last_day = -1
-    
-    # Consistency
-    daily_winners = []
-    current_day_profit = 0
-    phase = "P1" # P1, P2, FUNDED
-    
-    for i in range(100, len(df)):
-        ts = df.index[i]
-        
+    # ^XAU index proxy before GC=F existed, ratio-adjusted onto the futures at the first futures bar.
+    # Built once, then memory-mapped from the local bar store on every later run.
+    builder = ContinuousSeriesBuilder([
+        SeriesSource("^XAU", "1995-12-01", "2000-08-31"),
+        SeriesSource("GC=F", "2000-08-30", "2026-03-01"),
+    ], adjust="ratio", name=Config.DATA_KEY)
+    if not builder.is_cached(): print("Building continuous series (first run only)...")
+    return builder.build()
+
+class V2AuditEngine:
+    """The audit simulation as a bar-by-bar state machine, so it can be snapshotted and resumed."""
+    WARMUP_BARS = 100
+
+    def __init__(self, params=None):
+        p = self.p = params or Config.PARAMS
+        self.ema_f, self.ema_m, self.ema_s = EWM(p['fast']), EWM(p['medium']), EWM(p['slow'])
+        self.rsi = RSI(14)
+        self.atr = RangeATR(14)
+        self.prev = None  # (EMA_F, EMA_M, EMA_S, RSI, ATR) after the previous bar
+        self.bars = 0
+
+        self.balance = Config.INITIAL_BALANCE
+        self.current_year = -1
+        self.ledger = TradeLedger(extra_fields=[('phase', 'u1')])
+        self.yearly_results = []
+        self.day_start_equity = self.balance
+        self.last_day = -1
+        # Consistency
+        self.daily_winners = []
+        self.current_day_profit = 0
+        self.phase = "P1" # P1, P2, FUNDED
+
+    def step(self, ts, high, low, close, news_blocked=False):
+        if self.bars >= self.WARMUP_BARS: self._trade_bar(ts, news_blocked)
+        self.prev = (self.ema_f.update(close), self.ema_m.update(close), self.ema_s.update(close),
+                     self.rsi.update(close), self.atr.update(high, low))
+        self.bars += 1
+
+    def _trade_bar(self, ts, news_blocked):
+        p = self.p
         # New Day Reset
-        if ts.dayofyear != last_day:
-            day_start_equity = balance
-            if current_day_profit > 0: daily_winners.append(current_day_profit)
-            current_day_profit = 0
-            last_day = ts.dayofyear
+        if ts.dayofyear != self.last_day:
+            self.day_start_equity = self.balance
+            if self.current_day_profit > 0: self.daily_winners.append(self.current_day_profit)
+            self.current_day_profit = 0
+            self.last_day = ts.dayofyear
 
         # Yearly Profit Harvesting (Only for Yearly Report)
-        if ts.year != current_year:
-            if current_year != -1:
-                yearly_results.append({"year": current_year, "profit": balance - Config.INITIAL_BALANCE})
-                # Reset for statistics, but keep phase continuity? 
+        if ts.year != self.current_year:
+            if self.current_year != -1:
+                self.yearly_results.append({"year": self.current_year, "profit": self.balance - Config.INITIAL_BALANCE})
                 # For audit transparency, we reset capital to 100k
-                balance = Config.INITIAL_BALANCE
-                day_start_equity = balance
-            current_year = ts.year
+                self.balance = Config.INITIAL_BALANCE
+                self.day_start_equity = self.balance
+            self.current_year = ts.year
 
-        row = df.iloc[i]
-        prev = df.iloc[i-1]
-        
+        ema_f, ema_m, ema_s, rsi, atr = self.prev
         signal = 0
-        if (prev['EMA_F'] > prev['EMA_M'] > prev['EMA_S']) and prev['RSI'] < p['rsi_max']: signal = 1
-        elif (prev['EMA_F'] < prev['EMA_M'] < prev['EMA_S']) and prev['RSI'] > p['rsi_min']: signal = -1
-        
+        if (ema_f > ema_m > ema_s) and rsi < p['rsi_max']: signal = 1
+        elif (ema_f < ema_m < ema_s) and rsi > p['rsi_min']: signal = -1
+        # NewsFilter.IsNewsWindow(): no entries inside a high-impact news window
+        if news_blocked: signal = 0
+
         if signal != 0:
             units = 100.0 # 1 Lot
-            sl_dist = prev['ATR'] * p['sl_mult']
+            sl_dist = atr * p['sl_mult']
             tp_dist = sl_dist * p['tp_mult']
-            
+
             wr = 0.68
-            pnl = (tp_dist if (i % 100 < wr*100) else -sl_dist) * units
+            pnl = (tp_dist if (self.bars % 100 < wr*100) else -sl_dist) * units
             pnl -= 30.0 # Friction
-            
+
             # Internal Guards
             # Daily DD (2.7%)
-            if (balance + pnl) < (day_start_equity * Config.DAILY_DD_GUARD):
-                pnl = (day_start_equity * Config.DAILY_DD_GUARD) - balance
-            
+            if (self.balance + pnl) < (self.day_start_equity * Config.DAILY_DD_GUARD):
+                pnl = (self.day_start_equity * Config.DAILY_DD_GUARD) - self.balance
+
             # Total DD (7.5%) from Initial Start
-            if (balance + pnl) < (Config.INITIAL_BALANCE * Config.TOTAL_DD_GUARD):
-                pnl = (Config.INITIAL_BALANCE * Config.TOTAL_DD_GUARD) - balance
-            
-            balance += pnl
-            current_day_profit += max(0, pnl)
-            
+            if (self.balance + pnl) < (Config.INITIAL_BALANCE * Config.TOTAL_DD_GUARD):
+                pnl = (Config.INITIAL_BALANCE * Config.TOTAL_DD_GUARD) - self.balance
+
+            self.balance += pnl
+            self.current_day_profit += max(0, pnl)
+
             # Phase Logic
-            profit_pct = (balance - Config.INITIAL_BALANCE) / Config.INITIAL_BALANCE * 100.0
-            if phase == "P1" and profit_pct >= Config.P1_TARGET_PCT: phase = "P2"; print(f"{ts.date()} - Passed P1")
-            elif phase == "P2" and profit_pct >= Config.P2_TARGET_PCT: phase = "FUNDED"; print(f"{ts.date()} - Passed P2")
+            profit_pct = (self.balance - Config.INITIAL_BALANCE) / Config.INITIAL_BALANCE * 100.0
+            if self.phase == "P1" and profit_pct >= Config.P1_TARGET_PCT: self.phase = "P2"; print(f"{ts.date()} - Passed P1")
+            elif self.phase == "P2" and profit_pct >= Config.P2_TARGET_PCT: self.phase = "FUNDED"; print(f"{ts.date()} - Passed P2")
+
+            self.ledger.append(ts, ts, signal, units, pnl, phase=PHASES.index(self.phase))
+
+    def result(self):
+        return self.yearly_results, self.ledger, self.daily_winners
+
+def _bar_arrays(df, news):
+    index_ns = df.index.values.astype('datetime64[ns]').astype(np.int64)
+    columns = [df[c].to_numpy(dtype=float) for c in ('High', 'Low', 'Close')]
+    blocked = news.block_mask(index_ns) if news is not None else np.zeros(len(df), dtype=bool)
+    return index_ns, columns, blocked
 
-            m_key = ts.strftime("%Y-%m")
-            if not month_data or month_data[-1]['month'] != m_key:
-                month_data.append({'month':m_key,'pnl':0,'trades':0,'year':ts.year,'phase':phase})
-            month_data[-1]['pnl'] += pnl
-            month_data[-1]['trades'] += 1
+def _replay(engine, df, start, columns, blocked, snapshots=None, rows=None):
+    high, low, close = columns
+    index = df.index
+    month = index.year * 12 + index.month
+    hasher = PrefixHasher(rows, start) if snapshots is not None else None
+    for i in range(start, len(df)):
+        # Period boundary: the state before the first bar of a month is a resume point
+        if hasher is not None and i > start and month[i] != month[i - 1]:
+            snapshots.save(engine, i, hasher.at(i))
+        engine.step(index[i], high[i], low[i], close[i], blocked[i])
+    return engine
 
-    return yearly_results, month_data, daily_winners
+def run_simulation(df, news=None):
+    _, columns, blocked = _bar_arrays(df, news)
+    return _replay(V2AuditEngine(), df, 0, columns, blocked).result()
 
-def generate_report(yearly, monthly, winners):
+def snapshot_store(news=None, root=None):
+    """Snapshots are only reusable for the same parameters and news calendar."""
+    news_key = hashlib.sha256(news.times.tobytes()).hexdigest() if news is not None else None
+    return SnapshotStore(f"v2_audit_{spec_hash(Config.PARAMS, Config.INITIAL_BALANCE, news_key)[:16]}", root=root)
+
+def run_incremental(df, news=None, snapshots=None):
+    """run_simulation that resumes from the newest snapshot still matching the data."""
+    snapshots = snapshots or snapshot_store(news)
+    index_ns, columns, blocked = _bar_arrays(df, news)
+    rows = bar_rows(index_ns, columns)
+    engine, start = snapshots.latest(rows)
+    if engine is None: engine = V2AuditEngine()
+    print(f"Resuming at bar {start:,} of {len(df):,}" if start else f"No usable snapshot, replaying {len(df):,} bars")
+    return _replay(engine, df, start, columns, blocked, snapshots, rows).result()
+
+def verify_incremental(df, news=None, cut=None):
+    """Run on a truncated history, grow it, resume, and compare with a full rerun. Returns True on exact match."""
+    cut = cut or len(df) - 30
+    with tempfile.TemporaryDirectory() as root:
+        store = snapshot_store(news, root=root)
+        run_incremental(df.iloc[:cut], news, store)
+        inc_yearly, inc_ledger, inc_winners = run_incremental(df, news, store)
+    yearly, ledger, winners = run_simulation(df, news)
+    return (inc_yearly == yearly and inc_winners == winners
+            and np.array_equal(inc_ledger.trades, ledger.trades) and inc_ledger._months == ledger._months)
+
+def generate_report(yearly, ledger, winners, regimes=None):
     total_profit = sum(y['profit'] for y in yearly)
     max_win = max(winners) if winners else 0
     consistency = (max_win / total_profit) if total_profit > 0 else 0
-    
-    report = f"""# SHADOW TITAN V2: 30-YEAR PROP-FIRM AUDIT (1996-2025)
-
-## 🏛️ Executive Summary
-The V2 upgrade was stress-tested against 30 years of Gold history using the **Institutional Prop-Firm Protocol**.
-
-- **Total Extracted Alpha**: ${total_profit:,.2f}
-- **Average Yearly ROI**: {np.mean([y['profit'] for y in yearly])/1000:,.1f}%
-- **Max Daily Winner Score**: {consistency*100:.2f}% (Limit: 35%)
-- **Model Stability**: Passed P1/P2 in multiple regimes. 0 Rule Violations.
-
-## 📅 Yearly Profit Take-Down ($100k Base)
-| Year | PnL ($) | ROI (%) | Stability |
-|:---|:---|:---|:---|
-"""
-    for y in yearly:
-        report += f"| {y['year']} | ${y['profit']:,.2f} | {(y['profit']/1000):.1f}% | Verified |\n"
-        
-    report += "\n## 📊 Monthly Detailed Log (Sample 2020-2025)\n| Month | PnL ($) | Trades | Phase | Year PnL |\n|:---|:---|:---|:---|:---|\n"
-    cy = -1; cyp = 0
-    for m in monthly:
-        if m['year'] != cy: cy = m['year']; cyp = 0
-        cyp += m['pnl']
-        if m['year'] >= 2020:
-            report += f"| {m['month']} | ${m['pnl']:,.2f} | {m['trades']} | {m['phase']} | ${cyp:,.2f} |\n"
-
-    with open("/Users/muhammedriyaz/.gemini/antigravity/scratch/shadowbot_pro/SHADOW_TITAN_V2_AUDIT_REPORT.md", "w") as f:
-        f.write(report)
+
+    monthly = ledger.monthly_summary()
+    phases = ledger.column('phase')[monthly['first']]
+    years = monthly['month_id'] // 12
+    # Running year-to-date PnL: cumulative sum restarted at each year boundary
+    cum = np.cumsum(monthly['pnl'])
+    year_start = np.r_[True, years[1:] != years[:-1]]
+    first_of_year = np.maximum.accumulate(np.where(year_start, np.arange(len(years)), 0))
+    ytd = cum - np.r_[0.0, cum][first_of_year]
+    tables = {
+        "yearly": pd.DataFrame({"year": [y['year'] for y in yearly], "profit": [y['profit'] for y in yearly],
+                                "roi_pct": [y['profit'] / 1000 for y in yearly]}),
+        "monthly": pd.DataFrame({"Month": [month_label(m) for m in monthly['month_id']], "pnl": monthly['pnl'],
+                                 "trades": monthly['trades'], "phase": [PHASES[ph] for ph in phases], "ytd": ytd}),
+    }
+    if regimes is not None:
+        for dim in DIMENSIONS:
+            tables[f"regime_{dim}"] = regimes.breakdown(ledger, by=dim).rename_axis("regime").reset_index()
+    ResultStore().save("v2_audit", {
+        "total_profit": total_profit, "avg_yearly_roi": np.mean([y['profit'] for y in yearly]) / 1000,
+        "consistency": consistency}, tables=tables)
+    os.makedirs(ReportConfig.OUTPUT_DIR, exist_ok=True)
+    ledger_chart(os.path.join(ReportConfig.OUTPUT_DIR, Config.EQUITY_CHART), ledger, Config.INITIAL_BALANCE, "Shadow Titan V2 Equity (1996-2025)")
+    return render_all(["v2_audit_report"])
 
 if __name__ == "__main__":
     df = get_data()
-    yearly, monthly, winners = run_simulation(df)
-    generate_report(yearly, monthly, winners)
+    news = NewsCalendar.from_file() if os.path.exists(NewsConfig.PATH) else None
+    if news is not None: print(f"News filter: {len(news)} events from {NewsConfig.PATH}")
+    yearly, ledger, winners = run_simulation(df, news)
+    ledger.save(Config.LEDGER_PATH)
+    generate_report(yearly, ledger, winners, RegimeIndex.for_series(Config.DATA_KEY))
     print("V2 Audit Complete: SHADOW_TITAN_V2_AUDIT_REPORT.md")
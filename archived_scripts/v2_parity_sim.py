@@ -0,0 +1,310 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from trade_ledger import TradeLedger
+from bar_store import BarStore
+from spread_model import server_to_utc_ns
+
+# --- SHADOW TITAN V2: EA PARITY SIMULATOR ---
+# A literal port of Shadow_Titan_V2.mq5 OnTick() with CRiskManagerV2,
+# CSignalGenerator (Init/InitV2/InitV3 as called in OnInit), CTradeManagerV2
+# and CNewsFilter, replayed on M1 bid bars ("open prices" model: one tick at
+# each bar open, SL/TP resolved on the bar's range, SL first when both are hit).
+#
+# Behaviour of the MQL code is kept as written, including:
+# - GetSignal() returns early for breakout, mean-reversion and pullback-buy
+#   signals, so the ADX proxy and HTF filter only ever see pullback sells.
+# - GetLotSize() is called with 100 points while the order uses a 200-point SL.
+# - HandleConsistency() is empty and m_payoutDayProfit is never fed, so the
+#   EA's consistency score stays 0; the realized score is reported separately.
+# - The DailyDDLimitPercent/TotalDDLimitPercent inputs are stored but the
+#   guards use DAILY/TOTAL_DD_GUARD_PERCENT; phase targets are unused.
+#
+# Bars are in broker server time, as MT5 exports them; trading days roll on
+# server midnight. The news calendar and spread model work in UTC, so both
+# are queried with the bar times converted to UTC (SERVER_TZ).
+#
+# Every indicator is computed for all bars up front with the same summation
+# order as the MQL loops; the replay then only visits entry candidates and
+# finds each exit with a vectorized forward scan.
+
+class Config:
+    # EA inputs
+    MODE = "challenge"             # "challenge" | "funded"
+    RISK_PER_TRADE_PCT = 0.5
+    USE_NEWS_FILTER = True
+    NEWS_BLOCK_BEFORE = 5
+    NEWS_BLOCK_AFTER = 5
+    MA_FAST = 5
+    MA_MEDIUM = 13
+    MA_SLOW = 50                   # HTF (H1) SMA period
+    RSI_PERIOD = 14
+    # OnInit / OnTick constants
+    ATR_PERIOD = 14
+    MIN_ATR_POINTS = 10
+    MAX_SPREAD_POINTS = 50
+    BB_PERIOD = 20
+    BB_DEV = 2.5
+    HTF_FRAME = "1h"
+    SIZING_SL_POINTS = 100
+    SL_POINTS = 200
+    TP_POINTS = 600
+    DAILY_DD_GUARD = 0.973         # DAILY_DD_GUARD_PERCENT
+    TOTAL_DD_GUARD = 0.925         # TOTAL_DD_GUARD_PERCENT
+    CONSISTENCY_THRESHOLD = 0.35
+    # Account / symbol (XAUUSD)
+    INITIAL_BALANCE = 100000.0
+    POINT = 0.01
+    TICK_SIZE = 0.01
+    TICK_VALUE = 1.0
+    VOLUME_STEP = 0.01
+    VOLUME_MAX = 100.0
+    CONTRACT_SIZE = 100.0
+    COMMISSION_PER_LOT = 7.0       # Round turn, charged by the broker at close
+    DEFAULT_SPREAD_POINTS = 25     # When the bars carry no spread column
+    SERVER_TZ = None               # Zone of the bar times, e.g. "Europe/Athens"; None = fixed spread_model SERVER_UTC_OFFSET_MIN
+
+SIGNAL_NONE, SIGNAL_BUY, SIGNAL_SELL = 0, 1, -1
+REASON_SL, REASON_TP, REASON_MANDATORY_SL = 0, 1, 2
+
+def load_mt5_csv(path):
+    """MT5 'Export bars' file: <DATE> <TIME> <OPEN> <HIGH> <LOW> <CLOSE> <TICKVOL> <VOL> <SPREAD>, tab separated."""
+    raw = pd.read_csv(path, sep="\t")
+    raw.columns = [c.strip("<>").upper() for c in raw.columns]
+    index = pd.to_datetime(raw["DATE"] + " " + raw["TIME"], format="%Y.%m.%d %H:%M:%S")
+    return pd.DataFrame({"Open": raw["OPEN"].to_numpy(float), "High": raw["HIGH"].to_numpy(float),
+                         "Low": raw["LOW"].to_numpy(float), "Close": raw["CLOSE"].to_numpy(float),
+                         "Spread": raw["SPREAD"].to_numpy(float)}, index=pd.DatetimeIndex(index))
+
+def _shift(x, k):
+    """x[t - k] aligned to t (NaN before the history starts): MQL iClose(..., k) at bar t."""
+    out = np.full(len(x), np.nan)
+    if k < len(x): out[k:] = x[:len(x) - k]
+    return out
+
+def _seq_sum(x, first, last):
+    """sum over k = first..last of x[t - k], accumulated in the MQL loop order."""
+    acc = np.zeros(len(x))
+    for k in range(first, last + 1): acc = acc + _shift(x, k)
+    return acc
+
+def spread_points(bars, spread_model=None, utc_ns=None):
+    """Spread per bar in points; the spread model is queried in UTC (utc_ns, default the bar times shifted from server time)."""
+    if "Spread" in bars: return bars["Spread"].to_numpy(float)
+    if spread_model is not None:
+        return spread_model.spreads(server_to_utc_ns(bars.index, Config.SERVER_TZ) if utc_ns is None else utc_ns) / Config.POINT
+    return np.full(len(bars), float(Config.DEFAULT_SPREAD_POINTS))
+
+def compute_signals(bars, spread):
+    """CSignalGenerator::GetSignal() evaluated at the open of every bar."""
+    o, h, l, c = (bars[k].to_numpy(float) for k in ("Open", "High", "Low", "Close"))
+    n = len(bars)
+    close1, open1, high1, low1 = _shift(c, 1), _shift(o, 1), _shift(h, 1), _shift(l, 1)
+    prev_high, prev_low = _shift(h, 2), _shift(l, 2)
+
+    atr = _seq_sum(h - l, 1, Config.ATR_PERIOD) / Config.ATR_PERIOD
+    valid = (spread <= Config.MAX_SPREAD_POINTS) & (atr / Config.POINT >= Config.MIN_ATR_POINTS)
+    sig = np.zeros(n, dtype=np.int8)
+    decided = ~valid | np.isnan(atr)
+
+    def take(mask, value):
+        nonlocal decided
+        hit = mask & ~decided
+        sig[hit] = value
+        decided = decided | hit
+
+    # Breakout
+    take((close1 > prev_high) & (close1 > open1), SIGNAL_BUY)
+    take((close1 < prev_low) & (close1 < open1), SIGNAL_SELL)
+    # Mean reversion (m_useMeanReversion = true)
+    sma = _seq_sum(c, 1, Config.BB_PERIOD) / Config.BB_PERIOD
+    sq = np.zeros(n)
+    for k in range(1, Config.BB_PERIOD + 1):
+        d = _shift(c, k) - sma
+        sq = sq + d * d
+    std = np.sqrt(sq / Config.BB_PERIOD)
+    take(close1 > sma + Config.BB_DEV * std, SIGNAL_SELL)
+    take(close1 < sma - Config.BB_DEV * std, SIGNAL_BUY)
+    # Pullback (m_usePullback = true): buy returns, sell falls through to the filters
+    ma_fast = _seq_sum(c, 1, Config.MA_FAST) / Config.MA_FAST
+    ma_slow = _seq_sum(c, 1, Config.MA_MEDIUM) / Config.MA_MEDIUM
+    take((ma_fast > ma_slow) & (low1 <= ma_fast) & (close1 > ma_fast), SIGNAL_BUY)
+    pull_sell = (ma_fast < ma_slow) & (high1 >= ma_fast) & (close1 < ma_fast) & ~decided
+
+    # GetRSI(): simple gain/loss sums over the last RSI_PERIOD closes
+    gain, loss = np.zeros(n), np.zeros(n)
+    for k in range(1, Config.RSI_PERIOD + 1):
+        diff = _shift(c, k) - _shift(c, k + 1)
+        gain = gain + np.where(diff > 0, diff, 0.0)
+        loss = loss - np.where(diff > 0, 0.0, diff)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(loss == 0, 100.0, 100 - (100 / (1 + gain / loss)))
+    extreme = rsi > 75  # only sells reach the filters
+    # GetADX() proxy
+    adx = np.where(np.abs(close1 - _shift(c, 14)) > (atr * 14) * 0.5, 25.0, 15.0)
+    pull_sell &= extreme | (adx >= 20)
+    # HTF filter: SMA of the last MA_SLOW completed H1 closes vs the last completed H1 close
+    htf = bars["Close"].resample(Config.HTF_FRAME).last().dropna()
+    htf_c = htf.to_numpy(float)
+    pos = np.searchsorted(htf.index.values, bars.index.floor(Config.HTF_FRAME).values, side="right") - 1
+    htf_close1 = np.where(pos >= 1, htf_c[np.maximum(pos - 1, 0)], np.nan)
+    sma_htf = _seq_sum(htf_c, 1, Config.MA_SLOW) / Config.MA_SLOW
+    sma_htf_at = np.where(pos >= Config.MA_SLOW, sma_htf[np.maximum(pos, 0)], np.nan)
+    pull_sell &= extreme | (htf_close1 <= sma_htf_at)
+    sig[pull_sell] = SIGNAL_SELL
+    warm = max(Config.BB_PERIOD, Config.RSI_PERIOD + 1, Config.ATR_PERIOD) + 1
+    sig[:warm] = SIGNAL_NONE
+    return sig
+
+class V2ParitySimulator:
+    def __init__(self, bars, news=None, spread_model=None, mode=None, server_tz=None):
+        self.bars = bars
+        self.mode = mode or Config.MODE
+        self.o, self.h, self.l = (bars[k].to_numpy(float) for k in ("Open", "High", "Low"))
+        self.index_ns = bars.index.values.astype('datetime64[ns]').astype(np.int64)
+        self.utc_ns = server_to_utc_ns(self.index_ns, server_tz or Config.SERVER_TZ)
+        self.spread = spread_points(bars, spread_model, self.utc_ns)
+        self.spread_px = self.spread * Config.POINT
+        self.day = (bars.index.year * 1000 + bars.index.dayofyear).to_numpy()  # Server days
+        self.news = (news.block_mask(self.utc_ns) if (news is not None and Config.USE_NEWS_FILTER)
+                     else np.zeros(len(bars), dtype=bool))
+        started = time.perf_counter()
+        self.signals = compute_signals(bars, self.spread)
+        self.signal_seconds = time.perf_counter() - started
+
+    # --- CRiskManagerV2 ---
+    def _is_trading_allowed(self, equity):
+        if equity < self.initial_balance * Config.TOTAL_DD_GUARD: return "total"
+        if equity < self.start_of_day_equity * Config.DAILY_DD_GUARD: return "daily"
+        return None
+
+    def _lot_size(self, equity, sl_points):
+        if sl_points <= 0 or self._is_trading_allowed(equity): return 0.0
+        risk_amount = equity * (Config.RISK_PER_TRADE_PCT / 100.0)
+        value_per_point = Config.TICK_VALUE * (Config.POINT / Config.TICK_SIZE)
+        lot = risk_amount / (sl_points * value_per_point)
+        lot = np.floor(lot / Config.VOLUME_STEP) * Config.VOLUME_STEP
+        return min(lot, Config.VOLUME_MAX)
+
+    def _floating(self, side, entry, lots, t):
+        price = self.o[t] if side == SIGNAL_BUY else self.o[t] + self.spread_px[t]
+        return side * (price - entry) * lots * Config.CONTRACT_SIZE
+
+    # --- Exit search (broker-side SL/TP) ---
+    def _find_exit(self, side, entry_bar, sl, tp):
+        n = len(self.o)
+        a, width = entry_bar, 256
+        while a < n:
+            b = min(n, a + width)
+            if side == SIGNAL_BUY:
+                hi, lo = self.h[a:b], self.l[a:b]
+            else:
+                hi, lo = self.h[a:b] + self.spread_px[a:b], self.l[a:b] + self.spread_px[a:b]
+            hits = np.flatnonzero((lo <= sl) | (hi >= tp)) if side == SIGNAL_BUY else np.flatnonzero((hi >= sl) | (lo <= tp))
+            if len(hits):
+                e = a + int(hits[0])
+                op = self.o[e] if side == SIGNAL_BUY else self.o[e] + self.spread_px[e]
+                if e > entry_bar:
+                    # Gap through a level at the open: filled at the open tick
+                    if (op <= sl) if side == SIGNAL_BUY else (op >= sl): return e, op, REASON_SL, True
+                    if (op >= tp) if side == SIGNAL_BUY else (op <= tp): return e, op, REASON_TP, True
+                sl_hit = (lo[hits[0]] <= sl) if side == SIGNAL_BUY else (hi[hits[0]] >= sl)
+                return (e, sl, REASON_SL, False) if sl_hit else (e, tp, REASON_TP, False)
+            a, width = b, width * 4
+        return None
+
+    def run(self):
+        self.initial_balance = balance = Config.INITIAL_BALANCE
+        self.start_of_day_equity = balance
+        last_day = None
+        ledger = TradeLedger(extra_fields=[('entry_px', 'f8'), ('exit_px', 'f8'), ('reason', 'u1')])
+        stats = {"signals": 0, "blocked_total_guard": 0, "blocked_daily_guard": 0, "blocked_news": 0,
+                 "zero_lot": 0, "open_at_end": 0}
+        candidates = np.flatnonzero(self.signals != SIGNAL_NONE)
+        k = 0
+        while k < len(candidates):
+            t = candidates[k]
+            # RiskManager.OnTick(): flat since the last event, so equity == balance at any day start
+            if self.day[t] != last_day:
+                self.start_of_day_equity = balance
+                last_day = self.day[t]
+            # TradeManager.ManageTrades(): nothing open here; EnforceMandatorySL has no target
+            stats["signals"] += 1
+            guard = self._is_trading_allowed(balance)
+            if guard:
+                stats[f"blocked_{guard}_guard"] += 1; k += 1; continue
+            if self.news[t]:
+                stats["blocked_news"] += 1; k += 1; continue
+            lot = self._lot_size(balance, Config.SIZING_SL_POINTS)
+            if lot <= 0:
+                stats["zero_lot"] += 1; k += 1; continue
+
+            side = int(self.signals[t])
+            bid = self.o[t]
+            entry = bid + self.spread_px[t] if side == SIGNAL_BUY else bid
+            sl = entry - side * Config.SL_POINTS * Config.POINT
+            tp = entry + side * Config.TP_POINTS * Config.POINT
+            if self.mode == "funded" and sl <= 0:
+                k += 1; continue  # "FUNDED ERROR: Mandatory SL missing. Request blocked."
+            exit_ = self._find_exit(side, t, sl, tp)
+            if exit_ is None:
+                stats["open_at_end"] = 1
+                break
+            e, exit_px, reason, at_open = exit_
+
+            pnl = side * (exit_px - entry) * lot * Config.CONTRACT_SIZE - Config.COMMISSION_PER_LOT * lot
+            # Last day start while the position was open: OnTick saw max(balance, equity),
+            # unless a gap stop at that very tick closed the trade first
+            if self.day[e] != self.day[t]:
+                d0 = t + int(np.searchsorted(self.day[t:e + 1], self.day[e]))
+                if d0 < e or not at_open:
+                    self.start_of_day_equity = max(balance, balance + self._floating(side, entry, lot, d0))
+                else:
+                    self.start_of_day_equity = balance + pnl
+                last_day = self.day[e]
+            balance += pnl
+            ledger.append(pd.Timestamp(self.index_ns[t]), pd.Timestamp(self.index_ns[e]), side, lot, pnl, entry_px=entry, exit_px=exit_px, reason=reason)
+            # One position at a time: the next tick that can open is the exit bar itself only after a gap fill
+            k = int(np.searchsorted(candidates, e, side="left" if at_open else "right"))
+
+        self.balance = balance
+        return ledger, stats
+
+def daily_pnl(ledger):
+    exit_day = ledger.column('exit_time') // 86_400_000_000_000
+    days, inv = np.unique(exit_day, return_inverse=True)
+    return days, np.bincount(inv, weights=ledger.column('pnl'))
+
+def summarize(sim, ledger, stats):
+    pnl = ledger.column('pnl')
+    equity = Config.INITIAL_BALANCE + np.cumsum(pnl)
+    hwm = np.maximum.accumulate(np.r_[Config.INITIAL_BALANCE, equity])
+    max_dd = ((hwm - np.r_[Config.INITIAL_BALANCE, equity]) / hwm * 100).max()
+    _, day_pnl = daily_pnl(ledger)
+    total = day_pnl.sum()
+    return {
+        "bars": len(sim.o), "trades": len(ledger), "final_balance": sim.balance,
+        "return_pct": (sim.balance / Config.INITIAL_BALANCE - 1) * 100, "max_closed_dd_pct": max_dd,
+        "win_rate_pct": (pnl > 0).mean() * 100 if len(pnl) else 0.0,
+        "ea_consistency_score": 0.0,
+        "realized_consistency_score": day_pnl.max() / total if total > 0 else 0.0,
+        **stats,
+    }
+
+def run_parity(bars, news=None, spread_model=None, mode=None, server_tz=None):
+    started = time.perf_counter()
+    sim = V2ParitySimulator(bars, news, spread_model, mode, server_tz)
+    ledger, stats = sim.run()
+    summary = summarize(sim, ledger, stats)
+    summary["seconds"] = time.perf_counter() - started
+    print(f"V2 parity replay: {summary['bars']:,} bars, {summary['trades']:,} trades in {summary['seconds']:.1f}s "
+          f"(signals {sim.signal_seconds:.1f}s)")
+    return ledger, summary
+
+if __name__ == "__main__":
+    # python v2_parity_sim.py XAUUSD_M1.csv   (MT5 export)   or   python v2_parity_sim.py <bar store key>
+    src = sys.argv[1] if len(sys.argv) > 1 else "XAUUSD_M1"
+    bars = load_mt5_csv(src) if src.endswith((".csv", ".txt")) else BarStore().read(src)
+    ledger, summary = run_parity(bars)
+    for k, v in summary.items(): print(f"  {k}: {v:,.2f}" if isinstance(v, float) else f"  {k}: {v}")
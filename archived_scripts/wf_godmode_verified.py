@@ -1,9 +1,11 @@
 import yfinance as yf
 import pandas as pd
-import numpy as np
 import os
-from itertools import product
+from itertools import islice
 import multiprocessing as mp
+from rng_streams import RandomStreams
+from search_space import SearchSpace, ordered
+from report_pipeline import ResultStore, render_all
 
 # --- SHADOW TITAN: GOD-MODE SOVEREIGN OPTIMIZER (10Y) ---
 class Config:
@@ -18,10 +20,15 @@ class Config:
     
     # Friction
     SLIPPAGE = 0.5
+    
+    # Reproducibility: every candidate shares the same per-bar draws
+    SEED = 2016
+    COMMON_RANDOM_NUMBERS = True
 
 class TitanGodEngine:
-    def __init__(self, data):
+    def __init__(self, data, streams=None):
         self.data = data
+        self.streams = streams if streams is not None else RandomStreams(Config.SEED, common=Config.COMMON_RANDOM_NUMBERS)
 
     def backtest(self, p):
         df = self.data.copy()
@@ -44,6 +51,7 @@ class TitanGodEngine:
         month_hwm = balance
         
         start_idx = 200
+        draws = self.streams.bar_draws(len(df))
         for i in range(start_idx, len(df)):
             ts = df.index[i]
             
@@ -92,7 +100,7 @@ class TitanGodEngine:
                 # If absolute change is strong, win probability increases
                 p_win = 0.92 if (abs(c-o) > atr * 0.2) else 0.82
                 
-                outcome = 1 if np.random.random() < p_win else -1
+                outcome = 1 if draws[i] < p_win else -1
                 
                 # PnL with Friktion
                 pnl = (tp_dist if outcome == 1 else -sl_dist) * units
@@ -113,7 +121,7 @@ def run():
     if isinstance(raw.columns, pd.MultiIndex): raw.columns = raw.columns.get_level_values(0)
     
     # Sovereign Search Space
-    params = {
+    space = SearchSpace({
         'fast': [5, 8],
         'medium': [13, 21],
         'slow': [50, 200],
@@ -122,15 +130,17 @@ def run():
         'sl_mult': [1.0, 1.2],
         'tp_mult': [4.0, 5.0],
         'risk': [1.0, 1.5]
-    }
+    }, constraints=[ordered('fast', 'medium', 'slow'), ordered('rsi_min', 'rsi_max')])
+    print(f"Sweeping God-Mode search space: {space.describe()}")
     
-    combos = [dict(zip(params.keys(), v)) for v in product(*params.values())]
-    print(f"Sweeping {len(combos)} God-Mode configurations...")
+    streams = RandomStreams(Config.SEED, common=Config.COMMON_RANDOM_NUMBERS)
+    print(f"Random streams: {streams.describe()}")
     
     results = []
     # Using small batch for speed demonstration
-    for p in combos[:50]:
-        results.append((p, TitanGodEngine(raw).backtest(p)))
+    for p in islice(space, 50):
+        cand_streams = streams if streams.common else streams.child()
+        results.append((p, TitanGodEngine(raw, cand_streams).backtest(p)))
     
     results.sort(key=lambda x: x[1]['avg'], reverse=True)
     top = results[0]
@@ -139,29 +149,8 @@ def run():
     print(f"Avg Monthly: {top[1]['avg']:.2f}%")
     print(f"Success Rate (Months > 15%): {top[1]['success']:.1f}%")
     
-    # Final Full Run and Report
-    report = f"""# SHADOW TITAN V1: 10-YEAR GOD-MODE AUDIT (2016-2026)
-## 👑 The Sovereign Performance Proof
-
-This audit certifies the SHADOW TITAN V1 for institutional deployment under strict 2% drawdown mandates while targeting 20% average monthly profit.
-
-### 📊 Performance Summary
-- **Avg Monthly Profit**: {top[1]['avg']:.2f}%
-- **Max Monthly Drawdown**: Below 1.95% (Guaranteed by Hard-Stop Logic)
-- **Win Rate (Alpha Sim)**: 82% - 92% (High Frequency Impulse)
-- **10-Year Growth**: Stable and persistent.
-
-### 🧬 Sovereign Parameters
-- **EMA Stack**: {top[0]['fast']} / {top[0]['medium']} / {top[0]['slow']}
-- **RSI Sniper**: {top[0]['rsi_min']} - {top[0]['rsi_max']}
-- **Risk Profile**: {top[0]['risk']}% Baseline (Dynamic Throttling Enabled).
-
----
-*Verified by Alpha-Generation Protocol.*
-"""
-    with open("/Users/muhammedriyaz/.gemini/antigravity/scratch/shadowbot_pro/SHADOW_TITAN_GOD_MODE_AUDIT.md", "w") as f:
-        f.write(report)
-    print("God-Mode Audit Generated.")
+    ResultStore().save("god_mode_sweep", {"best_params": top[0], "best": top[1], "candidates": len(results)})
+    print(f"God-Mode Sweep: {render_all(['god_mode_sweep'])}")
 
 if __name__ == "__main__":
     run()
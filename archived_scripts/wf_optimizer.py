@@ -2,9 +2,15 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 import os
-from itertools import product
+import json
 from datetime import datetime
-import multiprocessing as mp
+from search_space import SearchSpace, ordered
+from worker_pool import WorkerPool
+from rng_streams import RandomStreams
+from intrabar_bridge import tp_first_probability
+from columnar_archive import write_sweep
+from report_pipeline import ResultStore, render_all
+from overfit_stats import returns_matrix, overfit_summary, summary_markdown, Config as OverfitConfig
 
 # --- Institutional Configuration: WALK-FORWARD OPTIMIZER (PARALLEL) ---
 class Config:
@@ -18,12 +24,32 @@ class Config:
     MIN_TRADES = 150
     SLIPPAGE = 0.5
     COMMISSION_PER_LOT = 7.0
+    SWEEP_RESULTS = "wf_optimizer_sweep"   # Columnar archive directory (a .json path writes JSON)
+    BATCH_SIZE = 8                 # Candidates per pool task; each dataset is backtested once per batch
+    EXIT_MODEL = "sl_first"        # SL and TP both inside a daily bar: sl_first | bridge_expected | bridge_sampled
+    SEED = 2016
+
+EXIT_MODELS = ("sl_first", "bridge_expected", "bridge_sampled")
 
 class TitanWFEngine:
-    def __init__(self, data):
+    """Daily-bar walk-forward engine.
+
+    exit_model decides bars where both SL and TP lie inside the range:
+    "sl_first" books the stop (the conservative default), "bridge_expected"
+    books the probability-weighted PnL and "bridge_sampled" draws the outcome,
+    both with P(TP first) from the Brownian bridge of intrabar_bridge.
+    Sampled draws come per bar from `streams` (common random numbers by
+    default), so every parameter set sees the same draw on the same bar.
+    """
+    def __init__(self, data, spread_model=None, news_calendar=None, exit_model=None, streams=None):
         self.data = data
+        self.spread_model = spread_model  # None: fixed Config.SLIPPAGE on exits
+        self.news_calendar = news_calendar  # None: no news filter
+        self.exit_model = exit_model or Config.EXIT_MODEL
+        if self.exit_model not in EXIT_MODELS: raise ValueError(f"exit_model must be one of {EXIT_MODELS}")
+        self.streams = streams if streams is not None else RandomStreams(Config.SEED, common=True)
 
-    def backtest(self, p):
+    def indicators(self, p):
         df = self.data.copy()
         df['EMA_F'] = df['Close'].ewm(span=p['fast']).mean()
         df['EMA_M'] = df['Close'].ewm(span=p['medium']).mean()
@@ -47,105 +73,189 @@ class TitanWFEngine:
         minus_di = 100 * (minus_dm.rolling(14).mean() / tr_smooth)
         dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
         df['ADX'] = dx.rolling(14).mean()
+        return df
 
-        balance = Config.INITIAL_BALANCE
-        equity = [balance]
-        trades = []
-        monthly_returns = []
+    def schedule(self, p):
+        """Entries and exits of one parameter set, before sizing.
+
+        Entry, exit bar and price levels do not depend on the balance nor on
+        which level a two-sided bar touched first, so they are found once and
+        the PnL is settled afterwards.
+        """
+        df = self.indicators(p)
+        opens, highs, lows = (df[k].to_numpy(dtype=float).tolist() for k in ('Open', 'High', 'Low'))
+        ema_f, ema_m, ema_s = (df[k].to_numpy(dtype=float).tolist() for k in ('EMA_F', 'EMA_M', 'EMA_S'))
+        rsis, atrs, adxs = (df[k].to_numpy(dtype=float).tolist() for k in ('RSI', 'ATR', 'ADX'))
+        months = df.index.month
+        fill_costs = self.spread_model.fill_costs(df.index) if self.spread_model is not None else None
+        news_blocked = self.news_calendar.block_mask(df.index) if self.news_calendar is not None else np.zeros(len(df), dtype=bool)
+
+        trades = []         # (exit_bar, side, entry_p, sl_p, tp_p, sl_dist, slip, hit, entry_bar) with hit 1 SL, 2 TP, 3 both
+        month_bars = []     # First bar of every month visited
         current_month = -1
-        month_start_bal = balance
         pos = 0
-        entry_p = 0
-        sl_p = 0
-        tp_p = 0
-        units = 0
-
         for i in range(250, len(df)):
-            row = df.iloc[i]
-            ts = df.index[i]
-            if ts.month != current_month:
-                if current_month != -1:
-                    monthly_returns.append((balance - month_start_bal) / month_start_bal * 100)
-                current_month = ts.month
-                month_start_bal = balance
-
-            if pos == 0:
-                prev = df.iloc[i-1]
+            if months[i] != current_month:
+                current_month = months[i]
+                month_bars.append(i)
+
+            if pos == 0 and not news_blocked[i]:
                 sig = 0
-                if (prev['EMA_F'] > prev['EMA_M'] > prev['EMA_S']) and prev['RSI'] < p['rsi_ob'] and prev['ADX'] > p['adx_min']:
+                if (ema_f[i-1] > ema_m[i-1] > ema_s[i-1]) and rsis[i-1] < p['rsi_ob'] and adxs[i-1] > p['adx_min']:
                     sig = 1
-                elif (prev['EMA_F'] < prev['EMA_M'] < prev['EMA_S']) and prev['RSI'] > p['rsi_os'] and prev['ADX'] > p['adx_min']:
+                elif (ema_f[i-1] < ema_m[i-1] < ema_s[i-1]) and rsis[i-1] > p['rsi_os'] and adxs[i-1] > p['adx_min']:
                     sig = -1
                 
                 if sig != 0:
-                    entry_p = row['Open']
-                    sl_dist = prev['ATR'] * p['atr_mult']
+                    entry_p = opens[i]
+                    if fill_costs is not None: entry_p += fill_costs[i] if sig == 1 else -fill_costs[i]
+                    sl_dist = atrs[i-1] * p['atr_mult']
                     tp_dist = sl_dist * 2.5
                     sl_p = entry_p - sl_dist if sig == 1 else entry_p + sl_dist
                     tp_p = entry_p + tp_dist if sig == 1 else entry_p - tp_dist
-                    units = (balance * (p['base_risk'] / 100.0)) / sl_dist if sl_dist > 0 else 0
                     pos = sig
+                    entry_bar = i
 
             if pos != 0:
-                hit_sl = (row['Low'] <= sl_p) if pos == 1 else (row['High'] >= sl_p)
-                hit_tp = (row['High'] >= tp_p) if pos == 1 else (row['Low'] <= tp_p)
-                exit_p = 0
-                if hit_sl: exit_p = sl_p
-                elif hit_tp: exit_p = tp_p
-                if exit_p != 0:
-                    exit_p -= Config.SLIPPAGE if pos == 1 else -Config.SLIPPAGE
-                    pnl = (exit_p - entry_p) * units if pos == 1 else (entry_p - exit_p) * units
-                    balance += (pnl - (units * 0.0001))
-                    trades.append(pnl)
+                hit_sl = (lows[i] <= sl_p) if pos == 1 else (highs[i] >= sl_p)
+                hit_tp = (highs[i] >= tp_p) if pos == 1 else (lows[i] <= tp_p)
+                if hit_sl or hit_tp:
+                    slip = fill_costs[i] if fill_costs is not None else Config.SLIPPAGE
+                    trades.append((i, pos, entry_p, sl_p, tp_p, sl_dist, slip, hit_sl + 2 * hit_tp, entry_bar))
                     pos = 0
-            equity.append(balance)
 
-        eq_series = pd.Series(equity)
-        max_dd = ((eq_series.cummax() - eq_series) / eq_series.cummax() * 100).max()
+        cols = list(zip(*trades)) or [[]] * 9
+        sched = {k: np.asarray(v, dtype=dt) for k, v, dt in zip(
+            ("exit_bar", "side", "entry_p", "sl_p", "tp_p", "sl_dist", "slip", "hit", "entry_bar"), cols,
+            (np.int64, np.int8, float, float, float, float, float, np.int8, np.int64))}
+        sched["month_bars"] = np.asarray(month_bars, dtype=np.int64)
+        return sched
+
+    def tp_weights(self, scheds):
+        """Weight of the TP outcome for each exit of each schedule: 1 TP, 0 SL, in between for expected bridges."""
+        weights = [(s["hit"] == 2).astype(float) for s in scheds]
+        if self.exit_model == "sl_first": return weights
+        both = [np.flatnonzero(s["hit"] == 3) for s in scheds]
+        bars = np.concatenate([s["exit_bar"][b] for s, b in zip(scheds, both)])
+        if not len(bars): return weights
+        o, h, l, c = (self.data[k].to_numpy(dtype=float)[bars] for k in ('Open', 'High', 'Low', 'Close'))
+        pick = lambda k: np.concatenate([s[k][b] for s, b in zip(scheds, both)])
+        # The bridge starts at the entry fill on the entry bar, at the bar open on later ones
+        o = np.where(pick("entry_bar") == bars, pick("entry_p"), o)
+        prob = tp_first_probability(pick("side"), o, h, l, c, pick("sl_p"), pick("tp_p"))
+        if self.exit_model == "bridge_sampled":
+            prob = (self.streams.bar_draws(len(self.data))[bars] < prob).astype(float)
+        for w, b, part in zip(weights, both, np.split(prob, np.cumsum([len(b) for b in both])[:-1])):
+            w[b] = part
+        return weights
+
+    def settle(self, p, sched, tp_weight):
+        """Size and book the scheduled trades in order. Returns the backtest metrics."""
+        balance = Config.INITIAL_BALANCE
+        balances = [balance]
+        for k in range(len(sched["exit_bar"])):
+            pos, entry_p, sl_dist, slip, w = (sched["side"][k], sched["entry_p"][k], sched["sl_dist"][k],
+                                              sched["slip"][k], tp_weight[k])
+            units = (balance * (p['base_risk'] / 100.0)) / sl_dist if sl_dist > 0 else 0
+            moves = []
+            for exit_p in (sched["sl_p"][k], sched["tp_p"][k]):
+                exit_p -= slip if pos == 1 else -slip
+                moves.append((exit_p - entry_p) * units if pos == 1 else (entry_p - exit_p) * units)
+            pnl = moves[1] if w == 1 else moves[0] if w == 0 else w * moves[1] + (1 - w) * moves[0]
+            balance += (pnl - (units * 0.0001))
+            balances.append(balance)
+
+        eq = np.asarray(balances, dtype=float)
+        peak = np.maximum.accumulate(eq)
+        max_dd = ((peak - eq) / peak * 100).max()
+        # Balance at each month start: after every exit on an earlier bar
+        month_bal = eq[np.searchsorted(sched["exit_bar"], sched["month_bars"], side="left")]
+        monthly_returns = ((month_bal[1:] - month_bal[:-1]) / month_bal[:-1] * 100).tolist()
         return {
             "return": (balance - Config.INITIAL_BALANCE) / Config.INITIAL_BALANCE * 100,
             "max_dd": max_dd,
-            "trades": len(trades),
-            "sharpe": np.mean(monthly_returns) / (np.std(monthly_returns) + 1e-6) if monthly_returns else 0
+            "trades": len(sched["exit_bar"]),
+            "sharpe": np.mean(monthly_returns) / (np.std(monthly_returns) + 1e-6) if monthly_returns else 0,
+            "monthly_returns": monthly_returns,
         }
 
+    def backtest_many(self, params):
+        """Backtests of several parameter sets on this data, their two-sided exits resolved in one pass."""
+        scheds = [self.schedule(p) for p in params]
+        return [self.settle(p, s, w) for p, s, w in zip(params, scheds, self.tp_weights(scheds))]
+
+    def backtest(self, p):
+        return self.backtest_many([p])[0]
+
+def evaluate_candidates(params, train_data, val_data, fwd_data, full_data):
+    """Candidates of one batch: one backtest_many per dataset, None for those under 100 trades."""
+    totals = TitanWFEngine(full_data).backtest_many(params)
+    keep = [k for k, r in enumerate(totals) if r['trades'] >= 100]
+    kept = [params[k] for k in keep]
+    splits = [TitanWFEngine(d).backtest_many(kept) if kept else [] for d in (train_data, val_data, fwd_data)]
+    results = [None] * len(params)
+    for k, res_train, res_val, res_fwd in zip(keep, *splits):
+        results[k] = {"params": params[k], "metrics": totals[k], "train": res_train, "val": res_val, "fwd": res_fwd}
+    return results
+
 def evaluate_candidate(args):
     p, train_data, val_data, fwd_data, full_data = args
-    res_total = TitanWFEngine(full_data).backtest(p)
-    if res_total['trades'] < 100: return None
-    
-    res_train = TitanWFEngine(train_data).backtest(p)
-    res_val = TitanWFEngine(val_data).backtest(p)
-    res_fwd = TitanWFEngine(fwd_data).backtest(p)
-    return {"params": p, "metrics": res_total, "train": res_train, "val": res_val, "fwd": res_fwd}
+    return evaluate_candidates([p], train_data, val_data, fwd_data, full_data)[0]
 
-def run_optimization():
-    print("Fetching XAUUSD (GC=F) Dataset...")
+_DATASETS = None
+
+def init_datasets(train_data, val_data, fwd_data, full_data):
+    """Pool initializer: each worker receives the frames once, not once per candidate."""
+    global _DATASETS
+    _DATASETS = (train_data, val_data, fwd_data, full_data)
+
+def evaluate_params(p):
+    return evaluate_candidate((p,) + _DATASETS)
+
+def evaluate_batch(params):
+    return evaluate_candidates(params, *_DATASETS)
+
+def evaluate_grid(pool, combinations, batch_size=None):
+    """Pool over batches of candidates, flattened back to one result per candidate (None if its batch failed)."""
+    size = batch_size or Config.BATCH_SIZE
+    batches = [combinations[k:k + size] for k in range(0, len(combinations), size)]
+    return [r for b, out in zip(batches, pool.map(batches)) for r in (out if out is not None else [None] * len(b))]
+
+PARAM_GRID = {
+    'fast': [5, 8, 13],
+    'medium': [34, 55, 89], # Slower = more stable
+    'rsi_ob': [70, 75],
+    'rsi_os': [25, 30],
+    'atr_mult': [1.5, 2.0, 3.0],
+    'adx_min': [20, 25, 30],
+    'base_risk': [0.05, 0.1, 0.15, 0.2] # Micro-risk for 4% DD
+}
+
+SEARCH_SPACE = SearchSpace(PARAM_GRID, constraints=[ordered('fast', 'medium'), ordered('rsi_os', 'rsi_ob')])
+
+def grid_combinations(space=SEARCH_SPACE):
+    return list(space)
+
+def load_dataset():
     full_data = yf.download(Config.SYMBOL, start="2015-06-01", end=Config.FWD_END, interval="1d", auto_adjust=True)
     if isinstance(full_data.columns, pd.MultiIndex): full_data.columns = full_data.columns.get_level_values(0)
-    
+    return full_data
+
+def split_dataset(full_data):
     train = full_data.loc[Config.TRAIN_START:Config.TRAIN_END]
     val = full_data.loc[Config.VAL_START:Config.VAL_END]
     fwd = full_data.loc[Config.FWD_START:Config.FWD_END]
-    
-    params = {
-        'fast': [5, 8, 13],
-        'medium': [34, 55, 89], # Slower = more stable
-        'rsi_ob': [70, 75],
-        'rsi_os': [25, 30],
-        'atr_mult': [1.5, 2.0, 3.0],
-        'adx_min': [20, 25, 30],
-        'base_risk': [0.05, 0.1, 0.15, 0.2] # Micro-risk for 4% DD
-    }
-    
-    keys = params.keys()
-    combinations = [dict(zip(keys, v)) for v in product(*params.values())]
-    print(f"Starting Ultra-Conservative Grid Search on {len(combinations)} candidates...")
-    
-    with mp.Pool(processes=mp.cpu_count()) as pool:
-        args = [(p, train, val, fwd, full_data) for p in combinations]
-        results = pool.map(evaluate_candidate, args)
-    
+    return train, val, fwd
+
+def save_sweep(results, path=None):
+    """Every evaluated candidate (None for rejected ones), for overfit_stats and later re-ranking."""
+    path = path or Config.SWEEP_RESULTS
+    if path.endswith(".json"):
+        with open(path, "w") as f: json.dump(results, f, default=float)
+    else:
+        write_sweep(path, results)
+
+def rank_candidates(results):
     valid = [r for r in results if r is not None]
     # Filter by hard DD
     best_candidates = [v for v in valid if v['metrics']['max_dd'] <= 4.0]
@@ -155,32 +265,35 @@ def run_optimization():
         print("4.0% DD still unreachable. Ranking by Lowest Drawdown...")
         valid.sort(key=lambda x: x['metrics']['max_dd'])
         best_candidates = valid[:5] # Best effort
+    return best_candidates
+
+def run_optimization():
+    print("Fetching XAUUSD (GC=F) Dataset...")
+    full_data = load_dataset()
+    train, val, fwd = split_dataset(full_data)
+    
+    combinations = grid_combinations()
+    print(f"Starting Ultra-Conservative Grid Search on {len(combinations)} candidates "
+          f"({SEARCH_SPACE.upper_bound() - len(combinations)} infeasible/duplicate points pruned)...")
+    
+    with WorkerPool(evaluate_batch, initializer=init_datasets, initargs=(train, val, fwd, full_data)) as pool:
+        results = evaluate_grid(pool, combinations)
+        pool.report()
+        pool.export_telemetry("wf_optimizer_pool_telemetry.json")
+    
+    save_sweep(results)
+    best_candidates = rank_candidates(results)
+    # PBO / deflated Sharpe over every candidate tried, on the full-period monthly returns
+    M, params = returns_matrix(results)
+    enough = M.shape[1] > 1 and M.shape[0] >= 2 * OverfitConfig.BLOCKS
+    overfit = summary_markdown(overfit_summary(M, params)) if enough else "- Too few candidates or months for CSCV.\n"
 
     # Final Precision Run for best set with scaled risk
     best_p = {'fast': 8, 'medium': 55, 'rsi_ob': 75, 'rsi_os': 25, 'atr_mult': 1.5, 'adx_min': 25, 'base_risk': 0.4}
     res = TitanWFEngine(full_data).backtest(best_p)
     
-    report = f"""# SHADOW TITAN V1: INSTITUTIONAL OPTIMIZATION REPORT
-## 🏆 FINAL PARAMETER SET: {best_p}
-
-### 📊 Performance Summary (2016 - 2026)
-- **Total Return**: {res['return']:.2f}%
-- **Max Closed-Equity DD**: {res['max_dd']:.2f}% (Constraint: ≤4%)
-- **Total Trades**: {res['trades']} (Constraint: ≥400)
-- **Sharpe Ratio**: {res['sharpe']:.2f}
-
-### 🧬 Logical Integrity
-- **EMA Convergence**: 8 / 55 (Stable mid-term trend tracking)
-- **RSI Sniper**: 25/75 (Extreme exhaustion entries only)
-- **ADX Guard**: 25 (Choppy market protection)
-- **Friction**: Real spread and slippage applied.
-
----
-*Verified for Prop-Firm Deployment.*
-"""
-    with open("/Users/muhammedriyaz/.gemini/antigravity/scratch/shadowbot_pro/SHADOW_TITAN_RE_OPTIMIZED_AUDIT.md", "w") as f:
-        f.write(report)
-    print("Final Precise Report Generated.")
+    ResultStore().save("wf_optimizer", {"best_params": best_p, "final": res, "overfit_markdown": overfit})
+    print(f"Final Precise Report: {render_all(['wf_optimizer_report'])}")
 
 if __name__ == "__main__":
     run_optimization()
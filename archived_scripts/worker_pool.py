@@ -0,0 +1,248 @@
+import os
+import sys
+import json
+import time
+import traceback
+from collections import deque
+import multiprocessing as mp
+from multiprocessing.connection import wait
+import numpy as np
+
+# --- SHADOW TITAN: FAULT-TOLERANT WORKER POOL ---
+# Drop-in replacement for mp.Pool.map in long sweeps. Every worker owns a
+# private pipe and runs one task at a time, so a task that hangs, crashes its
+# process or blows through the memory ceiling is attributable: the worker is
+# killed and respawned and the task retried, up to RETRIES times, before it
+# is given up as `on_failure` (None). Workers are also recycled after
+# MAX_TASKS_PER_WORKER tasks or when their RSS passes MAX_RSS_MB, which
+# bounds slow leaks. Per-worker CPU, RSS and task-latency telemetry is kept
+# for the whole run.
+
+class Config:
+    WORKERS = mp.cpu_count()
+    TASK_TIMEOUT = 600.0           # Seconds per task attempt (None = no limit)
+    RETRIES = 2                    # Extra attempts after a failure
+    MAX_TASKS_PER_WORKER = 200     # Recycle after this many tasks (None = never)
+    MAX_RSS_MB = 2048              # Recycle after a task that leaves the worker above this
+    HARD_RSS_FACTOR = 1.5          # Kill a running task once RSS passes MAX_RSS_MB * this
+    POLL_INTERVAL = 1.0            # Seconds between timeout / RSS checks
+
+def rss_mb(pid=None):
+    """Resident set size in MB (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        if pid is not None: return 0.0
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+def _worker_main(conn, fn, initializer, initargs, max_tasks, max_rss):
+    if initializer is not None: initializer(*initargs)
+    done = 0
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None: break
+        task_id, args = msg
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            result, ok = fn(args), True
+        except Exception as e:
+            result, ok = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}", False
+        done += 1
+        rss = rss_mb()
+        recycle = bool((max_tasks and done >= max_tasks) or (max_rss and rss > max_rss))
+        reply = (task_id, ok, result, time.perf_counter() - wall, time.process_time() - cpu, rss, recycle)
+        try:
+            conn.send(reply)
+        except Exception as e:  # Unpicklable result
+            conn.send((task_id, False, f"result not sendable: {e!r}", reply[3], reply[4], rss, recycle))
+        if recycle: break
+    conn.close()
+
+class _Worker:
+    def __init__(self, slot, proc, conn):
+        self.slot, self.proc, self.conn = slot, proc, conn
+        self.task = None          # (task_id, started) while a task is in flight
+
+class WorkerPool:
+    """pool.map(items) -> results in input order; failed tasks come back as on_failure."""
+    def __init__(self, fn, workers=None, initializer=None, initargs=(), timeout=None, retries=None,
+                 max_tasks_per_worker=None, max_rss_mb=None, on_failure=None, verbose=True):
+        self.fn, self.initializer, self.initargs = fn, initializer, initargs
+        self.n_workers = workers or Config.WORKERS
+        self.timeout = Config.TASK_TIMEOUT if timeout is None else timeout
+        self.retries = Config.RETRIES if retries is None else retries
+        self.max_tasks = Config.MAX_TASKS_PER_WORKER if max_tasks_per_worker is None else max_tasks_per_worker
+        self.max_rss = Config.MAX_RSS_MB if max_rss_mb is None else max_rss_mb
+        self.on_failure = on_failure
+        self.verbose = verbose
+        self.ctx = mp.get_context()
+        self.workers = []
+        self.failures = []        # {task, reason, detail} of tasks given up
+        self.events = []          # (time, slot, event) for kills, crashes and recycles
+        self.stats = [self._new_stats(s) for s in range(self.n_workers)]
+
+    @staticmethod
+    def _new_stats(slot):
+        return {"slot": slot, "spawned": 0, "tasks": 0, "errors": 0, "timeouts": 0, "crashes": 0,
+                "memory_kills": 0, "recycles": 0, "cpu_s": 0.0, "busy_s": 0.0, "rss_mb": 0.0,
+                "peak_rss_mb": 0.0, "latencies": []}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _spawn(self, slot):
+        parent, child = self.ctx.Pipe()
+        proc = self.ctx.Process(target=_worker_main, daemon=True,
+                                args=(child, self.fn, self.initializer, self.initargs, self.max_tasks, self.max_rss))
+        proc.start()
+        child.close()
+        self.stats[slot]["spawned"] += 1
+        return _Worker(slot, proc, parent)
+
+    def _replace(self, w, event, kill=False):
+        if kill and w.proc.is_alive(): w.proc.kill()
+        w.proc.join()
+        w.conn.close()
+        self.events.append((time.time(), w.slot, event))
+        if event != "recycle" and self.verbose:
+            print(f"[pool] worker {w.slot} (pid {w.proc.pid}) {event}; respawning")
+        self.workers[self.workers.index(w)] = self._spawn(w.slot)
+
+    def _start(self):
+        if not self.workers: self.workers = [self._spawn(s) for s in range(self.n_workers)]
+
+    def map(self, items):
+        self._start()
+        items = list(items)
+        results = [self.on_failure] * len(items)
+        attempts = [0] * len(items)
+        pending = deque(range(len(items)))
+        remaining = len(items)
+
+        def fail(task_id, reason, detail=""):
+            nonlocal remaining
+            attempts[task_id] += 1
+            if attempts[task_id] <= self.retries:
+                pending.append(task_id)
+            else:
+                self.failures.append({"task": task_id, "reason": reason, "detail": detail})
+                remaining -= 1
+
+        while remaining:
+            for w in list(self.workers):
+                if w.task is None and pending:
+                    # A worker can die while idle (OOM kill between tasks or between map() calls)
+                    if not w.proc.is_alive():
+                        self.stats[w.slot]["crashes"] += 1
+                        self._replace(w, f"died while idle (exit code {w.proc.exitcode})")
+                        continue
+                    task_id = pending.popleft()
+                    sent = True
+                    try:
+                        w.conn.send((task_id, items[task_id]))
+                    except (BrokenPipeError, OSError):
+                        sent = False
+                    # Requeue and respawn outside the except block (see the receive path)
+                    if not sent:
+                        pending.appendleft(task_id)
+                        self.stats[w.slot]["crashes"] += 1
+                        self._replace(w, "died while idle", kill=True)
+                        continue
+                    w.task = (task_id, time.perf_counter())
+            busy = [w for w in self.workers if w.task is not None]
+            ready = set(wait([w.conn for w in busy] + [w.proc.sentinel for w in busy], Config.POLL_INTERVAL))
+            now = time.perf_counter()
+            for w in busy:
+                task_id, started = w.task
+                st = self.stats[w.slot]
+                if w.conn in ready:
+                    crashed = False
+                    try:
+                        _, ok, result, wall, cpu, rss, recycle = w.conn.recv()
+                    except (EOFError, OSError):
+                        crashed = True
+                    # Respawn outside the except block, or the new worker's tracebacks chain this EOFError
+                    if crashed:
+                        w.proc.join(timeout=1)
+                        w.task = None
+                        st["crashes"] += 1
+                        fail(task_id, "crash", f"exit code {w.proc.exitcode}")
+                        self._replace(w, "crashed", kill=True)
+                        continue
+                    w.task = None
+                    st["tasks"] += 1; st["cpu_s"] += cpu; st["busy_s"] += wall
+                    st["rss_mb"] = rss; st["peak_rss_mb"] = max(st["peak_rss_mb"], rss)
+                    st["latencies"].append(wall)
+                    if ok:
+                        results[task_id] = result
+                        remaining -= 1
+                    else:
+                        st["errors"] += 1
+                        fail(task_id, "error", result)
+                    if recycle:
+                        st["recycles"] += 1
+                        self._replace(w, "recycle")
+                elif w.proc.sentinel in ready:
+                    w.proc.join()
+                    w.task = None
+                    st["crashes"] += 1
+                    fail(task_id, "crash", f"exit code {w.proc.exitcode}")
+                    self._replace(w, f"died (exit code {w.proc.exitcode})")
+                elif self.timeout and now - started > self.timeout:
+                    w.task = None
+                    st["timeouts"] += 1
+                    fail(task_id, "timeout", f"> {self.timeout:.0f}s")
+                    self._replace(w, f"timed out after {now - started:.0f}s", kill=True)
+                elif self.max_rss and rss_mb(w.proc.pid) > self.max_rss * Config.HARD_RSS_FACTOR:
+                    w.task = None
+                    st["memory_kills"] += 1
+                    fail(task_id, "memory", f"> {self.max_rss * Config.HARD_RSS_FACTOR:.0f} MB")
+                    self._replace(w, "exceeded the memory ceiling", kill=True)
+        return results
+
+    def close(self):
+        for w in self.workers:
+            try:
+                w.conn.send(None)
+            except OSError:
+                pass
+        for w in self.workers:
+            w.proc.join(timeout=5)
+            if w.proc.is_alive(): w.proc.kill()
+            w.conn.close()
+        self.workers = []
+
+    def telemetry(self):
+        """Per-worker-slot totals with task latency percentiles (seconds)."""
+        rows = []
+        for st in self.stats:
+            lat = np.asarray(st["latencies"])
+            row = {k: v for k, v in st.items() if k != "latencies"}
+            row.update({"p50_s": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+                        "p95_s": float(np.percentile(lat, 95)) if len(lat) else 0.0,
+                        "max_s": float(lat.max()) if len(lat) else 0.0,
+                        "cpu_util": row["cpu_s"] / row["busy_s"] if row["busy_s"] else 0.0})
+            rows.append(row)
+        return rows
+
+    def export_telemetry(self, path):
+        with open(path, "w") as f:
+            json.dump({"workers": self.telemetry(), "failures": self.failures, "events": self.events}, f, indent=2, default=str)
+
+    def report(self):
+        rows = self.telemetry()
+        print(f"[pool] {sum(r['tasks'] for r in rows)} tasks on {len(rows)} workers, {len(self.failures)} given up, "
+              f"{sum(r['timeouts'] for r in rows)} timeouts, {sum(r['crashes'] for r in rows)} crashes, "
+              f"{sum(r['memory_kills'] for r in rows)} memory kills, {sum(r['recycles'] for r in rows)} recycles")
+        for r in rows:
+            print(f"  worker {r['slot']}: {r['tasks']} tasks, p50 {r['p50_s']:.2f}s p95 {r['p95_s']:.2f}s, "
+                  f"cpu {r['cpu_util'] * 100:.0f}%, rss {r['rss_mb']:.0f} MB (peak {r['peak_rss_mb']:.0f}), spawned {r['spawned']}x")